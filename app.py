@@ -3,6 +3,7 @@ from datetime import datetime
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import requests
+from sqlalchemy import select
 
 from db import db, get_database_uri
 from models import ChatMessage, Memo, CalendarEvent
@@ -24,6 +25,10 @@ def create_app():
 
     with app.app_context():
         db.create_all()  # 초기 테이블 자동 생성(운영에서는 migrate 권장)
+        # create_all은 이미 있는 테이블엔 인덱스를 안 만들어서 따로 보정
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=db.engine, checkfirst=True)
 
     # -------------------------
     # Health / Ping
@@ -52,21 +57,40 @@ def create_app():
     # -------------------------
     # Chat API
     # -------------------------
+    def _int_arg(name):
+        try:
+            v = request.args.get(name)
+            return int(v) if v not in (None, "") else None
+        except ValueError:
+            return None
+
     @app.get("/api/chat/messages")
     def get_chat_messages():
+        """
+        keyset 커서 (응답은 항상 id 오름차순):
+          ?after_id=N   → N 이후 새 메시지 (폴링)
+          ?before_id=N  → N 이전 limit개 (위로 스크롤, 다음 커서 = 응답 첫 id)
+          둘 다 없으면  → 최근 limit개
+        (room, id) 인덱스 범위만 읽음. OFFSET 없음.
+        """
         room = request.args.get("room", "default")
         limit = int(request.args.get("limit", "100"))
         limit = max(1, min(limit, 500))
-
-        rows = (
-            ChatMessage.query
-            .filter_by(room=room)
-            .order_by(ChatMessage.id.desc())
-            .limit(limit)
-            .all()
-        )
-        rows.reverse()
-        return jsonify([r.to_dict() for r in rows])
+        after_id = _int_arg("after_id")
+        before_id = _int_arg("before_id")
+
+        q = select(*ChatMessage.list_columns()).where(ChatMessage.room == room)
+        if after_id is not None:
+            q = q.where(ChatMessage.id > after_id).order_by(ChatMessage.id.asc()).limit(limit)
+        else:
+            if before_id is not None:
+                q = q.where(ChatMessage.id < before_id)
+            # 최근 limit개를 DB에서 뒤집어서 받음 (파이썬 reverse 없이)
+            sub = q.order_by(ChatMessage.id.desc()).limit(limit).subquery()
+            q = select(sub).order_by(sub.c.id.asc())
+
+        rows = db.session.execute(q).all()
+        return jsonify([ChatMessage.row_to_dict(r) for r in rows])
 
     @app.post("/api/chat/messages")
     def post_chat_message():
@@ -95,8 +119,8 @@ def create_app():
     # -------------------------
     @app.get("/api/memos")
     def list_memos():
-        rows = Memo.query.order_by(Memo.pinned.desc(), Memo.updated_at.desc()).limit(500).all()
-        return jsonify([r.to_dict() for r in rows])
+        q = select(*Memo.list_columns()).order_by(Memo.pinned.desc(), Memo.updated_at.desc()).limit(500)
+        return jsonify([Memo.row_to_dict(r) for r in db.session.execute(q)])
 
     @app.post("/api/memos")
     def create_memo():
@@ -157,8 +181,8 @@ def create_app():
     @app.get("/api/calendar/events")
     def list_events():
         # 필요하면 기간 필터 추가 가능
-        rows = CalendarEvent.query.order_by(CalendarEvent.start_at.asc()).limit(1000).all()
-        return jsonify([r.to_dict() for r in rows])
+        q = select(*CalendarEvent.list_columns()).order_by(CalendarEvent.start_at.asc()).limit(1000)
+        return jsonify([CalendarEvent.row_to_dict(r) for r in db.session.execute(q)])
 
     @app.post("/api/calendar/events")
     def create_event():
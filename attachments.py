@@ -0,0 +1,140 @@
+# attachments.py
+# ✅ 채팅 첨부파일 저장소 (내용 주소 방식)
+#   - 파일 경로 = sha256 해시 → 같은 파일은 한 번만 저장(중복 제거)
+#   - 업로드는 64KB씩 읽으면서 해시 계산 + 임시파일 기록 → 메모리에 파일 전체를 올리지 않음
+#   - 썸네일은 백그라운드 스레드에서 생성 (Pillow 없으면 생략)
+import hashlib
+import os
+import queue
+import re
+import tempfile
+import threading
+
+try:
+    from PIL import Image
+except Exception:
+    Image = None
+
+CHUNK_SIZE = 64 * 1024
+THUMB_SIZE = (320, 320)
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class TooLarge(Exception):
+    pass
+
+
+def storage_dir():
+    d = (os.environ.get("ATTACHMENT_DIR") or "").strip()
+    if not d:
+        d = os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads")
+    return d
+
+
+def max_bytes():
+    try:
+        return int(float(os.environ.get("ATTACHMENT_MAX_MB", "20")) * 1024 * 1024)
+    except Exception:
+        return 20 * 1024 * 1024
+
+
+def blob_path(sha256):
+    return os.path.join(storage_dir(), sha256[:2], sha256[2:4], sha256)
+
+
+def thumb_path(sha256):
+    return os.path.join(storage_dir(), "thumbs", sha256[:2], sha256 + ".jpg")
+
+
+def save_stream(stream, limit=None):
+    """
+    stream(file-like) → (sha256, size, created)
+    created=False면 이미 같은 내용이 있어서 임시파일을 버린 것
+    """
+    limit = limit or max_bytes()
+    base = storage_dir()
+    tmp_dir = os.path.join(base, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    h = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    raise TooLarge()
+                h.update(chunk)
+                f.write(chunk)
+
+        sha = h.hexdigest()
+        dst = blob_path(sha)
+        if os.path.exists(dst):
+            os.unlink(tmp)
+            return sha, size, False
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        os.replace(tmp, dst)  # 같은 파일시스템 → 원자적 이동
+        return sha, size, True
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def is_image(mime):
+    return (mime or "").lower() in ("image/png", "image/jpeg", "image/gif", "image/webp")
+
+
+# -------------------------------
+# ✅ 썸네일 백그라운드 작업
+# -------------------------------
+_THUMB_QUEUE = queue.Queue(maxsize=1000)
+_worker_started = False
+_worker_lock = threading.Lock()
+
+
+def make_thumbnail(sha256):
+    if Image is None:
+        return False
+    dst = thumb_path(sha256)
+    if os.path.exists(dst):
+        return True
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp = dst + ".tmp"
+    with Image.open(blob_path(sha256)) as im:
+        im.thumbnail(THUMB_SIZE)
+        if im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        im.save(tmp, "JPEG", quality=80)
+    os.replace(tmp, dst)
+    return True
+
+
+def _thumb_worker():
+    while True:
+        sha256 = _THUMB_QUEUE.get()
+        try:
+            make_thumbnail(sha256)
+        except Exception as e:
+            print("[attachments] thumbnail failed:", sha256[:12], e)
+        finally:
+            _THUMB_QUEUE.task_done()
+
+
+def enqueue_thumbnail(sha256):
+    global _worker_started
+    if Image is None:
+        return False
+    with _worker_lock:
+        if not _worker_started:
+            threading.Thread(target=_thumb_worker, daemon=True).start()
+            _worker_started = True
+    try:
+        _THUMB_QUEUE.put_nowait(sha256)
+    except queue.Full:
+        return False
+    return True
@@ -0,0 +1,770 @@
+# bench.py
+# ✅ 간단 벤치마크 모음 (운영 코드에는 영향 없음)
+#
+#   python bench.py recurrence          # 반복 일정 전개 (DB 불필요)
+#   python bench.py events-batch -n 200 # PUT 개별 vs /api/events/batch (DATABASE_URL 필요)
+#   python bench.py rate-parse [--html saved.html ...]  # 환율 페이지 파싱 (전체 vs 조각)
+#   python bench.py push-send -n 300    # webpush() 매번 vs 세션/VAPID 캐시 (로컬 가짜 push 서버)
+#   python bench.py push-fanout -n 10000 --latency-ms 50 --gone-rate 0.05 [--seed-db]
+#                                       # fan-out 시간/초당 전송 + send_chat 응답 시간 (pushmock.py)
+#   python bench.py orm-vs-core -n 20000 [--db-url postgresql://...]
+#                                       # app.py 목록 조회: ORM 객체 vs 컬럼 튜플
+#   python bench.py suggest -n 100000   # 메모 자동완성 색인/질의 지연 (DB 불필요)
+#   python bench.py group-commit -n 5000 [--window-ms 5]
+#                                       # send_chat 저장: 요청마다 커밋 vs 그룹 커밋 (동시 50~500명)
+#   python bench.py index-ttfb -n 500 [--rate-ms 1500 --db-ms 30]
+#                                       # 메인 페이지 첫 바이트/셸 도착 시간: 한 번에 렌더 vs 스트리밍
+#   python bench.py faults -n 5 [--deadline 3]
+#                                       # 장애 주입: 멈춘 Postgres/시티은행/push 서비스 (faultmock.py), 브레이커/deadline 끔 vs 켬
+#   python bench.py replica -n 200      # 복제본 라우팅 + read-your-writes (DATABASE_URL + DATABASE_READ_URL 필요)
+#   python bench.py export-import -n 1000000 --yes-truncate
+#                                       # /admin/export → /admin/import (⚠️ 빈 테스트 DB에서만: chat_messages 비움)
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+# ===============================
+# ✅ 반복 일정 전개: 시리즈 1,000개 × 1년 window
+# ===============================
+def bench_recurrence(args):
+    import recurrence
+
+    rules = ["FREQ=DAILY", "FREQ=WEEKLY;BYDAY=MO,WE,FR", "FREQ=WEEKLY;INTERVAL=2",
+             "FREQ=MONTHLY", "FREQ=YEARLY", "FREQ=DAILY;COUNT=200"]
+    base = datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc)
+    series = [
+        (i, rules[i % len(rules)], base + timedelta(days=i % 365, hours=i % 8),
+         base + timedelta(days=i % 365, hours=i % 8 + 1), "2025-03-03,2025-07-07")
+        for i in range(args.n)
+    ]
+    ws = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    we = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def run():
+        return sum(len(recurrence.expand_cached(*s, ws, we)) for s in series)
+
+    recurrence.clear_cache()
+    for label in ("cold", "warm"):
+        dt, total = _timed(run)
+        print(f"recurrence {label}: series={args.n} occurrences={total} {dt * 1000:.1f} ms")
+
+
+# ===============================
+# ✅ 캘린더 일괄 수정: PUT × N vs batch 1회
+# ===============================
+def bench_events_batch(args):
+    from keyword_manager_web import app
+
+    client = app.test_client()
+    n = args.n
+    base = datetime(2030, 1, 1, 9, 0)
+
+    created = client.post("/api/events/batch", json={"ops": [
+        {"op": "create", "title": f"bench {i}", "start": (base + timedelta(hours=i)).isoformat()}
+        for i in range(n)
+    ]}).get_json()
+    ids = [r["id"] for r in created["results"] if r.get("ok")]
+
+    try:
+        def per_event():
+            for i, eid in enumerate(ids):
+                client.put(f"/api/events/{eid}", json={"start": (base + timedelta(days=1, hours=i)).isoformat()})
+
+        def batched():
+            return client.post("/api/events/batch", json={"ops": [
+                {"op": "update", "id": eid, "start": (base + timedelta(days=2, hours=i)).isoformat()}
+                for i, eid in enumerate(ids)
+            ]}).get_json()
+
+        dt_single, _ = _timed(per_event)
+        dt_batch, res = _timed(batched)
+        print(f"PUT x{len(ids)}: {dt_single * 1000:.1f} ms ({len(ids) / dt_single:.0f} ops/s)")
+        print(f"batch x{len(ids)}: {dt_batch * 1000:.1f} ms ({len(ids) / dt_batch:.0f} ops/s) applied={res['applied']}")
+
+        # stale version → conflict 응답 시간
+        dt_stale, res = _timed(lambda: client.post("/api/events/batch", json={"ops": [
+            {"op": "update", "id": eid, "version": 1, "title": "stale"} for eid in ids
+        ]}).get_json())
+        print(f"stale batch x{len(ids)}: {dt_stale * 1000:.1f} ms failed={res['failed']}")
+    finally:
+        client.post("/api/events/batch", json={"ops": [{"op": "delete", "id": eid} for eid in ids]})
+
+
+# ===============================
+# ✅ 환율 파싱: 페이지 전체 html.parser vs ul.exchangeList 조각
+#    --html 로 저장해 둔 실제 페이지를 넘기면 그걸로, 없으면 비슷한 크기의 가짜 페이지로 측정
+# ===============================
+def _fake_citibank_page():
+    noise = "".join(
+        f'<div class="row r{i}"><a href="/m{i}.act">메뉴 {i}</a><p>안내 문구 {i} ' + "x" * 80 + "</p></div>"
+        for i in range(1500)
+    )
+    items = "".join(
+        f'<li><span class="flag{code}">{name}</span><span class="green">{rate}</span></li>'
+        for code, name, rate in [("Us", "미국 USD", "1,380.50"), ("Jp", "일본 JPY", "915.20"),
+                                 ("Eu", "유럽 EUR", "1,490.10"), ("Cn", "중국 CNY", "190.35")]
+    )
+    return f"<html><head><title>t</title></head><body>{noise}<ul class=\"exchangeList\">{items}</ul>{noise}</body></html>"
+
+
+def bench_rate_parse(args):
+    from bs4 import BeautifulSoup
+    from keyword_manager_web import parse_cny_base_rate, _find_cny_rate, BS_PARSER
+
+    pages = []
+    for path in args.html or []:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            pages.append((path, f.read()))
+    if not pages:
+        pages.append(("synthetic", _fake_citibank_page()))
+
+    for name, html in pages:
+        def full():
+            return _find_cny_rate(BeautifulSoup(html, "html.parser"))
+
+        def fragment():
+            return parse_cny_base_rate(html)
+
+        for label, fn in (("full html.parser", full), (f"fragment ({BS_PARSER})", fragment)):
+            fn()
+            dt, val = _timed(lambda: [fn() for _ in range(args.n)])
+            print(f"{name} [{len(html) // 1024} KB] {label}: {dt / args.n * 1000:.2f} ms/parse rate={val[0]}")
+
+
+# ===============================
+# ✅ 푸시 전송: 로컬 가짜 push 서버(201 응답)로 초당 전송 수 비교
+# ===============================
+def bench_push_send(args):
+    import json
+    import os
+    from pywebpush import webpush
+    import push_routes
+    from pushmock import MockPushService, fake_subscriptions, fake_vapid_keys
+
+    mock = MockPushService().start()
+    priv, pub = fake_vapid_keys()
+    os.environ["VAPID_PRIVATE_KEY"] = priv
+    os.environ["VAPID_PUBLIC_KEY"] = pub
+    subs = fake_subscriptions(mock.base_url, args.n)
+    payload = {"title": "bench", "body": "x" * 100, "url": "/"}
+
+    def legacy():
+        for sub in subs:
+            webpush(subscription_info=sub, data=json.dumps(payload, ensure_ascii=False),
+                    vapid_private_key=priv, vapid_claims={"sub": "mailto:bench@example.com"})
+
+    def pooled():
+        push_routes._SUBS.clear()
+        push_routes._SUBS.update({s["endpoint"]: s for s in subs})
+        return push_routes._send_payload_to_subs(payload)[0]
+
+    try:
+        dt_legacy, _ = _timed(legacy)
+        dt_pooled, res = _timed(pooled)
+        dt_warm, res = _timed(pooled)
+        print(f"webpush() each: {dt_legacy * 1000:.0f} ms ({args.n / dt_legacy:.0f} sends/s)")
+        print(f"pooled (cold):  {dt_pooled * 1000:.0f} ms ({args.n / dt_pooled:.0f} sends/s)")
+        print(f"pooled (warm):  {dt_warm * 1000:.0f} ms ({args.n / dt_warm:.0f} sends/s) sent={res['sent']} failed={res['failed']}")
+    finally:
+        mock.stop()
+
+
+# ===============================
+# ✅ Push fan-out: 구독 n개 × 가짜 push 서비스(지연/오류/410)
+#   - fan-out 전체 시간, 초당 전송 수
+#   - DATABASE_URL 있으면 send_chat 응답 시간도: 바로 전송(PUSH_COALESCE_SEC=0) vs 묶음(기본)
+#     (--seed-db: 가짜 구독을 push_subscriptions에 넣고 DB 로드 경로로 실행, 끝나면 삭제)
+# ===============================
+def _percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def _bench_send_chat_latency(label, client, rounds):
+    lat = []
+    for i in range(rounds):
+        t0 = time.perf_counter()
+        client.post("/api/chat/send", json={"room": "bench-push", "sender": "bench", "message": f"bench {i}"})
+        lat.append((time.perf_counter() - t0) * 1000)
+    print(f"send_chat {label}: p50 {_percentile(lat, 0.5):.1f} ms, p95 {_percentile(lat, 0.95):.1f} ms, "
+          f"max {max(lat):.1f} ms")
+
+
+def bench_push_fanout(args):
+    import os
+    import push_routes
+    from pushmock import (MockPushService, delete_push_subscriptions, fake_subscriptions,
+                          fake_vapid_keys, seed_push_subscriptions)
+
+    mock = MockPushService(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 2,
+                           error_rate=args.error_rate, gone_rate=args.gone_rate, seed=1).start()
+    priv, pub = fake_vapid_keys()
+    os.environ["VAPID_PRIVATE_KEY"] = priv
+    os.environ["VAPID_PUBLIC_KEY"] = pub
+    subs = fake_subscriptions(mock.base_url, args.n)
+    print(f"{args.n} subscriptions, latency {args.latency_ms:.0f}±{args.latency_ms / 2:.0f} ms, "
+          f"errors {args.error_rate:.0%}, gone {args.gone_rate:.0%}")
+
+    has_db = bool((os.environ.get("DATABASE_URL") or "").strip())
+    if args.seed_db and not has_db:
+        raise SystemExit("--seed-db 는 DATABASE_URL 필요")
+
+    def load_subs():
+        push_routes._SUBS.clear()
+        push_routes._SUB_CLIENTS.clear()
+        if not args.seed_db:
+            push_routes._SUBS.update({s["endpoint"]: s for s in subs})
+        # seed-db면 비워두면 _send_payload_to_subs()가 DB에서 로드
+
+    try:
+        if args.seed_db:
+            with push_routes._get_conn() as conn:
+                seed_push_subscriptions(conn, subs)
+
+        payload = {"title": "bench", "body": "x" * 100, "url": "/"}
+        for label in ("cold", "warm"):
+            if label == "cold":
+                load_subs()
+                push_routes._PUSHERS.clear()
+            mock.reset_stats()
+            dt, (res, _status) = _timed(lambda: push_routes._send_payload_to_subs(payload))
+            st = mock.stats()
+            print(f"fan-out {label}: {dt * 1000:.0f} ms, {res.get('sent', 0) / dt:.0f} sends/s "
+                  f"(sent={res.get('sent')} failed={res.get('failed')}) "
+                  f"mock ok={st['ok']} gone={st['gone']} errors={st['errors']} bytes={st['bytes']}")
+
+        if not has_db:
+            print("send_chat latency: skipped (DATABASE_URL not set)")
+            return
+
+        from keyword_manager_web import app, ensure_db
+        ensure_db()
+        client = app.test_client()
+        rounds = 20
+        # 구독 캐시를 다시 채워서 fan-out이 실제로 일어나게
+        load_subs()
+        os.environ["PUSH_COALESCE_SEC"] = "0"
+        _bench_send_chat_latency("inline fan-out ", client, rounds)
+        os.environ["PUSH_COALESCE_SEC"] = "3"
+        _bench_send_chat_latency("coalesced      ", client, rounds)
+        os.environ.pop("PUSH_COALESCE_SEC", None)
+    finally:
+        if args.seed_db:
+            with push_routes._get_conn() as conn:
+                delete_push_subscriptions(conn, mock.base_url)
+        mock.stop()
+
+
+# ===============================
+# ✅ NDJSON 내보내기/가져오기 처리량 (chat_messages n행)
+# ===============================
+def bench_export_import(args):
+    import os
+    import resource
+    import tempfile
+    from keyword_manager_web import app, ensure_db, get_conn
+
+    if not args.yes_truncate:
+        raise SystemExit("chat_messages를 비웁니다. 테스트 DB에서 --yes-truncate 와 함께 실행하세요.")
+    os.environ.setdefault("ADMIN_TOKEN", "bench")
+    auth = {"X-Admin-Token": os.environ["ADMIN_TOKEN"]}
+    ensure_db()
+
+    def rss_mb():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("truncate table chat_messages restart identity")
+            with cur.copy("copy chat_messages (room, sender, message, client_id) from stdin") as copy:
+                for i in range(args.n):
+                    copy.write_row(("main", f"user{i % 7}", f"bench message {i} " + "x" * 60, f"c{i % 50}"))
+        conn.commit()
+    print(f"seeded {args.n} rows, peak rss {rss_mb():.0f} MB")
+
+    client = app.test_client()
+    for use_gzip in (False, True):
+        qs = "tables=chat_messages" + ("&gzip=1" if use_gzip else "")
+        with tempfile.TemporaryFile() as f:
+            t0 = time.perf_counter()
+            resp = client.get(f"/admin/export?{qs}", headers=auth, buffered=False)
+            size = 0
+            for chunk in resp.response:
+                f.write(chunk)
+                size += len(chunk)
+            dt_exp = time.perf_counter() - t0
+            print(f"export gzip={use_gzip}: {dt_exp:.1f} s, {args.n / dt_exp:,.0f} rows/s, "
+                  f"{size / 1e6:.1f} MB, peak rss {rss_mb():.0f} MB")
+
+            f.seek(0)
+            t0 = time.perf_counter()
+            res = client.post(f"/admin/import?truncate=1{'&gzip=1' if use_gzip else ''}",
+                              headers=auth, input_stream=f,
+                              content_type="application/x-ndjson").get_json()
+            dt_imp = time.perf_counter() - t0
+            print(f"import gzip={use_gzip}: {dt_imp:.1f} s, {args.n / dt_imp:,.0f} rows/s, "
+                  f"counts={res.get('counts')}, peak rss {rss_mb():.0f} MB")
+
+
+# ===============================
+# ✅ app.py(SQLAlchemy) 목록 조회: ORM 객체 + to_dict() vs 컬럼 튜플 + row_to_dict()
+#   --db-url 없으면 메모리 sqlite (postgres면 인덱스 효과까지 같이 보임)
+# ===============================
+def bench_orm_vs_core(args):
+    from flask import Flask
+    from sqlalchemy import select
+    from db import db
+    from models import CalendarEvent, ChatMessage, Memo
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = args.db_url or "sqlite://"
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        for model in (ChatMessage, Memo, CalendarEvent):
+            db.session.query(model).delete()
+        now = datetime.utcnow()
+        db.session.execute(ChatMessage.__table__.insert(), [
+            {"room": f"room{i % 5}", "sender": "bench", "message": f"bench message {i}", "created_at": now}
+            for i in range(args.n)
+        ])
+        db.session.execute(Memo.__table__.insert(), [
+            {"content": f"memo {i}", "pinned": i % 10 == 0, "updated_at": now - timedelta(minutes=i), "created_at": now}
+            for i in range(args.n)
+        ])
+        db.session.execute(CalendarEvent.__table__.insert(), [
+            {"title": f"event {i}", "note": "", "start_at": now + timedelta(hours=i), "created_at": now}
+            for i in range(args.n)
+        ])
+        db.session.commit()
+
+        cases = {
+            "chat (room, last 500)": (
+                lambda: [r.to_dict() for r in ChatMessage.query.filter_by(room="room0")
+                         .order_by(ChatMessage.id.desc()).limit(500).all()[::-1]],
+                lambda: [ChatMessage.row_to_dict(r) for r in db.session.execute(
+                    select(*ChatMessage.list_columns()).where(ChatMessage.room == "room0")
+                    .order_by(ChatMessage.id.desc()).limit(500)).all()[::-1]],
+            ),
+            "memos (500)": (
+                lambda: [r.to_dict() for r in Memo.query.order_by(Memo.pinned.desc(), Memo.updated_at.desc())
+                         .limit(500).all()],
+                lambda: [Memo.row_to_dict(r) for r in db.session.execute(
+                    select(*Memo.list_columns()).order_by(Memo.pinned.desc(), Memo.updated_at.desc()).limit(500))],
+            ),
+            "events (1000)": (
+                lambda: [r.to_dict() for r in CalendarEvent.query.order_by(CalendarEvent.start_at.asc())
+                         .limit(1000).all()],
+                lambda: [CalendarEvent.row_to_dict(r) for r in db.session.execute(
+                    select(*CalendarEvent.list_columns()).order_by(CalendarEvent.start_at.asc()).limit(1000))],
+            ),
+        }
+        rounds = 30
+
+        def run(fn):
+            n = 0
+            for _ in range(rounds):
+                n += len(fn())
+                db.session.expunge_all()  # 요청마다 새 세션인 것처럼 identity map 비움
+            return n
+
+        for name, (orm, core) in cases.items():
+            for label, fn in (("orm ", orm), ("core", core)):
+                run(fn)  # 워밍업 (쿼리 컴파일 캐시)
+                dt, rows = _timed(lambda: run(fn))
+                print(f"{name:22s} {label}: {dt / rounds * 1000:7.2f} ms/req ({rows / dt:,.0f} rows/s)")
+
+        for model in (ChatMessage, Memo, CalendarEvent):
+            db.session.query(model).delete()
+        db.session.commit()
+
+
+# ===============================
+# ✅ 메모 자동완성: 키워드 n개 색인 후 질의 지연 (DB 불필요)
+# ===============================
+def bench_suggest(args):
+    import random
+    from suggest import PrefixIndex
+
+    rnd = random.Random(1)
+    syllables = [chr(0xAC00 + rnd.randrange(11172)) for _ in range(400)]
+    common = "가나다라마바사아자차카타파하한글삼성전자서울부산"
+    words = set()
+    while len(words) < args.n:
+        w = "".join(rnd.choice(common if rnd.random() < 0.5 else syllables) for _ in range(rnd.randint(2, 6)))
+        if rnd.random() < 0.3:
+            w += " " + "".join(rnd.choice(syllables) for _ in range(rnd.randint(1, 4)))
+        words.add(w)
+    words = list(words)
+
+    idx = PrefixIndex()
+    dt, _ = _timed(lambda: idx.rebuild(words))
+    print(f"rebuild {args.n:,} keywords: {dt * 1000:.0f} ms")
+
+    extra = [f"추가{i}" for i in range(1000)]
+    dt, _ = _timed(lambda: [idx.add(w) for w in extra])
+    print(f"add (incremental):    {dt / len(extra) * 1e6:.1f} µs/keyword")
+    dt, _ = _timed(lambda: [idx.remove(w) for w in extra])
+    print(f"remove (incremental): {dt / len(extra) * 1e6:.1f} µs/keyword")
+
+    queries = ["한", "한그", "삼성", "ㅅㅅ", "ㅎㄱ", "서울 ", "가나다", "전자", "ㄱ"]
+    queries += [rnd.choice(words)[:rnd.randint(1, 3)] for _ in range(200)]
+    rounds = 5
+    lat = []
+    for _ in range(rounds):
+        for q in queries:
+            t0 = time.perf_counter()
+            idx.suggest(q, 10)
+            lat.append((time.perf_counter() - t0) * 1000)
+    lat.sort()
+    print(f"suggest: p50 {lat[len(lat) // 2]:.3f} ms, p99 {lat[int(len(lat) * 0.99)]:.3f} ms, max {lat[-1]:.3f} ms")
+    for q in ("한그", "ㅎㄱ", "삼ㅅ"):
+        print(f"  {q!r} → {idx.suggest(q, 5)}")
+
+
+# ===============================
+# ✅ 채팅 그룹 커밋: 동시 발신자 50~500명, 요청마다 커밋 vs 묶어서 커밋
+#   DATABASE_URL 있으면 실제 chat_messages에 (room=bench-gc), 없으면 커밋 1번 = --fsync-ms 로 흉내
+# ===============================
+def bench_group_commit(args):
+    import os
+    import threading
+    from groupcommit import GroupCommitter
+
+    has_db = bool((os.environ.get("DATABASE_URL") or "").strip())
+    if has_db:
+        import keyword_manager_web as kmw
+        kmw.ensure_db()
+        stamp = kmw._chat_stamp
+
+        def flush(items):
+            return kmw._chat_insert_batch(items)
+    else:
+        print(f"DATABASE_URL 없음 → 커밋 1번 = {args.fsync_ms} ms 로 흉내")
+        lock = threading.Lock()
+        seq = [0]
+
+        def stamp(item):
+            item["created_at"] = datetime.now(timezone.utc)
+
+        def flush(items):
+            with lock:  # 한 번에 하나의 WAL flush
+                time.sleep(args.fsync_ms / 1000 + len(items) * 0.00001)
+                start = seq[0]
+                seq[0] += len(items)
+            return list(range(start + 1, start + 1 + len(items)))
+
+    def run(concurrency, per_sender, committer):
+        ids_by_sender = [[] for _ in range(concurrency)]
+        barrier = threading.Barrier(concurrency)
+
+        def sender(i):
+            barrier.wait()
+            for k in range(per_sender):
+                item = {"room": "bench-gc", "sender": f"s{i}", "message": f"m{k}", "client_id": None, "attachment": None}
+                if committer is None:
+                    stamp(item)
+                    ids_by_sender[i].append(flush([item])[0])
+                else:
+                    ids_by_sender[i].append(committer.submit(item, prepare=stamp))
+
+        threads = [threading.Thread(target=sender, args=(i,)) for i in range(concurrency)]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        dt = time.perf_counter() - t0
+        # 한 발신자가 보낸 순서 = id 순서
+        ordered = all(ids == sorted(ids) for ids in ids_by_sender)
+        return dt, concurrency * per_sender, ordered
+
+    for concurrency in (50, 100, 250, 500):
+        per_sender = max(1, args.n // concurrency)
+        dt_each, total, ok_each = run(concurrency, per_sender, None)
+        gc = GroupCommitter(flush, window_sec=args.window_ms / 1000, max_batch=256)
+        dt_gc, _, ok_gc = run(concurrency, per_sender, gc)
+        print(f"{concurrency:4d} senders × {per_sender:3d}: commit each {total / dt_each:8,.0f} msg/s | "
+              f"group {total / dt_gc:8,.0f} msg/s "
+              f"(batches {gc.stats['batches']}, max {gc.stats['max_batch']}) ordered={ok_each and ok_gc}")
+
+    if has_db:
+        with kmw.get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("delete from chat_messages where room = 'bench-gc'")
+            conn.commit()
+
+
+# ===============================
+# ✅ 메인 페이지 TTFB: render_template(전부 모은 뒤) vs 스트리밍
+#   - 환율 스크래핑은 --rate-ms 걸리는 가짜 응답 (캐시 비운 상태 = 그날 첫 방문)
+#   - DATABASE_URL 없으면 메모 조회도 --db-ms + 가짜 메모 n개
+#   - 셸 = rate-bar까지 받은 시점 (브라우저 FCP의 근사치, 실제 페인트는 측정 안 함)
+# ===============================
+def bench_index_ttfb(args):
+    import os
+    from unittest import mock
+    from flask import render_template
+    import keyword_manager_web as kmw
+
+    page = _fake_citibank_page()
+    memos = [f"메모 키워드 {i}" for i in range(args.n)]
+
+    def slow_rate(*a, **kw):
+        time.sleep(args.rate_ms / 1000)
+        return mock.Mock(text=page)
+
+    patches = [mock.patch.object(kmw.requests, "get", slow_rate)]
+    if (os.environ.get("DATABASE_URL") or "").strip():
+        kmw.ensure_db()
+    else:
+        print(f"DATABASE_URL 없음 → 메모 조회 = {args.db_ms} ms + 가짜 메모 {args.n}개")
+
+        def fake_memos():
+            time.sleep(args.db_ms / 1000)
+            yield from memos
+
+        patches += [
+            mock.patch.object(kmw, "_iter_memo_list", fake_memos),
+            mock.patch.object(kmw, "ensure_db", lambda: None),
+            mock.patch.object(kmw, "_save_rate_point", lambda *a, **kw: None),
+        ]
+
+    def before():
+        # 예전 index(): 메모 + 환율을 다 받은 뒤 render_template
+        t0 = time.perf_counter()
+        with kmw.app.test_request_context("/"):
+            html = render_template(
+                "index.html",
+                memo_list=list(kmw._iter_memo_list()),
+                exchange_rate=kmw.get_adjusted_exchange_rate(),
+                rate_pending=False,
+                stream_flush="",
+            )
+        total = time.perf_counter() - t0
+        return total, total, total, total, len(html.encode("utf-8"))
+
+    def after(client):
+        t0 = time.perf_counter()
+        res = client.get("/", buffered=False)
+        ttfb = shell = None
+        size = 0
+        pending = False
+        for chunk in res.response:
+            now = time.perf_counter() - t0
+            if ttfb is None:
+                ttfb = now
+            size += len(chunk)
+            if shell is None and b'class="rate-bar"' in chunk:
+                shell = now
+                pending = b'data-pending="1"' in chunk
+        total = time.perf_counter() - t0
+        res.close()
+        # 캐시가 비어 있으면 브라우저가 /api/rate를 따로 부름 → 환율이 채워지는 시점
+        rate = total
+        if pending:
+            client.get("/api/rate")
+            rate = time.perf_counter() - t0
+        return ttfb, shell, total, rate, size
+
+    for p in patches:
+        p.start()
+    try:
+        client = kmw.app.test_client()
+        print(f"{'':18s} {'TTFB':>9s} {'셸':>9s} {'전체':>9s} {'환율 표시':>9s}")
+        for cache in ("cold", "warm"):
+            for label, fn in (("render_template", before), ("stream", lambda: after(client))):
+                runs = []
+                for _ in range(args.rounds):
+                    if cache == "cold":
+                        kmw._cached_rate.update(value=None, date=None)
+                    else:
+                        kmw.get_adjusted_exchange_rate()
+                    runs.append(fn())
+                ttfb, shell, total, rate, size = (sorted(col)[len(col) // 2] for col in zip(*runs))
+                print(f"{cache} {label:13s} {ttfb * 1000:7.1f}ms {shell * 1000:7.1f}ms "
+                      f"{total * 1000:7.1f}ms {rate * 1000:7.1f}ms  ({size // 1024} KB)")
+    finally:
+        for p in patches:
+            p.stop()
+
+
+# ===============================
+# ✅ 장애 주입: 의존성이 멈췄을 때 요청이 얼마나 붙잡히는지
+#   - Postgres: TCP는 받고 응답 없는 서버 (BlackholeServer) → GET /api/memos n번 + POST 1번
+#   - 시티은행: 응답 안 주는 HTTP 서버 → GET /api/rate n번 (어제 환율이 캐시에 있는 상태)
+#   - push: 응답 안 주는 push 서비스 → 구독 --push-subs개 fan-out (PUSH_TIMEOUT=--push-timeout)
+#   off = BREAKER_FAILURES=0, REQUEST_DEADLINE_SEC=0 (예전 동작) / on = 브레이커 3회 + deadline
+# ===============================
+def bench_faults(args):
+    import os
+    from unittest import mock
+    import faultmock
+    import push_routes
+    import resilience
+    from pushmock import MockPushService, fake_subscriptions, fake_vapid_keys
+    import keyword_manager_web as kmw
+
+    modes = {
+        "off": {"BREAKER_FAILURES": "0", "REQUEST_DEADLINE_SEC": "0"},
+        "on": {"BREAKER_FAILURES": "3", "REQUEST_DEADLINE_SEC": str(args.deadline)},
+    }
+
+    def timed_requests(client, reqs):
+        lat, codes = [], {}
+        for method, url in reqs:
+            t0 = time.perf_counter()
+            res = client.open(url, method=method, json={"content": "bench"} if method == "POST" else None)
+            lat.append(time.perf_counter() - t0)
+            codes[res.status_code] = codes.get(res.status_code, 0) + 1
+            last = res.get_json(silent=True)
+        return lat, codes, last
+
+    def report(label, lat, codes, extra=""):
+        print(f"  {label:4s} total {sum(lat):6.2f}s  first {lat[0] * 1000:7.0f}ms  "
+              f"last {lat[-1] * 1000:7.1f}ms  status {codes} {extra}")
+
+    page = _fake_citibank_page()
+    priv, pub = fake_vapid_keys()
+    env = {"VAPID_PRIVATE_KEY": priv, "VAPID_PUBLIC_KEY": pub}
+
+    with faultmock.BlackholeServer() as bh, \
+            faultmock.SlowHTTPServer(delay_sec=120, body=page) as citi, \
+            MockPushService(latency_ms=120_000) as push, \
+            mock.patch.dict(os.environ, {**env, "DATABASE_URL": bh.pg_url}), \
+            mock.patch.object(kmw, "_DB_READY", True), \
+            mock.patch.object(kmw, "_RATE_URL", citi.base_url), \
+            mock.patch.object(push_routes, "PUSH_TIMEOUT", args.push_timeout):
+        client = kmw.app.test_client()
+        subs = fake_subscriptions(push.base_url, args.push_subs)
+
+        print(f"Postgres 멈춤: GET /api/memos × {args.n} → POST /api/memos")
+        for label, cfg in modes.items():
+            with mock.patch.dict(os.environ, cfg):
+                resilience.reset()
+                lat, codes, last = timed_requests(client, [("GET", "/api/memos")] * args.n + [("POST", "/api/memos")])
+                report(label, lat, codes, f"POST → {last.get('error') if last else None}")
+
+        print(f"시티은행 멈춤: GET /api/rate × {args.n} (캐시: 어제 값)")
+        for label, cfg in modes.items():
+            with mock.patch.dict(os.environ, cfg):
+                resilience.reset()
+                kmw._cached_rate.update(value=123.45, date="2000-01-01")
+                lat, codes, last = timed_requests(client, [("GET", "/api/rate")] * args.n)
+                report(label, lat, codes, f"rate={last.get('rate')} stale={last.get('stale')}")
+
+        print(f"push 서비스 멈춤: 구독 {args.push_subs}개 fan-out (timeout {args.push_timeout}s)")
+        for label, cfg in modes.items():
+            with mock.patch.dict(os.environ, cfg), \
+                    mock.patch.dict(push_routes._SUBS, {s["endpoint"]: s for s in subs}, clear=True):
+                resilience.reset()
+                dt, (res, _) = _timed(lambda: push_routes._send_payload_to_subs({"title": "t", "body": "b"}))
+                print(f"  {label:4s} total {dt:6.2f}s  sent {res['sent']} failed {res['failed']}")
+
+    resilience.reset()
+
+
+# ===============================
+# ✅ 복제본 라우팅: 로컬 Postgres 2개 (primary + streaming replica)
+#   - 같은 클라이언트(쿠키 유지)가 메모 쓰기 → 바로 GET /api/memos: 자기 쓰기가 보이는지
+#   - 쿠키 없는 클라이언트의 GET: 복제본으로 가는 비율
+# ===============================
+def bench_replica(args):
+    import os
+    import replica
+    import keyword_manager_web as kmw
+
+    if not (os.environ.get("DATABASE_URL") and os.environ.get("DATABASE_READ_URL")):
+        print("DATABASE_URL, DATABASE_READ_URL 둘 다 필요 (예: primary 5432, replica 5433)")
+        return
+    kmw.ensure_db()
+    writer = kmw.app.test_client()
+    reader = kmw.app.test_client()
+    before = replica.snapshot()
+
+    missing = 0
+    ids = []
+    lat = []
+    for i in range(args.n):
+        content = f"bench-replica-{time.time_ns()}-{i}"
+        res = writer.post("/api/memos", json={"content": content})
+        ids.append(res.get_json()["id"])
+        t0 = time.perf_counter()
+        rows = writer.get("/api/memos", query_string={"after_id": ids[-1] - 1}).get_json()
+        lat.append(time.perf_counter() - t0)
+        if not any(r["content"] == content for r in rows):
+            missing += 1
+    after_write = replica.snapshot()
+
+    dt, _ = _timed(lambda: [reader.get("/api/memos", query_string={"after_id": ids[-1]}) for _ in range(args.n)])
+    after_read = replica.snapshot()
+
+    def diff(a, b):
+        return {k: b[k] - a[k] for k in ("replica", "primary_lsn", "primary_lag", "primary_fallback")}
+
+    lat.sort()
+    print(f"write → read (쿠키 유지) {args.n}번: 자기 쓰기 안 보임 {missing}번, "
+          f"GET p50 {lat[len(lat) // 2] * 1000:.1f} ms, 라우팅 {diff(before, after_write)}")
+    print(f"쿠키 없는 GET {args.n}번: {dt / args.n * 1000:.1f} ms/req, 라우팅 {diff(after_write, after_read)}")
+    print(f"복제본 상태: lag {after_read['lag_sec']}s, replay_lsn {after_read['replay_lsn']}")
+
+    with kmw.get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("delete from memos where id = any(%s)", ([i for i in ids if i],))
+        conn.commit()
+
+
+BENCHES = {
+    "recurrence": (bench_recurrence, 1000),
+    "events-batch": (bench_events_batch, 200),
+    "rate-parse": (bench_rate_parse, 20),
+    "push-send": (bench_push_send, 300),
+    "push-fanout": (bench_push_fanout, 1000),
+    "export-import": (bench_export_import, 1_000_000),
+    "orm-vs-core": (bench_orm_vs_core, 20_000),
+    "suggest": (bench_suggest, 100_000),
+    "group-commit": (bench_group_commit, 5000),
+    "index-ttfb": (bench_index_ttfb, 500),
+    "faults": (bench_faults, 5),
+    "replica": (bench_replica, 200),
+}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("name", choices=sorted(BENCHES))
+    ap.add_argument("-n", type=int, default=None)
+    ap.add_argument("--html", nargs="*", help="rate-parse: 저장한 시티은행 페이지 HTML 파일")
+    ap.add_argument("--yes-truncate", action="store_true", help="export-import: 테스트 DB 테이블 비우기 허용")
+    ap.add_argument("--latency-ms", type=float, default=20.0, help="push-fanout: 가짜 push 서비스 응답 지연")
+    ap.add_argument("--error-rate", type=float, default=0.01, help="push-fanout: 429/500 비율")
+    ap.add_argument("--gone-rate", type=float, default=0.05, help="push-fanout: 410 Gone(만료 구독) 비율")
+    ap.add_argument("--seed-db", action="store_true", help="push-fanout: 가짜 구독을 push_subscriptions에 넣고 실행")
+    ap.add_argument("--window-ms", type=float, default=5.0, help="group-commit: 모으는 시간")
+    ap.add_argument("--fsync-ms", type=float, default=2.0, help="group-commit: DB 없을 때 커밋 1번 비용")
+    ap.add_argument("--rate-ms", type=float, default=1500.0, help="index-ttfb: 환율 스크래핑 지연")
+    ap.add_argument("--db-ms", type=float, default=30.0, help="index-ttfb: DB 없을 때 메모 조회 지연")
+    ap.add_argument("--rounds", type=int, default=3, help="index-ttfb: 반복 횟수 (중앙값)")
+    ap.add_argument("--deadline", type=float, default=3.0, help="faults: REQUEST_DEADLINE_SEC (on)")
+    ap.add_argument("--push-subs", type=int, default=20, help="faults: 가짜 구독 수")
+    ap.add_argument("--push-timeout", type=float, default=1.0, help="faults: PUSH_TIMEOUT")
+    ap.add_argument("--db-url", help="orm-vs-core: SQLAlchemy URL (기본: 메모리 sqlite, ⚠️ 세 테이블을 비움)")
+    args = ap.parse_args()
+    fn, default_n = BENCHES[args.name]
+    if args.n is None:
+        args.n = default_n
+    fn(args)
+
+
+if __name__ == "__main__":
+    main()
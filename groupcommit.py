@@ -0,0 +1,80 @@
+# groupcommit.py
+# ✅ 그룹 커밋: 동시에 들어온 쓰기를 짧은 시간(window) 모아 한 트랜잭션으로 처리
+#    - submit(item)은 자기 결과가 나올 때까지 대기 후 반환 (실패하면 같은 예외)
+#    - 묶음은 전용 스레드 하나가 순서대로 처리 → 제출 순서 = 처리 순서 (id 순서 보장)
+#    - flush(items) → 같은 길이의 결과 목록
+import threading
+import time
+
+
+class _Slot:
+    __slots__ = ("item", "result", "error", "done")
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class GroupCommitter:
+    def __init__(self, flush, window_sec=0.005, max_batch=256, name="group-commit"):
+        self._flush = flush
+        self.window_sec = window_sec
+        self.max_batch = max_batch
+        self._name = name
+        self._cond = threading.Condition()
+        self._pending = []
+        self._thread = None
+        self.stats = {"items": 0, "batches": 0, "max_batch": 0}
+
+    def submit(self, item, prepare=None):
+        """
+        prepare(item)가 있으면 대기열에 넣는 순간(락 안)에 호출
+        → 예: created_at을 여기서 찍으면 id 순서와 시간 순서가 일치
+        """
+        slot = _Slot(item)
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+            if prepare is not None:
+                prepare(item)
+            self._pending.append(slot)
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cond.notify()
+        slot.done.wait()
+        if slot.error is not None:
+            raise slot.error
+        return slot.result
+
+    def _take(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            # 첫 요청부터 window 동안(또는 max_batch가 찰 때까지) 더 모음
+            deadline = time.monotonic() + self.window_sec
+            while len(self._pending) < self.max_batch:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                self._cond.wait(left)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take()
+            try:
+                results = self._flush([s.item for s in batch])
+                for s, r in zip(batch, results):
+                    s.result = r
+            except BaseException as e:  # 묶음 전체 실패 → 모두에게 같은 예외
+                for s in batch:
+                    s.error = e
+            self.stats["items"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+            for s in batch:
+                s.done.set()
@@ -0,0 +1,325 @@
+# ics.py
+# ✅ iCalendar(RFC 5545) 최소 구현: calendar_events ↔ VEVENT
+#    - format_event(): 일정 1건 → VEVENT 문자열 (피드에서 일정별로 캐시)
+#    - parse(): ICS 텍스트 → VEVENT dict 목록 (가져오기용)
+#    - 시간대: 저장은 UTC(Z)로, 종일 일정은 VALUE=DATE
+from datetime import datetime, timedelta, timezone
+
+PRODID = "-//keyword-manager//calendar//KO"
+
+
+def escape_text(s):
+    return (
+        (s or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def unescape_text(s):
+    out = []
+    i = 0
+    while i < len(s):
+        c = s[i]
+        if c == "\\" and i + 1 < len(s):
+            n = s[i + 1]
+            out.append("\n" if n in "nN" else n)
+            i += 2
+            continue
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+def fold(line):
+    # 한 줄 최대 75 octet (UTF-8 글자 중간에서 자르지 않음)
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts = []
+    cur = ""
+    size = 0
+    limit = 75
+    for ch in line:
+        n = len(ch.encode("utf-8"))
+        if size + n > limit:
+            parts.append(cur)
+            cur = ""
+            size = 0
+            limit = 74  # 이어지는 줄은 앞에 공백 1칸
+        cur += ch
+        size += n
+    parts.append(cur)
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _utc(dt):
+    return dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _local(dt, tz):
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(tz) if tz else dt
+
+
+def calendar_header(name):
+    return "".join([
+        "BEGIN:VCALENDAR\r\n",
+        "VERSION:2.0\r\n",
+        fold(f"PRODID:{PRODID}"),
+        "CALSCALE:GREGORIAN\r\n",
+        "METHOD:PUBLISH\r\n",
+        fold(f"X-WR-CALNAME:{escape_text(name)}"),
+        "X-PUBLISHED-TTL:PT15M\r\n",
+        "REFRESH-INTERVAL;VALUE=DURATION:PT15M\r\n",
+    ])
+
+
+CALENDAR_FOOTER = "END:VCALENDAR\r\n"
+
+
+def format_event(uid, title, start, end, all_day, memo, rrule=None, exdates=None, stamp=None, tz=None):
+    """
+    - start/end: timestamptz(aware datetime). 종일 일정은 tz 기준 날짜로 변환
+    - exdates: "YYYY-MM-DD,..." (recurrence.parse_exdates 형식)
+    """
+    if start is None:
+        return ""
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{_utc(stamp or start)}",
+    ]
+    if all_day:
+        sd = _local(start, tz).date()
+        ed = _local(end, tz).date() if end else sd + timedelta(days=1)
+        if ed <= sd:
+            ed = sd + timedelta(days=1)
+        lines.append(f"DTSTART;VALUE=DATE:{sd:%Y%m%d}")
+        lines.append(f"DTEND;VALUE=DATE:{ed:%Y%m%d}")
+    else:
+        lines.append(f"DTSTART:{_utc(start)}")
+        if end and end > start:
+            lines.append(f"DTEND:{_utc(end)}")
+    lines.append(f"SUMMARY:{escape_text(title)}")
+    if memo:
+        lines.append(f"DESCRIPTION:{escape_text(memo)}")
+    if rrule:
+        lines.append(f"RRULE:{rrule}")
+        days = sorted(d for d in (exdates or "").split(",") if len(d.strip()) >= 10)
+        if days:
+            if all_day:
+                lines.append("EXDATE;VALUE=DATE:" + ",".join(d.strip()[:10].replace("-", "") for d in days))
+            else:
+                # 발생 시각 = 해당 날짜 + 시작 시각(현지) → UTC
+                local_start = _local(start, tz)
+                vals = []
+                for d in days:
+                    try:
+                        day = datetime.strptime(d.strip()[:10], "%Y-%m-%d")
+                    except ValueError:
+                        continue
+                    occ = local_start.replace(year=day.year, month=day.month, day=day.day)
+                    if tz is not None and hasattr(tz, "normalize"):
+                        occ = tz.normalize(occ)
+                    vals.append(_utc(occ))
+                if vals:
+                    lines.append("EXDATE:" + ",".join(vals))
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
+
+
+# ===============================
+# ✅ 가져오기
+# ===============================
+def _unfold(text):
+    out = []
+    for raw in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        if raw[:1] in (" ", "\t") and out:
+            out[-1] += raw[1:]
+        elif raw:
+            out.append(raw)
+    return out
+
+
+def _split_prop(line):
+    # "DTSTART;TZID=Asia/Seoul:20250101T090000" → ("DTSTART", {"TZID": "Asia/Seoul"}, "20250101T090000")
+    head, sep, value = line.partition(":")
+    if not sep:
+        return None, {}, ""
+    name, *params = head.split(";")
+    p = {}
+    for item in params:
+        k, _, v = item.partition("=")
+        p[k.strip().upper()] = v.strip().strip('"')
+    return name.strip().upper(), p, value
+
+
+def _localize(dt, tz):
+    if tz is None:
+        return dt
+    if hasattr(tz, "localize"):
+        return tz.localize(dt)
+    return dt.replace(tzinfo=tz)
+
+
+def parse_datetime(value, params, tz=None, tz_lookup=None):
+    """
+    → (datetime, is_date). 실패하면 (None, False)
+    - VALUE=DATE / 8자리: 날짜 (tz 기준 0시)
+    - ...Z: UTC
+    - TZID=...: tz_lookup(TZID)로 변환, 모르면 tz
+    - 그 외(floating): tz
+    """
+    value = (value or "").strip()
+    try:
+        if params.get("VALUE") == "DATE" or len(value) == 8:
+            d = datetime.strptime(value[:8], "%Y%m%d")
+            return _localize(d, tz), True
+        if value.endswith("Z"):
+            return datetime.strptime(value[:-1], "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc), False
+        dt = datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+    except ValueError:
+        return None, False
+    zone = None
+    if params.get("TZID") and tz_lookup:
+        zone = tz_lookup(params["TZID"])
+    return _localize(dt, zone or tz), False
+
+
+def parse(text, tz=None, tz_lookup=None):
+    """
+    ICS 텍스트 → [{"uid", "title", "start", "end", "all_day", "memo", "rrule", "exdates"}]
+    exdates는 "YYYY-MM-DD,..." (tz 기준 날짜)
+    RECURRENCE-ID가 있는 VEVENT(반복 일정 중 1회만 바꾼 것)는 마스터와 UID가 같으므로
+    → 마스터에 그 날짜를 EXDATE로 넣고, 바뀐 1회는 "UID#발생시각" 별도 일정으로 (취소된 회차는 EXDATE만)
+    """
+    events = []
+    cur = None
+    depth = 0  # VEVENT 안의 VALARM 등은 건너뜀
+    for line in _unfold(text or ""):
+        name, params, value = _split_prop(line)
+        if name is None:
+            continue
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and cur is None:
+                cur = {"uid": None, "title": "", "start": None, "end": None, "all_day": 0,
+                       "memo": "", "rrule": None, "exdates": [], "duration": None,
+                       "recurrence_id": None, "cancelled": False}
+            elif cur is not None:
+                depth += 1
+            continue
+        if name == "END":
+            if cur is not None and depth:
+                depth -= 1
+            elif cur is not None and value.upper() == "VEVENT":
+                if cur["start"] is not None:
+                    events.append(_finish(cur, tz))
+                cur = None
+            continue
+        if cur is None or depth:
+            continue
+
+        if name == "UID":
+            cur["uid"] = value.strip()[:255] or None
+        elif name == "SUMMARY":
+            cur["title"] = unescape_text(value)
+        elif name == "DESCRIPTION":
+            cur["memo"] = unescape_text(value)
+        elif name == "DTSTART":
+            cur["start"], is_date = parse_datetime(value, params, tz, tz_lookup)
+            cur["all_day"] = 1 if is_date else 0
+        elif name == "DTEND":
+            cur["end"], _ = parse_datetime(value, params, tz, tz_lookup)
+        elif name == "DURATION":
+            cur["duration"] = parse_duration(value)
+        elif name == "RRULE":
+            cur["rrule"] = value.strip()
+        elif name == "RECURRENCE-ID":
+            cur["recurrence_id"], _ = parse_datetime(value, params, tz, tz_lookup)
+        elif name == "STATUS":
+            cur["cancelled"] = value.strip().upper() == "CANCELLED"
+        elif name == "EXDATE":
+            for v in value.split(","):
+                dt, _ = parse_datetime(v, params, tz, tz_lookup)
+                if dt is not None:
+                    cur["exdates"].append(dt)
+    return _apply_overrides(events, tz)
+
+
+def _recurrence_key(dt):
+    if isinstance(dt, datetime) and dt.tzinfo is not None:
+        return _utc(dt)
+    return f"{dt:%Y%m%d}" if not isinstance(dt, datetime) else f"{dt:%Y%m%dT%H%M%S}"
+
+
+def _apply_overrides(events, tz):
+    masters = {ev["uid"]: ev for ev in events if ev["uid"] and ev["recurrence_id"] is None and ev["rrule"]}
+    out = []
+    for ev in events:
+        rid = ev.pop("recurrence_id")
+        cancelled = ev.pop("cancelled")
+        if rid is None:
+            out.append(ev)
+            continue
+        master = masters.get(ev["uid"])
+        if master is not None:
+            day = _local_day(rid, tz)
+            days = set(filter(None, (master["exdates"] or "").split(",")))
+            days.add(day)
+            master["exdates"] = ",".join(sorted(days))
+        if cancelled:
+            continue
+        if ev["uid"]:
+            ev["uid"] = f"{ev['uid'][:230]}#{_recurrence_key(rid)}"
+        ev["rrule"] = None
+        ev["exdates"] = None
+        out.append(ev)
+    return out
+
+
+def _local_day(dt, tz):
+    if isinstance(dt, datetime) and dt.tzinfo is not None and tz is not None:
+        dt = dt.astimezone(tz)
+    return (dt.date() if isinstance(dt, datetime) else dt).strftime("%Y-%m-%d")
+
+
+def parse_duration(value):
+    # "PT1H30M", "P1D", "P2W" 정도만
+    value = (value or "").strip().upper()
+    neg = value.startswith("-")
+    value = value.lstrip("+-")
+    if not value.startswith("P"):
+        return None
+    total = timedelta(0)
+    num = ""
+    in_time = False
+    units = {"W": timedelta(weeks=1), "D": timedelta(days=1)}
+    time_units = {"H": timedelta(hours=1), "M": timedelta(minutes=1), "S": timedelta(seconds=1)}
+    for ch in value[1:]:
+        if ch == "T":
+            in_time = True
+        elif ch.isdigit():
+            num += ch
+        elif num:
+            unit = (time_units if in_time else units).get(ch)
+            if unit is None:
+                return None
+            total += int(num) * unit
+            num = ""
+    return -total if neg else total
+
+
+def _finish(ev, tz):
+    start = ev["start"]
+    if ev["end"] is None and ev["duration"]:
+        ev["end"] = start + ev["duration"]
+    days = [_local_day(dt, tz) for dt in ev["exdates"]]
+    ev["exdates"] = ",".join(sorted(set(days))) or None
+    ev.pop("duration", None)
+    return ev
+
@@ -1,25 +1,49 @@
+import gzip
+import hashlib
+import hmac
+import json
 import os
 import re
 import threading
-from datetime import datetime
+import time
+import zlib
+from collections import OrderedDict, deque
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from functools import wraps
+from urllib.parse import quote, unquote
 
 import requests
-from bs4 import BeautifulSoup
-from flask import Flask, request, jsonify, render_template
+from bs4 import BeautifulSoup, SoupStrainer
+from flask import Flask, Response, request, jsonify, send_file, stream_template, stream_with_context
 
 # ✅ psycopg (v3) 사용: Python 3.13에서 psycopg2 바이너리 호환 이슈 회피
 import psycopg
 
+import attachments
+import groupcommit
+import ics
+import querytrace
+import recurrence
+import reminders
+import replica
+import resilience
+import suggest
+
 app = Flask(__name__)
+querytrace.init_app(app)
+resilience.init_app(app)
+replica.init_app(app)
 
 # ===============================
 # ✅ PWA Push (Web Push)
 # ===============================
 try:
-    from push_routes import push_bp, notify_all
+    from push_routes import push_bp, notify_all, notify_chat
 except ImportError:
     from push_routes import push_bp
     notify_all = None
+    notify_chat = None
 app.register_blueprint(push_bp)
 
 
@@ -32,6 +56,13 @@ try:
 except Exception:
     TZ = None
 
+# ✅ lxml이 설치돼 있으면 더 빠른 파서 사용 (없으면 html.parser)
+try:
+    import lxml  # noqa: F401
+    BS_PARSER = "lxml"
+except Exception:
+    BS_PARSER = "html.parser"
+
 # ===============================
 # ✅ DB
 # ===============================
@@ -47,8 +78,16 @@ def get_conn():
     db_url = (os.environ.get("DATABASE_URL") or "").strip()
     if not db_url:
         raise RuntimeError("DATABASE_URL not set")
-    # psycopg v3
-    return psycopg.connect(db_url, connect_timeout=10)
+    # psycopg v3 (QUERY_TRACE=1이면 느린 쿼리 기록용 커서 사용)
+    # 브레이커가 열려 있으면 바로 resilience.Unavailable, connect_timeout은 요청 남은 시간만큼
+    # TrackingConnection: 쓰기 요청이 커밋하면 LSN 기억 → 복제본 read-your-writes (replica.py)
+    return resilience.pg_connect(
+        db_url, connect_timeout=10, connection_class=replica.TrackingConnection, **querytrace.connect_kwargs()
+    )
+
+def get_read_conn():
+    # GET 조회용: DATABASE_READ_URL이 있으면 복제본 (지연/LSN 확인 후, 안 되면 primary)
+    return replica.connect_read(get_conn)
 
 def ensure_db():
     global _DB_READY
@@ -104,6 +143,46 @@ def ensure_db():
                 if cur.fetchone() is None:
                     cur.execute("alter table chat_messages add column client_id text")
 
+                # ✅ 첨부파일 (내용 해시로 저장, 메시지는 해시만 참조)
+                cur.execute(
+                    """
+                    create table if not exists chat_attachments(
+                        sha256 text primary key,
+                        size bigint not null,
+                        mime text not null,
+                        filename text,
+                        created_at timestamptz not null default now()
+                    )
+                    """
+                )
+                cur.execute("alter table chat_messages add column if not exists attachment text")
+
+                # ✅ room별 id 범위 조회(폴링/안읽음 수)용 인덱스
+                cur.execute("create index if not exists chat_messages_room_id_idx on chat_messages(room, id)")
+
+                # ✅ 읽음 위치 (client_id + room → 마지막으로 읽은 메시지 id)
+                cur.execute(
+                    """
+                    create table if not exists chat_read_cursors(
+                        client_id text not null,
+                        room text not null,
+                        last_read_id bigint not null default 0,
+                        updated_at timestamptz not null default now(),
+                        primary key (client_id, room)
+                    )
+                    """
+                )
+                # 푸시 보낼 때 "이 방에서 msg_id까지 읽은 client" 조회용 (PK는 client_id가 앞이라 못 씀)
+                cur.execute(
+                    "create index if not exists chat_read_cursors_room_read_idx"
+                    " on chat_read_cursors(room, last_read_id) include (client_id)"
+                )
+                # 구독 ↔ client_id 연결 (이미 읽은 사람에게는 푸시 생략)
+                cur.execute("alter table push_subscriptions add column if not exists client_id text")
+
+                # ✅ 방 목록용 요약 (트리거가 insert/delete 때 갱신 → 목록은 방 개수만큼만 읽음)
+                _ensure_chat_room_summary(cur)
+
                 # calendar_events
                 cur.execute(
                     """
@@ -114,10 +193,34 @@ def ensure_db():
                         end_time timestamptz,
                         all_day int4 not null default 0,
                         memo text,
+                        rrule text,
+                        exdates text,
+                        version int4 not null default 1,
                         created_at timestamptz not null default now()
                     )
                     """
                 )
+                # ✅ 반복 일정(RRULE) 컬럼
+                cur.execute("alter table calendar_events add column if not exists rrule text")
+                cur.execute("alter table calendar_events add column if not exists exdates text")
+                # ✅ 낙관적 잠금(optimistic lock)용 버전
+                cur.execute("alter table calendar_events add column if not exists version int4 not null default 1")
+                # ✅ ICS 가져오기: 원본 UID (다시 가져오면 새로 만들지 않고 갱신)
+                cur.execute("alter table calendar_events add column if not exists ics_uid text")
+                cur.execute(
+                    "create unique index if not exists calendar_events_ics_uid_idx "
+                    "on calendar_events(ics_uid) where ics_uid is not null"
+                )
+                # ✅ ICS 피드 캐시 무효화용 변경 카운터
+                _ensure_calendar_feed_state(cur)
+                # ✅ 일정 알림: 몇 분 전 (null = REMINDER_MINUTES 기본값, 음수 = 알림 없음)
+                cur.execute("alter table calendar_events add column if not exists remind_minutes int4")
+                cur.execute("create index if not exists calendar_events_start_time_idx on calendar_events(start_time)")
+                cur.execute(
+                    "create index if not exists calendar_events_recurring_idx "
+                    "on calendar_events(id) where coalesce(rrule, '') <> ''"
+                )
+                _ensure_reminder_tables(cur)
 
                 # ✅ presence (최근 접속자)
                 cur.execute(
@@ -136,10 +239,223 @@ def ensure_db():
                 cur.execute("alter table presence add column if not exists animal text")
                 cur.execute("alter table presence add column if not exists last_seen timestamptz not null default now()")
                 cur.execute("alter table presence add column if not exists user_agent text")
+                # ✅ 최근 접속자 목록(last_seen 범위 + 정렬)용 인덱스
+                cur.execute("create index if not exists presence_last_seen_idx on presence(last_seen desc)")
+
+                # ✅ 환율 기록 (스크랩할 때마다 1행)
+                cur.execute(
+                    """
+                    create table if not exists exchange_rates(
+                        id bigserial primary key,
+                        currency text not null default 'CNY',
+                        base_rate numeric(12, 2) not null,
+                        adjusted_rate numeric(12, 2) not null,
+                        fetched_at timestamptz not null default now()
+                    )
+                    """
+                )
+                cur.execute("create index if not exists exchange_rates_currency_fetched_idx on exchange_rates(currency, fetched_at)")
+
+                # ✅ Idempotency-Key (재전송된 쓰기 요청 → 처음 응답 그대로)
+                #    response_body가 null이면 아직 처리 중
+                cur.execute(
+                    """
+                    create table if not exists idempotency_keys(
+                        scope text not null,
+                        key text not null,
+                        fingerprint text not null,
+                        status int4,
+                        response_body text,
+                        mimetype text,
+                        created_at timestamptz not null default now(),
+                        primary key (scope, key)
+                    )
+                    """
+                )
+                cur.execute("create index if not exists idempotency_keys_created_idx on idempotency_keys(created_at)")
+
+                # ✅ 시간대별 접속 통계 (원본 presence 행은 보관기간 지나면 삭제)
+                cur.execute(
+                    """
+                    create table if not exists presence_hourly(
+                        hour timestamptz primary key,
+                        max_online int4 not null default 0,
+                        distinct_clients int4 not null default 0,
+                        online_sum int8 not null default 0,
+                        samples int4 not null default 0
+                    )
+                    """
+                )
 
             conn.commit()
         _DB_READY = True
+    _start_presence_sweeper()
+    _start_idempotency_purger()
+    _start_reminder_scheduler()
+
+def _ensure_chat_room_summary(cur):
+    cur.execute(
+        """
+        create table if not exists chat_room_summary(
+            room text primary key,
+            last_id bigint not null default 0,
+            last_sender text,
+            last_message text,
+            last_at timestamptz,
+            message_count bigint not null default 0
+        )
+        """
+    )
+    cur.execute(
+        """
+        create or replace function chat_room_summary_sync() returns trigger as $$
+        begin
+            -- TRUNCATE(문장 단위, 행 트리거가 안 돎): 요약도 비움 → 이후 insert/COPY가 다시 셈
+            if tg_op = 'TRUNCATE' then
+                delete from chat_room_summary;
+                return null;
+            end if;
+
+            if tg_op = 'INSERT' then
+                insert into chat_room_summary (room, last_id, last_sender, last_message, last_at, message_count)
+                values (new.room, new.id, new.sender, new.message, new.created_at, 1)
+                on conflict (room) do update
+                set message_count = chat_room_summary.message_count + 1,
+                    last_id      = greatest(chat_room_summary.last_id, excluded.last_id),
+                    last_sender  = case when excluded.last_id >= chat_room_summary.last_id
+                                        then excluded.last_sender else chat_room_summary.last_sender end,
+                    last_message = case when excluded.last_id >= chat_room_summary.last_id
+                                        then excluded.last_message else chat_room_summary.last_message end,
+                    last_at      = case when excluded.last_id >= chat_room_summary.last_id
+                                        then excluded.last_at else chat_room_summary.last_at end;
+                return new;
+            end if;
+
+            -- DELETE: 개수 감소 + 마지막 메시지가 지워졌으면 (room, id) 인덱스로 직전 메시지 1건 조회
+            update chat_room_summary s
+            set message_count = greatest(s.message_count - 1, 0),
+                last_id      = case when s.last_id = old.id then coalesce(m.id, 0) else s.last_id end,
+                last_sender  = case when s.last_id = old.id then m.sender else s.last_sender end,
+                last_message = case when s.last_id = old.id then m.message else s.last_message end,
+                last_at      = case when s.last_id = old.id then m.created_at else s.last_at end
+            from (select 1) one
+            left join lateral (
+                select id, sender, message, created_at from chat_messages
+                where room = old.room and id < old.id
+                order by id desc limit 1
+            ) m on true
+            where s.room = old.room;
+            return old;
+        end;
+        $$ language plpgsql
+        """
+    )
+    cur.execute("select 1 from pg_trigger where tgname = 'chat_room_summary_trg' and not tgisinternal")
+    if cur.fetchone() is None:
+        cur.execute(
+            """
+            create trigger chat_room_summary_trg
+            after insert or delete on chat_messages
+            for each row execute function chat_room_summary_sync()
+            """
+        )
+    # /admin/import?truncate=1 등: truncate는 행 트리거를 부르지 않으므로 따로 (안 하면 message_count가 두 배)
+    cur.execute("select 1 from pg_trigger where tgname = 'chat_room_summary_truncate_trg' and not tgisinternal")
+    if cur.fetchone() is None:
+        cur.execute(
+            """
+            create trigger chat_room_summary_truncate_trg
+            after truncate on chat_messages
+            for each statement execute function chat_room_summary_sync()
+            """
+        )
+    # 처음 만들었을 때만 기존 메시지로 채움 (1회성 집계)
+    cur.execute("select exists(select 1 from chat_room_summary)")
+    if not cur.fetchone()[0]:
+        cur.execute(
+            """
+            insert into chat_room_summary (room, last_id, last_sender, last_message, last_at, message_count)
+            select distinct on (room) room, id, sender, message, created_at,
+                   count(*) over (partition by room)
+            from chat_messages
+            order by room, id desc
+            on conflict (room) do nothing
+            """
+        )
+
+def _ensure_calendar_feed_state(cur):
+    # calendar_events가 바뀌면(어느 경로든, 문장 단위) generation + 1
+    # → 피드는 이 1행만 보고 캐시가 유효한지 판단
+    cur.execute(
+        """
+        create table if not exists calendar_feed_state(
+            id int4 primary key default 1 check (id = 1),
+            generation bigint not null default 0,
+            changed_at timestamptz not null default now()
+        )
+        """
+    )
+    cur.execute("insert into calendar_feed_state (id) values (1) on conflict (id) do nothing")
+    cur.execute(
+        """
+        create or replace function calendar_feed_bump() returns trigger as $$
+        begin
+            update calendar_feed_state set generation = generation + 1, changed_at = now() where id = 1;
+            return null;
+        end;
+        $$ language plpgsql
+        """
+    )
+    cur.execute("select 1 from pg_trigger where tgname = 'calendar_feed_bump_trg' and not tgisinternal")
+    if cur.fetchone() is None:
+        cur.execute(
+            """
+            create trigger calendar_feed_bump_trg
+            after insert or update or delete or truncate on calendar_events
+            for each statement execute function calendar_feed_bump()
+            """
+        )
+
+def _ensure_reminder_tables(cur):
+    # 보낸 알림 기록 (스케줄러 담당 워커가 바뀌어도 같은 발생분을 두 번 보내지 않음)
+    cur.execute(
+        """
+        create table if not exists calendar_reminders_sent(
+            event_id bigint not null,
+            occurrence timestamptz not null,
+            sent_at timestamptz not null default now(),
+            primary key (event_id, occurrence)
+        )
+        """
+    )
+    # 일정이 바뀌면 id를 NOTIFY → 스케줄러가 그 일정만 다시 읽음 (커밋될 때 전달)
+    cur.execute(
+        """
+        create or replace function calendar_reminder_notify() returns trigger as $$
+        begin
+            perform pg_notify('calendar_reminders', coalesce(new.id, old.id)::text);
+            return null;
+        end;
+        $$ language plpgsql
+        """
+    )
+    cur.execute("select 1 from pg_trigger where tgname = 'calendar_reminder_notify_trg' and not tgisinternal")
+    if cur.fetchone() is None:
+        cur.execute(
+            """
+            create trigger calendar_reminder_notify_trg
+            after insert or update or delete on calendar_events
+            for each row execute function calendar_reminder_notify()
+            """
+        )
+
+_CAL_COLS_READY = False
+
 def _ensure_calendar_events_columns(cur):
+    # ✅ 프로세스당 1번만 information_schema 조회 (매 요청마다 하지 않음)
+    global _CAL_COLS_READY
+    if _CAL_COLS_READY:
+        return
     cur.execute("select column_name from information_schema.columns where table_schema='public' and table_name='calendar_events'")
     cols = {r[0] for r in cur.fetchall()}
     if "memo" not in cols:
@@ -148,6 +464,15 @@ def _ensure_calendar_events_columns(cur):
         cur.execute("alter table calendar_events add column created_at timestamptz not null default now()")
     if "all_day" not in cols:
         cur.execute("alter table calendar_events add column all_day int4 not null default 0")
+    if "rrule" not in cols:
+        cur.execute("alter table calendar_events add column rrule text")
+    if "exdates" not in cols:
+        cur.execute("alter table calendar_events add column exdates text")
+    if "version" not in cols:
+        cur.execute("alter table calendar_events add column version int4 not null default 1")
+    if "remind_minutes" not in cols:
+        cur.execute("alter table calendar_events add column remind_minutes int4")
+    _CAL_COLS_READY = True
 
 def _parse_dt(s):
     if not s:
@@ -171,32 +496,211 @@ def _dt_to_fullcalendar(dt, is_all_day):
 # ✅ 환율 (시티은행)
 # ===============================
 _cached_rate = {"value": None, "date": None}
+_RATE_URL = "https://www.citibank.co.kr/FxdExrt0100.act"
+_RATE_TIMEOUT = 6
+
+# 페이지 전체가 아니라 <ul class="exchangeList"> 조각만 파싱
+_EXCHANGE_LIST_RE = re.compile(r'<ul[^>]*class="[^"]*\bexchangeList\b[^"]*"[^>]*>.*?</ul>', re.S | re.I)
+
+def _is_exchange_list_class(value):
+    # bs4 버전에 따라 class가 "a b" 문자열 또는 개별 값으로 들어옴
+    if not value:
+        return False
+    return "exchangeList" in (value.split() if isinstance(value, str) else value)
+
+_EXCHANGE_LIST_STRAINER = SoupStrainer("ul", attrs={"class": _is_exchange_list_class})
+
+def _find_cny_rate(soup):
+    for li in soup.select("ul.exchangeList > li"):
+        label = li.select_one("span.flagCn")
+        value = li.select_one("span.green")
+        if label and value and "중국" in label.get_text(strip=True):
+            return float(value.get_text(strip=True).replace(",", ""))
+    return None
+
+def parse_cny_base_rate(html: str):
+    """
+    시티은행 환율 페이지 HTML → 중국(CNY) 기준 환율(float) / 없으면 None
+    1) 정규식으로 ul.exchangeList 조각만 잘라서 파싱 (빠름)
+    2) 실패 시 SoupStrainer로 ul.exchangeList만 트리에 올려서 파싱
+    """
+    m = _EXCHANGE_LIST_RE.search(html or "")
+    if m:
+        base = _find_cny_rate(BeautifulSoup(m.group(0), BS_PARSER))
+        if base is not None:
+            return base
+    return _find_cny_rate(BeautifulSoup(html or "", BS_PARSER, parse_only=_EXCHANGE_LIST_STRAINER))
+
+def _save_rate_point(base, adjusted, currency="CNY"):
+    # 기록 실패해도 환율 표시는 계속
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "insert into exchange_rates (currency, base_rate, adjusted_rate) values (%s, %s, %s)",
+                    (currency, base, adjusted),
+                )
+            conn.commit()
+    except Exception as e:
+        print("환율 기록 오류:", e)
+
+def cached_exchange_rate():
+    """ 오늘 받아 둔 환율만 (없으면 None, 외부 요청 안 함) """
+    if _cached_rate["value"] is not None and _cached_rate["date"] == datetime.now().strftime("%Y-%m-%d"):
+        return _cached_rate["value"]
+    return None
 
 def get_adjusted_exchange_rate():
+    cached = cached_exchange_rate()
+    if cached is not None:
+        return cached
     today = datetime.now().strftime("%Y-%m-%d")
-    if _cached_rate["value"] is not None and _cached_rate["date"] == today:
-        return _cached_rate["value"]
 
+    # 실패/브레이커 open/deadline 초과 → 마지막으로 받은 값(어제 것이라도)
     try:
-        url = "https://www.citibank.co.kr/FxdExrt0100.act"
         headers = {"User-Agent": "Mozilla/5.0"}
-        res = requests.get(url, headers=headers, timeout=6)
-        soup = BeautifulSoup(res.text, "html.parser")
-
-        for li in soup.select("ul.exchangeList > li"):
-            label = li.select_one("span.flagCn")
-            value = li.select_one("span.green")
-            if label and value and "중국" in label.get_text(strip=True):
-                base = float(value.get_text(strip=True).replace(",", ""))
-                adjusted = round((base + 2) * 1.1, 2)
-                _cached_rate["value"] = adjusted
-                _cached_rate["date"] = today
-                return adjusted
+        timeout = resilience.timeout(_RATE_TIMEOUT, "citibank")
+        with resilience.guard("citibank"):
+            res = requests.get(_RATE_URL, headers=headers, timeout=timeout)
+            res.raise_for_status()
+        base = parse_cny_base_rate(res.text)
+        if base is not None:
+            adjusted = round((base + 2) * 1.1, 2)
+            _cached_rate["value"] = adjusted
+            _cached_rate["date"] = today
+            _save_rate_point(base, adjusted)
+            return adjusted
+    except resilience.Unavailable:
+        pass
     except Exception as e:
         print("환율 오류:", e)
 
     return _cached_rate["value"]
 
+# ===============================
+# ✅ Idempotency-Key (모바일 재전송 대비)
+#   - 쓰기 API에 Idempotency-Key 헤더가 오면 (scope, key)당 한 번만 실제 처리
+#   - 같은 키로 다시 오면 저장해 둔 처음 응답을 그대로 돌려줌 (DB 쓰기/푸시 없음)
+#     + 응답 헤더 Idempotent-Replayed: true
+#   - 워커 메모리 LRU → 없으면 idempotency_keys 테이블 (다른 워커가 처리한 것도 보임)
+#   - 처리 중이면 409 + Retry-After, 같은 키에 다른 본문이면 422
+#   - 5xx/예외는 저장 안 함 (키를 풀어서 재시도 가능)
+#   - 보관: IDEMPOTENCY_TTL_HOURS(기본 24시간), 정리는 IDEMPOTENCY_PURGE_SEC마다 (idempotency_purge_once)
+# ===============================
+_IDEM_LRU_MAX = 2048
+
+def _idempotency_ttl_hours():
+    try:
+        return max(1, int(os.environ.get("IDEMPOTENCY_TTL_HOURS", "24")))
+    except Exception:
+        return 24
+_IDEM_STALE_SEC = 60  # 처리 중 표시가 이보다 오래되면 중간에 죽은 것으로 보고 다시 처리
+_IDEM_LRU = OrderedDict()  # (scope, key) -> (저장 시각, (fingerprint, status, body, mimetype))
+_IDEM_LOCK = threading.Lock()
+
+def _idem_remember(ck, entry):
+    with _IDEM_LOCK:
+        _IDEM_LRU[ck] = (time.monotonic(), entry)
+        _IDEM_LRU.move_to_end(ck)
+        while len(_IDEM_LRU) > _IDEM_LRU_MAX:
+            _IDEM_LRU.popitem(last=False)
+
+def _idem_replay(entry, fingerprint):
+    fp, status, body, mimetype = entry
+    if fp != fingerprint:
+        return jsonify({"ok": False, "error": "idempotency_key_reused"}), 422
+    resp = Response(body, status=status, mimetype=mimetype or "application/json")
+    resp.headers["Idempotent-Replayed"] = "true"
+    return resp
+
+def _idem_claim(scope, key, fingerprint):
+    """ (True, None) = 이 요청이 처리, (False, entry|None) = 이미 처리됨/처리 중 """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                insert into idempotency_keys (scope, key, fingerprint) values (%s, %s, %s)
+                on conflict (scope, key) do update
+                set fingerprint = excluded.fingerprint, created_at = now()
+                where idempotency_keys.response_body is null
+                  and idempotency_keys.created_at < now() - make_interval(secs => %s)
+                returning 1
+                """,
+                (scope, key, fingerprint, _IDEM_STALE_SEC),
+            )
+            if cur.fetchone():
+                conn.commit()
+                return True, None
+            cur.execute(
+                "select fingerprint, status, response_body, mimetype from idempotency_keys where scope=%s and key=%s",
+                (scope, key),
+            )
+            row = cur.fetchone()
+    if row is None or row[2] is None:
+        return False, None
+    return False, tuple(row)
+
+def _idem_finish(scope, key, resp):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            if resp is None or resp.status_code >= 500:
+                cur.execute("delete from idempotency_keys where scope=%s and key=%s", (scope, key))
+            else:
+                cur.execute(
+                    "update idempotency_keys set status=%s, response_body=%s, mimetype=%s where scope=%s and key=%s",
+                    (resp.status_code, resp.get_data(as_text=True), resp.mimetype, scope, key),
+                )
+        conn.commit()
+
+def idempotent(scope):
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (request.headers.get("Idempotency-Key") or "").strip()
+            if not key:
+                return fn(*args, **kwargs)
+            if len(key) > 200:
+                return jsonify({"ok": False, "error": "invalid_idempotency_key"}), 400
+
+            ensure_db()
+            ck = (scope, key)
+            fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+            hit = None
+            with _IDEM_LOCK:
+                cached = _IDEM_LRU.get(ck)
+                if cached is not None:
+                    if time.monotonic() - cached[0] < _idempotency_ttl_hours() * 3600:
+                        _IDEM_LRU.move_to_end(ck)
+                        hit = cached[1]
+                    else:
+                        del _IDEM_LRU[ck]
+            if hit is not None:
+                return _idem_replay(hit, fingerprint)
+
+            claimed, entry = _idem_claim(scope, key, fingerprint)
+            if not claimed:
+                if entry is None:
+                    resp = jsonify({"ok": False, "error": "request_in_progress"})
+                    resp.status_code = 409
+                    resp.headers["Retry-After"] = "1"
+                    return resp
+                _idem_remember(ck, entry)
+                return _idem_replay(entry, fingerprint)
+
+            resp = None
+            try:
+                resp = app.make_response(fn(*args, **kwargs))
+                return resp
+            finally:
+                try:
+                    _idem_finish(scope, key, resp)
+                    if resp is not None and resp.status_code < 500:
+                        _idem_remember(ck, (fingerprint, resp.status_code, resp.get_data(), resp.mimetype))
+                except Exception as e:
+                    print("[idempotency] save failed:", e)
+        return wrapper
+    return deco
+
 # ===============================
 # ✅ Health (UptimeRobot)
 # ===============================
@@ -207,41 +711,147 @@ def health():
 # ===============================
 # ✅ 메인 페이지
 # ===============================
+# ✅ 스트리밍 렌더링: head/CSS/셸을 먼저 보내고, 메모 목록은 그 자리에 도달했을 때 조회
+#    - 환율: 오늘 값이 캐시에 있으면 바로 찍고, 없으면 "-" 후 브라우저가 /api/rate로 채움
+#      (시티은행 스크래핑 최대 6초를 첫 바이트 앞에 두지 않음)
+#    - Jinja 조각(수십 바이트)은 묶어서 보내고, {{ stream_flush }} 자리에서 바로 내보냄
+_STREAM_CHUNK = 16 * 1024
+
+def _coalesce_stream(pieces, size=_STREAM_CHUNK):
+    buf, n = [], 0
+    for piece in pieces:
+        if piece:
+            buf.append(piece)
+            n += len(piece)
+            if n < size:
+                continue
+        if buf:
+            yield "".join(buf)
+            buf, n = [], 0
+    if buf:
+        yield "".join(buf)
+
+def _iter_memo_list():
+    # 셸은 이미 전송됨 → 여기서 실패해도 페이지는 끝까지 내려보냄 (메모만 빈 목록)
+    try:
+        ensure_db()
+        with get_read_conn() as conn:
+            with conn.cursor() as cur:
+                # ✅ 최신 메모가 위로
+                cur.execute("select content from memos order by id desc")
+                rows = cur.fetchall()
+    except Exception as e:
+        print("메모 목록 오류:", e)
+        return
+    for r in rows:
+        yield r[0]
+
 @app.route("/", methods=["GET", "POST", "HEAD"])
 def index():
     if request.method == "HEAD":
         return ("", 200)
 
-    ensure_db()
-
     if request.method == "POST":
+        ensure_db()
         action = request.form.get("action")
         memo_keyword = (request.form.get("memo_keyword") or "").strip()
 
         if action == "add_memo" and memo_keyword:
             with get_conn() as conn:
                 with conn.cursor() as cur:
-                    cur.execute("insert into memos (content) values (%s) on conflict do nothing", (memo_keyword,))
+                    cur.execute("insert into memos (content) values (%s) on conflict do nothing returning id", (memo_keyword,))
+                    row = cur.fetchone()
                 conn.commit()
+            if row:
+                _memo_index_added(row[0], memo_keyword)
 
         if action == "delete_memo" and memo_keyword:
             with get_conn() as conn:
                 with conn.cursor() as cur:
-                    cur.execute("delete from memos where content=%s", (memo_keyword,))
+                    cur.execute("delete from memos where content=%s returning id", (memo_keyword,))
+                    row = cur.fetchone()
                 conn.commit()
+            if row:
+                _memo_index_removed(row[0])
 
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            # ✅ 최신 메모가 위로
-            cur.execute("select content from memos order by id desc")
-            memo_list = [r[0] for r in cur.fetchall()]
-
-    return render_template(
+    exchange_rate = cached_exchange_rate()
+    body = stream_template(
         "index.html",
-        memo_list=memo_list,
-        exchange_rate=get_adjusted_exchange_rate(),
+        memo_list=_iter_memo_list(),
+        exchange_rate=exchange_rate,
+        rate_pending=exchange_rate is None,
+        stream_flush="",
+    )
+    return Response(
+        _coalesce_stream(body),
+        mimetype="text/html",
+        headers={"X-Accel-Buffering": "no"},
     )
 
+@app.route("/api/rate", methods=["GET"])
+def api_rate():
+    ensure_db()
+    rate = get_adjusted_exchange_rate()
+    # stale: 오늘 값을 못 받아서 예전 값을 돌려준 경우
+    return jsonify({"ok": rate is not None, "rate": rate, "stale": rate is not None and cached_exchange_rate() is None})
+
+# ===============================
+# ✅ 환율 기록 API (차트용 다운샘플)
+# ===============================
+_RATE_BUCKETS = {"hour": "hour", "day": "day", "week": "week", "month": "month"}
+
+@app.route("/api/rate/history", methods=["GET"])
+def rate_history():
+    """
+    ?bucket=day|week|month|hour&days=90
+    구간별 min/max/last (+ 기준 환율 last)만 반환 → 원본 행은 내려보내지 않음
+    """
+    ensure_db()
+    bucket = _RATE_BUCKETS.get((request.args.get("bucket") or "day").strip().lower())
+    if not bucket:
+        return jsonify({"ok": False, "error": "invalid_bucket"}), 400
+    try:
+        days = int(request.args.get("days", "90"))
+    except Exception:
+        days = 90
+    days = max(1, min(days, 3650))
+    currency = (request.args.get("currency") or "CNY").strip().upper()
+
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                select date_trunc(%s, fetched_at at time zone 'Asia/Seoul') as b,
+                       min(adjusted_rate), max(adjusted_rate),
+                       (array_agg(adjusted_rate order by fetched_at desc))[1],
+                       (array_agg(base_rate order by fetched_at desc))[1],
+                       count(*)
+                from exchange_rates
+                where currency = %s and fetched_at >= now() - make_interval(days => %s)
+                group by b
+                order by b asc
+                """,
+                (bucket, currency, days),
+            )
+            rows = cur.fetchall()
+
+    return jsonify({
+        "ok": True,
+        "currency": currency,
+        "bucket": bucket,
+        "points": [
+            {
+                "t": r[0].strftime("%Y-%m-%d") if bucket != "hour" else r[0].strftime("%Y-%m-%dT%H:00"),
+                "min": float(r[1]),
+                "max": float(r[2]),
+                "last": float(r[3]),
+                "base_last": float(r[4]),
+                "n": r[5],
+            }
+            for r in rows
+        ],
+    })
+
 # ===============================
 # ✅ 메모 API
 # ===============================
@@ -250,7 +860,7 @@ def api_get_memos():
     ensure_db()
     after_id = request.args.get("after_id")
 
-    with get_conn() as conn:
+    with get_read_conn() as conn:
         with conn.cursor() as cur:
             if after_id and str(after_id).isdigit():
                 cur.execute(
@@ -265,6 +875,7 @@ def api_get_memos():
     return jsonify(out)
 
 @app.route("/api/memos", methods=["POST"])
+@idempotent("memos.create")
 def api_create_memo():
     ensure_db()
     data = request.get_json(silent=True) or {}
@@ -282,6 +893,8 @@ def api_create_memo():
             row = cur.fetchone()
         conn.commit()
 
+    if row:
+        _memo_index_added(row[0], content)
     return jsonify({"ok": True, "id": row[0] if row else None})
 
 @app.route("/api/memos/<int:memo_id>", methods=["DELETE"])
@@ -289,43 +902,201 @@ def api_delete_memo(memo_id):
     ensure_db()
     with get_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute("delete from memos where id=%s", (memo_id,))
+            cur.execute("delete from memos where id=%s returning id", (memo_id,))
+            row = cur.fetchone()
         conn.commit()
+    if row:
+        _memo_index_removed(row[0])
     return jsonify({"ok": True})
 
+# -------------------------------
+# ✅ 메모 자동완성
+#   GET /api/memos/suggest?q=한그&limit=10   → ["한글", ...]
+#   - 프로세스 메모리의 접두어 색인(suggest.PrefixIndex): 자모/초성 매칭
+#   - 이 워커에서의 추가/삭제는 1건씩 바로 반영
+#   - 다른 워커의 변경은 MEMO_SUGGEST_RESYNC_SEC(기본 60초)마다 (count, max id)로 확인
+#     → 새 id만 추가로 읽고, 그래도 개수가 안 맞으면(다른 곳에서 삭제) 아는 id 중 없어진 것만 빼고
+#       늦게 커밋된 작은 id만 더 읽음 (전체 재구성은 처음/가져오기 뒤에만)
+# -------------------------------
+_MEMO_INDEX = suggest.PrefixIndex()
+_MEMO_IDS = {}  # memos.id → 내용 (이 워커 색인에 들어간 것)
+_MEMO_SYNC = {"loaded": False, "max_id": 0, "checked": 0.0}
+_MEMO_SYNC_LOCK = threading.Lock()
+
+def _memo_index_added(memo_id, content):
+    with _MEMO_SYNC_LOCK:
+        if memo_id in _MEMO_IDS:
+            return
+        _MEMO_IDS[memo_id] = content
+        _MEMO_SYNC["max_id"] = max(_MEMO_SYNC["max_id"], memo_id)
+        _MEMO_INDEX.add(content)
+
+def _memo_index_removed(memo_id):
+    with _MEMO_SYNC_LOCK:
+        content = _MEMO_IDS.pop(memo_id, None)
+        if content is not None:
+            _MEMO_INDEX.remove(content)
+
+def _memo_index_invalidate():
+    with _MEMO_SYNC_LOCK:
+        _MEMO_SYNC["loaded"] = False
+
+def _memo_index_sync():
+    try:
+        interval = float(os.environ.get("MEMO_SUGGEST_RESYNC_SEC", "60"))
+    except Exception:
+        interval = 60.0
+    now = time.monotonic()
+    with _MEMO_SYNC_LOCK:
+        if _MEMO_SYNC["loaded"] and now - _MEMO_SYNC["checked"] < interval:
+            return
+        _MEMO_SYNC["checked"] = now
+        loaded = _MEMO_SYNC["loaded"]
+        max_id = _MEMO_SYNC["max_id"]
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            if loaded:
+                cur.execute("select count(*), coalesce(max(id), 0) from memos")
+                db_count, db_max = cur.fetchone()
+                if db_max > max_id:
+                    cur.execute("select id, content from memos where id > %s", (max_id,))
+                    for memo_id, content in cur.fetchall():
+                        _memo_index_added(memo_id, content)
+                with _MEMO_SYNC_LOCK:
+                    if len(_MEMO_IDS) == db_count:
+                        return
+                    known = list(_MEMO_IDS)
+                    max_id = _MEMO_SYNC["max_id"]
+                # 다른 곳에서 삭제: 아는 id 중 아직 있는 것만 돌려받아 차이를 뺌 (내용은 안 읽음)
+                cur.execute("select id from memos where id = any(%s)", (known,))
+                alive = {r[0] for r in cur.fetchall()}
+                for memo_id in known:
+                    if memo_id not in alive:
+                        _memo_index_removed(memo_id)
+                # max id보다 늦게 커밋된 작은 id
+                cur.execute("select id, content from memos where id <= %s and id <> all(%s)", (max_id, known))
+                for memo_id, content in cur.fetchall():
+                    _memo_index_added(memo_id, content)
+                return
+            cur.execute("select id, content from memos")
+            rows = cur.fetchall()
+
+    with _MEMO_SYNC_LOCK:
+        _MEMO_INDEX.rebuild(r[1] for r in rows)
+        _MEMO_IDS.clear()
+        _MEMO_IDS.update((r[0], r[1]) for r in rows)
+        _MEMO_SYNC.update({"loaded": True, "max_id": max(_MEMO_IDS, default=0)})
+
+@app.route("/api/memos/suggest", methods=["GET"])
+def api_suggest_memos():
+    q = (request.args.get("q") or "").strip()
+    try:
+        limit = max(1, min(int(request.args.get("limit", "10")), 50))
+    except Exception:
+        limit = 10
+    if not q:
+        return jsonify({"ok": True, "q": q, "items": []})
+    ensure_db()
+    _memo_index_sync()
+    return jsonify({"ok": True, "q": q, "items": _MEMO_INDEX.suggest(q[:100], limit)})
+
 # ===============================
 # ✅ 캘린더 API
 # ===============================
+def _event_to_fullcalendar(eid, title, st, et, all_day, memo, rrule=None, version=None):
+    return {
+        "id": eid,
+        "version": version,
+        "title": title or "",
+        "start": _dt_to_fullcalendar(st, bool(all_day)),
+        "end": _dt_to_fullcalendar(et, bool(all_day)) if et else None,
+        "allDay": bool(all_day),
+        "memo": memo or "",
+        "rrule": rrule or "",
+    }
+
+def _normalize_rrule(value):
+    """
+    빈 값 → None, 잘못된 RRULE → ValueError
+    """
+    value = (value or "").strip()
+    if not value:
+        return None
+    if value.upper().startswith("RRULE:"):
+        value = value[6:]
+    if recurrence.parse_rrule(value) is None:
+        raise ValueError("invalid_rrule")
+    return value.upper()
+
+def _parse_remind_minutes(value):
+    """ None/"" → None(기본값 사용), 정수 분, 음수 = 알림 없음 """
+    if value is None or value == "":
+        return None
+    try:
+        minutes = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("invalid_remind_minutes")
+    if minutes > 24 * 60:  # 최대 하루 전 (스케줄러가 미리 읽는 범위와 맞춤)
+        raise ValueError("invalid_remind_minutes")
+    return minutes
+
 @app.route("/api/events", methods=["GET"])
 def get_events():
+    """
+    ?start=&end= (FullCalendar가 보내는 표시 기간)
+    - 기간이 있으면: 단일 일정은 기간 필터, 반복 일정은 기간 안의 발생분만 전개
+    - 기간이 없으면: 기존처럼 전체(반복 일정은 시리즈 1건)
+    """
     ensure_db()
-    with get_conn() as conn:
+    win_start = _parse_dt(request.args.get("start"))
+    win_end = _parse_dt(request.args.get("end"))
+
+    with get_read_conn() as conn:
         with conn.cursor() as cur:
             _ensure_calendar_events_columns(cur)
-            cur.execute(
-                """
-                select id, title, start_time, end_time, all_day, memo
-                from calendar_events
-                order by id asc
-                """
-            )
+            if win_start and win_end:
+                cur.execute(
+                    """
+                    select id, title, start_time, end_time, all_day, memo, rrule, exdates, version
+                    from calendar_events
+                    where start_time < %s
+                      and (
+                        (coalesce(rrule, '') <> '')
+                        or coalesce(end_time, start_time) >= %s
+                      )
+                    order by id asc
+                    """,
+                    (win_end, win_start),
+                )
+            else:
+                cur.execute(
+                    """
+                    select id, title, start_time, end_time, all_day, memo, rrule, exdates, version
+                    from calendar_events
+                    order by id asc
+                    """
+                )
             rows = cur.fetchall()
 
     out = []
-    for (eid, title, st, et, all_day, memo) in rows:
-        out.append(
-            {
-                "id": eid,
-                "title": title or "",
-                "start": _dt_to_fullcalendar(st, bool(all_day)),
-                "end": _dt_to_fullcalendar(et, bool(all_day)) if et else None,
-                "allDay": bool(all_day),
-                "memo": memo or "",
-            }
-        )
+    for (eid, title, st, et, all_day, memo, rrule, exdates, version) in rows:
+        if not rrule or not (win_start and win_end):
+            out.append(_event_to_fullcalendar(eid, title, st, et, all_day, memo, rrule, version))
+            continue
+
+        for (ost, oet) in recurrence.expand_cached(eid, rrule, st, et, exdates, win_start, win_end, TZ):
+            item = _event_to_fullcalendar(eid, title, ost, oet if et else None, all_day, memo, rrule, version)
+            item["groupId"] = str(eid)
+            # 발생분을 끌어서 옮기면 시리즈 전체가 움직이므로 드래그 금지
+            item["editable"] = False
+            # exdate로 돌려받는 날짜 → 전개/ICS와 같은 TZ 기준
+            item["occurrence"] = recurrence.local_day(ost, TZ).strftime("%Y-%m-%d")
+            out.append(item)
     return jsonify(out)
 
 @app.route("/api/events", methods=["POST"])
+@idempotent("events.create")
 def create_event():
     ensure_db()
     data = request.get_json(silent=True) or {}
@@ -338,6 +1109,11 @@ def create_event():
 
     if not title or not st:
         return jsonify({"ok": False, "error": "title/start required"}), 400
+    try:
+        rrule = _normalize_rrule(data.get("rrule"))
+        remind = _parse_remind_minutes(data.get("remindMinutes"))
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
 
     now = _now()
     with get_conn() as conn:
@@ -345,11 +1121,11 @@ def create_event():
             _ensure_calendar_events_columns(cur)
             cur.execute(
                 """
-                insert into calendar_events (title, start_time, end_time, all_day, memo, created_at)
-                values (%s, %s, %s, %s, %s, %s)
+                insert into calendar_events (title, start_time, end_time, all_day, memo, rrule, remind_minutes, created_at)
+                values (%s, %s, %s, %s, %s, %s, %s, %s)
                 returning id
                 """,
-                (title, st, et, all_day, memo, now),
+                (title, st, et, all_day, memo, rrule, remind, now),
             )
             event_id = cur.fetchone()[0]
         conn.commit()
@@ -384,18 +1160,256 @@ def update_event(event_id):
         fields.append("memo=%s")
         values.append(data.get("memo") or "")
 
+    if "rrule" in data:
+        try:
+            rrule = _normalize_rrule(data.get("rrule"))
+        except ValueError:
+            return jsonify({"ok": False, "error": "invalid_rrule"}), 400
+        fields.append("rrule=%s")
+        values.append(rrule)
+        # 반복 규칙을 없애면 예외 날짜도 의미 없음
+        if rrule is None:
+            fields.append("exdates=null")
+
+    if "remindMinutes" in data:
+        try:
+            remind = _parse_remind_minutes(data.get("remindMinutes"))
+        except ValueError as e:
+            return jsonify({"ok": False, "error": str(e)}), 400
+        fields.append("remind_minutes=%s")
+        values.append(remind)
+
     if not fields:
         return jsonify({"ok": True})
 
+    fields.append("version=version+1")
     values.append(event_id)
 
     with get_conn() as conn:
         with conn.cursor() as cur:
             _ensure_calendar_events_columns(cur)
-            cur.execute(f"update calendar_events set {', '.join(fields)} where id=%s", values)
+            cur.execute(f"update calendar_events set {', '.join(fields)} where id=%s returning version", values)
+            row = cur.fetchone()
         conn.commit()
 
-    return jsonify({"ok": True})
+    return jsonify({"ok": True, "version": row[0] if row else None})
+
+# -------------------------------
+# ✅ 일괄 처리 (드래그/다중 이동/가져오기)
+#    POST /api/events/batch
+#    { "ops": [ {"op": "create", ...}, {"op": "update", "id": 1, "version": 3, ...}, {"op": "delete", "id": 2} ],
+#      "atomic": false }
+#    - 한 커넥션/한 트랜잭션에서 create → update → delete 순으로 executemany
+#    - version을 보내면 일치할 때만 반영 (stale edit은 conflict)
+#    - atomic=true면 하나라도 실패 시 전체 롤백
+# -------------------------------
+_BATCH_MAX_OPS = 500
+
+_BATCH_UPDATE_SQL = """
+update calendar_events set
+    title      = case when %(has_title)s then %(title)s else title end,
+    start_time = case when %(has_start)s then %(start)s else start_time end,
+    end_time   = case when %(has_end)s then %(end)s else end_time end,
+    all_day    = case when %(has_all_day)s then %(all_day)s else all_day end,
+    memo       = case when %(has_memo)s then %(memo)s else memo end,
+    rrule      = case when %(has_rrule)s then %(rrule)s else rrule end,
+    exdates    = case when %(has_rrule)s and %(rrule)s::text is null then null else exdates end,
+    remind_minutes = case when %(has_remind_minutes)s then %(remind_minutes)s::int4 else remind_minutes end,
+    version    = version + 1
+where id = %(id)s and (%(version)s::int4 is null or version = %(version)s::int4)
+returning id, version
+"""
+
+def _batch_update_params(op):
+    p = {"id": op.get("id"), "version": op.get("version")}
+    for key, col in (("title", "title"), ("start", "start"), ("end", "end"),
+                     ("allDay", "all_day"), ("memo", "memo"), ("rrule", "rrule"),
+                     ("remindMinutes", "remind_minutes")):
+        p["has_" + col] = key in op
+        p[col] = None
+    if "title" in op:
+        p["title"] = (op.get("title") or "").strip()
+    if "start" in op:
+        p["start"] = _parse_dt(op.get("start"))
+        if not p["start"]:
+            raise ValueError("invalid_start")
+    if "end" in op:
+        p["end"] = _parse_dt(op.get("end")) if op.get("end") else None
+    if "allDay" in op:
+        p["all_day"] = 1 if op.get("allDay") else 0
+    if "memo" in op:
+        p["memo"] = op.get("memo") or ""
+    if "rrule" in op:
+        p["rrule"] = _normalize_rrule(op.get("rrule"))
+    if "remindMinutes" in op:
+        p["remind_minutes"] = _parse_remind_minutes(op.get("remindMinutes"))
+    return p
+
+def _batch_int(v):
+    try:
+        return int(v) if v is not None else None
+    except Exception:
+        raise ValueError("invalid_id")
+
+@app.route("/api/events/batch", methods=["POST"])
+@idempotent("events.batch")
+def batch_events():
+    ensure_db()
+    data = request.get_json(silent=True) or {}
+    ops = data.get("ops")
+    atomic = bool(data.get("atomic"))
+    if not isinstance(ops, list) or not ops:
+        return jsonify({"ok": False, "error": "ops required"}), 400
+    if len(ops) > _BATCH_MAX_OPS:
+        return jsonify({"ok": False, "error": "too_many_ops", "max": _BATCH_MAX_OPS}), 400
+
+    results = [None] * len(ops)
+    creates, updates, deletes = [], [], []  # (index, params)
+    now = _now()
+
+    # 1) 검증 (DB 접근 없음)
+    for i, op in enumerate(ops):
+        kind = (op or {}).get("op") if isinstance(op, dict) else None
+        try:
+            if kind == "create":
+                title = (op.get("title") or "").strip()
+                st = _parse_dt(op.get("start"))
+                if not title or not st:
+                    raise ValueError("title/start required")
+                creates.append((i, (
+                    title, st,
+                    _parse_dt(op.get("end")) if op.get("end") else None,
+                    1 if op.get("allDay") else 0,
+                    op.get("memo") or "",
+                    _normalize_rrule(op.get("rrule")),
+                    _parse_remind_minutes(op.get("remindMinutes")),
+                    now,
+                )))
+            elif kind == "update":
+                op = dict(op, id=_batch_int(op.get("id")), version=_batch_int(op.get("version")))
+                if op["id"] is None:
+                    raise ValueError("id required")
+                params = _batch_update_params(op)
+                if "title" in op and not params["title"]:
+                    raise ValueError("title required")
+                updates.append((i, params))
+            elif kind == "delete":
+                eid = _batch_int(op.get("id"))
+                if eid is None:
+                    raise ValueError("id required")
+                deletes.append((i, {"id": eid, "version": _batch_int(op.get("version"))}))
+            else:
+                raise ValueError("unknown_op")
+        except ValueError as e:
+            results[i] = {"ok": False, "error": str(e)}
+
+    if atomic and any(r is not None for r in results):
+        return jsonify({"ok": False, "error": "invalid_ops", "results": results}), 400
+
+    # 2) 한 트랜잭션에서 반영
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            _ensure_calendar_events_columns(cur)
+
+            if creates:
+                cur.executemany(
+                    """
+                    insert into calendar_events (title, start_time, end_time, all_day, memo, rrule, remind_minutes, created_at)
+                    values (%s, %s, %s, %s, %s, %s, %s, %s)
+                    returning id, version
+                    """,
+                    [p for (_, p) in creates],
+                    returning=True,
+                )
+                for (i, _) in creates:
+                    row = cur.fetchone()
+                    results[i] = {"ok": True, "op": "create", "id": row[0], "version": row[1]}
+                    cur.nextset()
+
+            missed = []  # (index, id, op)
+            if updates:
+                cur.executemany(_BATCH_UPDATE_SQL, [p for (_, p) in updates], returning=True)
+                for (i, p) in updates:
+                    row = cur.fetchone()
+                    if row:
+                        results[i] = {"ok": True, "op": "update", "id": row[0], "version": row[1]}
+                    else:
+                        missed.append((i, p["id"], "update"))
+                    cur.nextset()
+
+            if deletes:
+                cur.executemany(
+                    """
+                    delete from calendar_events
+                    where id = %(id)s and (%(version)s::int4 is null or version = %(version)s::int4)
+                    returning id
+                    """,
+                    [p for (_, p) in deletes],
+                    returning=True,
+                )
+                for (i, p) in deletes:
+                    row = cur.fetchone()
+                    if row:
+                        results[i] = {"ok": True, "op": "delete", "id": row[0]}
+                    else:
+                        missed.append((i, p["id"], "delete"))
+                    cur.nextset()
+
+            # 반영 안 된 건: 없는 id인지, 버전 충돌인지 한 번에 확인
+            if missed:
+                cur.execute(
+                    "select id, version from calendar_events where id = any(%s)",
+                    ([m[1] for m in missed],),
+                )
+                current = dict(cur.fetchall())
+                for (i, eid, kind) in missed:
+                    if eid in current:
+                        results[i] = {"ok": False, "op": kind, "id": eid, "error": "conflict", "version": current[eid]}
+                    else:
+                        results[i] = {"ok": False, "op": kind, "id": eid, "error": "not_found"}
+
+        failed = sum(1 for r in results if not r["ok"])
+        if atomic and failed:
+            conn.rollback()
+            return jsonify({"ok": False, "error": "conflict", "results": results}), 409
+        conn.commit()
+
+    return jsonify({"ok": failed == 0, "applied": len(results) - failed, "failed": failed, "results": results})
+
+@app.route("/api/events/<int:event_id>/exdate", methods=["POST"])
+def add_event_exdate(event_id):
+    """
+    반복 일정에서 특정 날짜 1건만 제외 (body: {"date": "YYYY-MM-DD"})
+    """
+    ensure_db()
+    data = request.get_json(silent=True) or {}
+    day = _parse_dt(data.get("date"))
+    if not day:
+        return jsonify({"ok": False, "error": "date required"}), 400
+    day = recurrence.local_day(day, TZ).strftime("%Y-%m-%d")
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            _ensure_calendar_events_columns(cur)
+            cur.execute(
+                """
+                update calendar_events
+                set exdates = case
+                    when coalesce(exdates, '') = '' then %s
+                    when position(%s in exdates) > 0 then exdates
+                    else exdates || ',' || %s
+                end
+                where id=%s and coalesce(rrule, '') <> ''
+                returning exdates
+                """,
+                (day, day, day, event_id),
+            )
+            row = cur.fetchone()
+        conn.commit()
+
+    if not row:
+        return jsonify({"ok": False, "error": "not_recurring"}), 404
+    return jsonify({"ok": True, "exdates": row[0]})
 
 @app.route("/api/events/<int:event_id>", methods=["DELETE"])
 def delete_event(event_id):
@@ -406,6 +1420,160 @@ def delete_event(event_id):
         conn.commit()
     return jsonify({"ok": True})
 
+# ===============================
+# ✅ iCalendar 피드 / 가져오기
+#   GET  /calendar.ics[?token=]   휴대폰 캘린더 앱 구독용
+#        - calendar_feed_state.generation이 그대로면 캐시된 bytes 그대로 (ETag → 304)
+#        - 바뀌었으면 (id, xmin)만 훑어서 바뀐/새 일정만 VEVENT 다시 만들고 나머지는 재사용
+#   POST /api/calendar/import     본문 = .ics (text/calendar) 또는 multipart "file"
+#        - VEVENT 전부를 한 트랜잭션으로 넣음, 같은 UID는 갱신
+# ===============================
+CALENDAR_FEED_NAME = "Keyword Manager"
+CALENDAR_IMPORT_MAX_BYTES = 5 * 1024 * 1024
+
+_ICS_LOCK = threading.Lock()
+_ICS_CACHE = {"generation": None, "events": {}, "body": b"", "gz": b"", "etag": None}
+# events: id -> (xmin, vevent 문자열)
+
+def _ics_uid(eid, ics_uid):
+    return ics_uid or f"event-{eid}@keyword-manager"
+
+def _ics_lookup_tz(name):
+    try:
+        return pytz.timezone(name)
+    except Exception:
+        return None
+
+def _ics_feed():
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("select generation from calendar_feed_state where id = 1")
+            row = cur.fetchone()
+            generation = row[0] if row else 0
+            with _ICS_LOCK:
+                if _ICS_CACHE["generation"] == generation and _ICS_CACHE["etag"]:
+                    return dict(_ICS_CACHE)
+                cached = dict(_ICS_CACHE["events"])
+
+            _ensure_calendar_events_columns(cur)
+            # xmin: 행이 바뀔 때마다 달라지는 시스템 컬럼 → 바뀐 행만 다시 읽음
+            cur.execute("select id, xmin::text from calendar_events")
+            current = dict(cur.fetchall())
+            changed = [eid for eid, xmin in current.items() if eid not in cached or cached[eid][0] != xmin]
+            if changed:
+                cur.execute(
+                    """
+                    select id, xmin::text, title, start_time, end_time, all_day, memo,
+                           rrule, exdates, created_at, ics_uid
+                    from calendar_events
+                    where id = any(%s)
+                    """,
+                    (changed,),
+                )
+                for (eid, xmin, title, st, et, all_day, memo, rrule, exdates, created_at, uid) in cur.fetchall():
+                    cached[eid] = (xmin, ics.format_event(
+                        _ics_uid(eid, uid), title, st, et, all_day, memo,
+                        rrule=rrule, exdates=exdates, stamp=created_at, tz=TZ,
+                    ))
+
+    events = {eid: cached[eid] for eid in current if eid in cached}
+    text = ics.calendar_header(CALENDAR_FEED_NAME) + "".join(events[eid][1] for eid in sorted(events)) + ics.CALENDAR_FOOTER
+    body = text.encode("utf-8")
+    snap = {
+        "generation": generation,
+        "events": events,
+        "body": body,
+        "gz": gzip.compress(body, compresslevel=6, mtime=0),
+        "etag": f"cal-{generation}-{hashlib.blake2b(body, digest_size=8).hexdigest()}",
+    }
+    with _ICS_LOCK:
+        _ICS_CACHE.update(snap)
+    return snap
+
+@app.route("/calendar.ics", methods=["GET"])
+def calendar_ics():
+    # CALENDAR_FEED_TOKEN을 설정하면 ?token= 이 맞아야 함 (구독 URL에 넣어 사용)
+    token = (os.environ.get("CALENDAR_FEED_TOKEN") or "").strip()
+    if token and not hmac.compare_digest((request.args.get("token") or "").strip(), token):
+        return Response("forbidden", status=403, mimetype="text/plain")
+
+    ensure_db()
+    stale = False
+    try:
+        feed = _ics_feed()
+    except resilience.Unavailable:
+        # DB를 못 쓰면 마지막으로 만든 피드라도
+        with _ICS_LOCK:
+            feed = dict(_ICS_CACHE)
+        if not feed.get("etag"):
+            raise
+        stale = True
+    use_gzip = "gzip" in (request.headers.get("Accept-Encoding") or "").lower()
+    tagged = f"{feed['etag']}-gz" if use_gzip else feed["etag"]
+    headers = {"ETag": f'"{tagged}"', "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if stale:
+        headers["X-Stale"] = "1"
+
+    if request.if_none_match.contains(tagged):
+        return Response(status=304, headers=headers)
+    headers["Content-Disposition"] = 'inline; filename="calendar.ics"'
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(feed["gz"], mimetype="text/calendar", headers=headers)
+    return Response(feed["body"], mimetype="text/calendar", headers=headers)
+
+_ICS_UPSERT_SQL = """
+insert into calendar_events (title, start_time, end_time, all_day, memo, rrule, exdates, ics_uid, created_at)
+values (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+on conflict (ics_uid) where ics_uid is not null do update
+set title = excluded.title,
+    start_time = excluded.start_time,
+    end_time = excluded.end_time,
+    all_day = excluded.all_day,
+    memo = excluded.memo,
+    rrule = excluded.rrule,
+    exdates = excluded.exdates,
+    version = calendar_events.version + 1
+"""
+
+@app.route("/api/calendar/import", methods=["POST"])
+@resilience.no_deadline
+def import_calendar():
+    ensure_db()
+    if request.content_length is not None and request.content_length > CALENDAR_IMPORT_MAX_BYTES:
+        return jsonify({"ok": False, "error": "too_large"}), 413
+
+    f = request.files.get("file")
+    raw = f.read(CALENDAR_IMPORT_MAX_BYTES + 1) if f else request.get_data(cache=False)
+    if len(raw) > CALENDAR_IMPORT_MAX_BYTES:
+        return jsonify({"ok": False, "error": "too_large"}), 413
+    text = raw.decode("utf-8-sig", errors="replace")
+    if "BEGIN:VCALENDAR" not in text.upper():
+        return jsonify({"ok": False, "error": "not_icalendar"}), 400
+
+    now = _now()
+    rows = []
+    skipped = 0
+    for ev in ics.parse(text, tz=TZ, tz_lookup=_ics_lookup_tz):
+        try:
+            rrule = _normalize_rrule(ev["rrule"])
+        except ValueError:
+            skipped += 1
+            continue
+        rows.append((
+            (ev["title"] or "(제목 없음)")[:500], ev["start"], ev["end"], ev["all_day"],
+            ev["memo"], rrule, ev["exdates"] if rrule else None, ev["uid"], now,
+        ))
+
+    if rows:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                _ensure_calendar_events_columns(cur)
+                cur.executemany(_ICS_UPSERT_SQL, rows)
+            conn.commit()  # 전부 아니면 전무 (중간 실패 시 with 블록이 롤백)
+
+    return jsonify({"ok": True, "imported": len(rows), "skipped": skipped})
+
 # ===============================
 # ✅ 채팅 API
 # ===============================
@@ -418,30 +1586,347 @@ def chat_messages():
         after_id = 0
     room = (request.args.get("room") or "main").strip() or "main"
 
-    with get_conn() as conn:
+    with get_read_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
-                """
-                select id, sender, message, created_at, client_id
-                from chat_messages
-                where room = %s and id > %s
-                order by id asc
+                f"""
+                {_CHAT_SELECT}
+                where m.room = %s and m.id > %s
+                order by m.id asc
                 """,
                 (room, after_id),
             )
             rows = cur.fetchall()
 
-    return jsonify(
-        {
-            "ok": True,
-            "messages": [
-                {"id": r[0], "sender": r[1], "message": r[2], "created_at": r[3].isoformat() if r[3] else None, "client_id": r[4]}
-                for r in rows
-            ],
-        }
+    return jsonify({"ok": True, "messages": [_chat_row_json(r) for r in rows]})
+
+_CHAT_SELECT = """
+    select m.id, m.sender, m.message, m.created_at, m.client_id,
+           a.sha256, a.filename, a.mime, a.size
+    from chat_messages m
+    left join chat_attachments a on a.sha256 = m.attachment
+"""
+
+def _chat_row_json(r):
+    return {
+        "id": r[0], "sender": r[1], "message": r[2],
+        "created_at": r[3].isoformat() if r[3] else None, "client_id": r[4],
+        "attachment": _attachment_json(r[5], r[6], r[7], r[8]),
+    }
+
+def _attachment_json(sha256, filename, mime, size):
+    if not sha256:
+        return None
+    return {
+        "sha256": sha256,
+        "filename": filename or sha256[:12],
+        "mime": mime,
+        "size": size,
+        "url": f"/api/chat/attachments/{sha256}",
+        "thumb": f"/api/chat/attachments/{sha256}?thumb=1" if attachments.is_image(mime) else None,
+    }
+
+# -------------------------------
+# ✅ 첫 화면용 채팅 스냅샷 (room별 최근 N건, 직렬화 + gzip 미리 해둠)
+#   GET /api/chat/snapshot?room=main
+#   - 새 탭은 전체 조회 대신 이걸 받고, 이후엔 last_id 이후만 폴링
+#   - send_chat 시 메모리에서 1건 추가 → 다시 이어붙이기만 (DB 재조회 없음)
+#   - 다른 워커에서 보낸 메시지는 chat_room_summary.last_id로 감지해서 그 이후만 추가 조회
+#   - count = 스냅샷이 알고 있는 room 전체 메시지 수 → chat_room_summary.message_count와 다르면
+#     중간에 빠진 메시지(다른 워커가 더 작은 id로 늦게 커밋 등)가 있다는 뜻 → 새로 만듦
+#   - 강한 ETag + Cache-Control: no-cache → 바뀐 게 없으면 304
+# -------------------------------
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except Exception:
+        return default
+
+CHAT_SNAPSHOT_SIZE = max(1, _env_int("CHAT_SNAPSHOT_SIZE", 200))
+_CHAT_SNAPSHOT_ROOMS = max(1, _env_int("CHAT_SNAPSHOT_ROOMS", 256))
+
+_CHAT_SNAPSHOTS = OrderedDict()  # room -> dict(parts, last_id, count, body, gz, etag)
+_CHAT_SNAPSHOT_LOCK = threading.Lock()
+
+def _chat_snapshot_encode(msg):
+    return json.dumps(msg, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _chat_snapshot_render(room, snap):
+    # 메시지별 JSON은 들어올 때 한 번만 만들어 두고 여기선 이어붙이기만
+    body = b"".join([
+        b'{"ok":true,"room":', json.dumps(room, ensure_ascii=False).encode("utf-8"),
+        b',"last_id":', str(snap["last_id"]).encode("ascii"),
+        b',"messages":[', b",".join(p for _, p in snap["parts"]), b"]}",
+    ])
+    snap["body"] = body
+    snap["gz"] = gzip.compress(body, compresslevel=6, mtime=0)
+    snap["etag"] = hashlib.blake2b(body, digest_size=12).hexdigest()
+
+def _chat_snapshot_put(room, snap):
+    with _CHAT_SNAPSHOT_LOCK:
+        _CHAT_SNAPSHOTS[room] = snap
+        _CHAT_SNAPSHOTS.move_to_end(room)
+        while len(_CHAT_SNAPSHOTS) > _CHAT_SNAPSHOT_ROOMS:
+            _CHAT_SNAPSHOTS.popitem(last=False)
+
+def _chat_snapshot_extend(room, snap, msgs):
+    # msgs: id 오름차순 dict 목록. 스냅샷보다 오래된 id가 섞이면(순서 꼬임) False → 재생성
+    parts = deque(snap["parts"], maxlen=CHAT_SNAPSHOT_SIZE)
+    last_id = snap["last_id"]
+    for m in msgs:
+        if m["id"] <= last_id:
+            return None
+        parts.append((m["id"], _chat_snapshot_encode(m)))
+        last_id = m["id"]
+    new = {"parts": parts, "last_id": last_id, "count": snap["count"] + len(msgs)}
+    _chat_snapshot_render(room, new)
+    return new
+
+def _chat_snapshot_load(cur, room):
+    cur.execute("select message_count from chat_room_summary where room=%s", (room,))
+    row = cur.fetchone()
+    count = row[0] if row else 0
+    cur.execute(
+        f"""
+        select * from (
+            {_CHAT_SELECT}
+            where m.room = %s
+            order by m.id desc
+            limit %s
+        ) t order by id asc
+        """,
+        (room, CHAT_SNAPSHOT_SIZE),
+    )
+    rows = [_chat_row_json(r) for r in cur.fetchall()]
+    snap = {"parts": deque(maxlen=CHAT_SNAPSHOT_SIZE), "last_id": 0, "count": count - len(rows)}
+    return _chat_snapshot_extend(room, snap, rows)
+
+def _chat_snapshot_get(room):
+    with _CHAT_SNAPSHOT_LOCK:
+        snap = _CHAT_SNAPSHOTS.get(room)
+        if snap is not None:
+            _CHAT_SNAPSHOTS.move_to_end(room)
+
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            if snap is not None:
+                cur.execute("select last_id, message_count from chat_room_summary where room=%s", (room,))
+                row = cur.fetchone()
+                db_last, db_count = row if row else (0, 0)
+                if db_last == snap["last_id"] and db_count == snap["count"]:
+                    return snap
+                if db_last > snap["last_id"]:
+                    cur.execute(
+                        f"""
+                        {_CHAT_SELECT}
+                        where m.room = %s and m.id > %s
+                        order by m.id asc
+                        """,
+                        (room, snap["last_id"]),
+                    )
+                    new = _chat_snapshot_extend(room, snap, [_chat_row_json(r) for r in cur.fetchall()])
+                    if new is not None and new["count"] == db_count:
+                        _chat_snapshot_put(room, new)
+                        return new
+            # 처음이거나, 삭제/빠진 메시지로 last_id·개수가 안 맞는 경우 → 새로 만듦
+            snap = _chat_snapshot_load(cur, room)
+    _chat_snapshot_put(room, snap)
+    return snap
+
+def _chat_snapshot_append(room, msg):
+    """
+    send_chat 직후 호출. 이 워커에 스냅샷이 있을 때만 메모리에서 1건 추가
+    - 읽기/이어붙이기/저장을 한 번의 lock 안에서 (동시 전송끼리 서로 덮어써서 메시지를 잃지 않게)
+    - 스냅샷보다 작은 id가 늦게 오면(커밋 순서 ≠ id 순서) 버림 → 다음 조회 때 DB에서 새로 만듦
+    """
+    with _CHAT_SNAPSHOT_LOCK:
+        snap = _CHAT_SNAPSHOTS.get(room)
+        if snap is None:
+            return
+        new = _chat_snapshot_extend(room, snap, [msg])
+        if new is None:
+            _CHAT_SNAPSHOTS.pop(room, None)
+            return
+        _CHAT_SNAPSHOTS[room] = new
+
+@app.route("/api/chat/snapshot", methods=["GET"])
+def chat_snapshot():
+    ensure_db()
+    room = (request.args.get("room") or "main").strip() or "main"
+    stale = False
+    try:
+        snap = _chat_snapshot_get(room)
+    except resilience.Unavailable:
+        # DB를 못 쓰면 이 워커에 남아 있는 스냅샷이라도 (없으면 503)
+        with _CHAT_SNAPSHOT_LOCK:
+            snap = _CHAT_SNAPSHOTS.get(room)
+        if snap is None:
+            raise
+        stale = True
+
+    etag = snap["etag"]
+    use_gzip = "gzip" in (request.headers.get("Accept-Encoding") or "").lower()
+    tagged = f"{etag}-gz" if use_gzip else etag
+    headers = {"ETag": f'"{tagged}"', "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if stale:
+        headers["X-Stale"] = "1"
+
+    if request.if_none_match.contains(tagged):
+        return Response(status=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(snap["gz"], mimetype="application/json", headers=headers)
+    return Response(snap["body"], mimetype="application/json", headers=headers)
+
+# -------------------------------
+# ✅ 첨부파일 업로드/다운로드
+#   POST /api/chat/attachments   본문 = 파일 그대로 (Content-Type, X-Filename 헤더)
+#        → 64KB씩 읽으며 sha256 계산 + 디스크 기록, 같은 해시면 중복 저장 안 함
+#   GET  /api/chat/attachments/<sha256>[?thumb=1]
+#        → send_file(Range/조건부 요청 지원) + 내용이 바뀔 일 없으니 1년 immutable 캐시
+# -------------------------------
+_ATTACHMENT_CACHE_SEC = 365 * 24 * 60 * 60
+
+@app.route("/api/chat/attachments", methods=["POST"])
+@resilience.no_deadline
+def upload_attachment():
+    ensure_db()
+    limit = attachments.max_bytes()
+    if request.content_length is not None and request.content_length > limit:
+        return jsonify({"ok": False, "error": "too_large", "max_bytes": limit}), 413
+
+    mime = (request.content_type or "application/octet-stream").split(";")[0].strip().lower()
+    filename = unquote(request.headers.get("X-Filename") or "").strip()
+    filename = os.path.basename(filename.replace("\\", "/"))[:200] or None
+
+    try:
+        sha256, size, _created = attachments.save_stream(request.stream, limit)
+    except attachments.TooLarge:
+        return jsonify({"ok": False, "error": "too_large", "max_bytes": limit}), 413
+    if size == 0:
+        return jsonify({"ok": False, "error": "empty_file"}), 400
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                insert into chat_attachments (sha256, size, mime, filename)
+                values (%s, %s, %s, %s)
+                on conflict (sha256) do update set sha256 = excluded.sha256
+                returning size, mime, filename
+                """,
+                (sha256, size, mime, filename),
+            )
+            size, mime, stored_name = cur.fetchone()
+        conn.commit()
+
+    if attachments.is_image(mime):
+        attachments.enqueue_thumbnail(sha256)
+    return jsonify({"ok": True, **_attachment_json(sha256, filename or stored_name, mime, size)})
+
+@app.route("/api/chat/attachments/<sha256>", methods=["GET"])
+def download_attachment(sha256):
+    if not attachments.SHA256_RE.match(sha256 or ""):
+        return jsonify({"ok": False, "error": "not_found"}), 404
+    path = attachments.blob_path(sha256)
+    if not os.path.exists(path):
+        return jsonify({"ok": False, "error": "not_found"}), 404
+
+    ensure_db()
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("select mime, filename from chat_attachments where sha256=%s", (sha256,))
+            row = cur.fetchone()
+    mime, filename = row if row else ("application/octet-stream", None)
+    image = attachments.is_image(mime)
+    # 이미지 외에는 브라우저에서 열지 않고 다운로드 (HTML 등 실행 방지)
+    # mime은 올린 쪽이 보낸 값이므로 모든 응답에 nosniff
+    mimetype = mime if image else "application/octet-stream"
+
+    if request.args.get("thumb") and image:
+        tpath = attachments.thumb_path(sha256)
+        if os.path.exists(tpath):
+            resp = send_file(tpath, mimetype="image/jpeg", conditional=True,
+                             etag=sha256 + "-t", max_age=_ATTACHMENT_CACHE_SEC)
+            resp.cache_control.immutable = True
+        else:
+            # 썸네일 아직 없음 → 원본을 짧게만 캐시
+            resp = send_file(path, mimetype=mimetype, conditional=True, etag=sha256, max_age=60)
+        resp.headers["X-Content-Type-Options"] = "nosniff"
+        return resp
+
+    resp = send_file(
+        path,
+        mimetype=mimetype,
+        as_attachment=not image,
+        download_name=filename or sha256[:12],
+        conditional=True,
+        etag=sha256,
+        max_age=_ATTACHMENT_CACHE_SEC,
     )
+    resp.cache_control.immutable = True
+    resp.headers["X-Content-Type-Options"] = "nosniff"
+    return resp
+
+@app.route("/api/chat/rooms", methods=["GET"])
+def chat_rooms():
+    """
+    방 목록: chat_room_summary만 읽음 (메시지 수와 무관하게 방 개수만큼)
+    ?client_id= 를 주면 방별 안읽은 수(최대 _UNREAD_CAP)도 포함
+    """
+    ensure_db()
+    client_id = (request.args.get("client_id") or "").strip()
+
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            if client_id:
+                cur.execute(
+                    """
+                    select s.room, s.last_id, s.last_sender, s.last_message, s.last_at, s.message_count,
+                           (select count(*) from (
+                                select 1 from chat_messages m
+                                where m.room = s.room and m.id > coalesce(c.last_read_id, 0)
+                                order by m.id
+                                limit %s
+                           ) t)
+                    from chat_room_summary s
+                    left join chat_read_cursors c on c.client_id = %s and c.room = s.room
+                    order by s.last_at desc nulls last
+                    """,
+                    (_UNREAD_CAP, client_id),
+                )
+            else:
+                cur.execute(
+                    """
+                    select room, last_id, last_sender, last_message, last_at, message_count, null
+                    from chat_room_summary
+                    order by last_at desc nulls last
+                    """
+                )
+            rows = cur.fetchall()
+
+    return jsonify({
+        "ok": True,
+        "rooms": [
+            {
+                "room": r[0],
+                "last_id": r[1],
+                "last_sender": r[2] or "",
+                "last_message": (r[3] or "")[:120],
+                "last_at": r[4].isoformat() if r[4] else None,
+                "message_count": r[5],
+                "unread": r[6],
+            }
+            for r in rows
+        ],
+    })
+
+def _room_url(room):
+    # 알림 클릭 시 해당 방으로 열기
+    return "/" if room == "main" else "/?room=" + quote(room)
 
 @app.route("/api/chat/send", methods=["POST"])
+@idempotent("chat.send")
 def send_chat():
     ensure_db()
     data = request.get_json(silent=True) or {}
@@ -451,42 +1936,227 @@ def send_chat():
     client_id = (data.get("client_id") or "").strip() or None
     message = (data.get("message") or "").strip()
     client_id = (data.get("client_id") or "").strip() or None
-    if not message:
+    attachment = (data.get("attachment") or "").strip().lower() or None
+    if attachment and not attachments.SHA256_RE.match(attachment):
+        return jsonify({"ok": False, "error": "invalid_attachment"}), 400
+    if not message and not attachment:
         return jsonify({"ok": False, "error": "empty_message"}), 400
 
-    now = _now()
+    attachment_name = None
+    if attachment:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("select filename, mime, size from chat_attachments where sha256=%s", (attachment,))
+                row = cur.fetchone()
+        if row is None:
+            return jsonify({"ok": False, "error": "invalid_attachment"}), 400
+        attachment_name, att_mime, att_size = row
+
+    item = {"room": room, "sender": sender, "message": message, "client_id": client_id, "attachment": attachment}
+    committer = _chat_group_committer()
+    if committer is not None:
+        msg_id = committer.submit(item, prepare=_chat_stamp)
+    else:
+        _chat_stamp(item)
+        msg_id = _chat_insert_batch([item])[0]
+    replica.remember_lsn(item.get("lsn"))
+    now = item["created_at"]
+
+    att_json = None
+    if attachment:
+        att_json = _attachment_json(attachment, attachment_name, att_mime, att_size)
+    _chat_snapshot_append(room, {
+        "id": msg_id, "sender": sender, "message": message,
+        "created_at": now.isoformat(), "client_id": client_id, "attachment": att_json,
+    })
 
+    # ✅ Push 알림 (옵션): 새 메시지 도착 시 구독자에게 푸시 전송
+    # - 실패해도 채팅 저장/응답은 정상 처리되도록 try/except
+    # - room별로 잠깐 모아서 요약 1건 (연달아 보내도 폰이 한 번만 울림)
+    # - room/msg_id를 넘기면 이미 이 메시지까지 읽은 client는 건너뜀
+    if attachment:
+        message = (message + " " if message else "") + f"📎 {attachment_name or '첨부파일'}"
+    try:
+        if notify_chat:
+            notify_chat(room=room, sender=sender, message=message, msg_id=msg_id, url=_room_url(room))
+        else:
+            notify_all(
+                title=f"새 메시지: {sender}",
+                body=(message[:120] + ("…" if len(message) > 120 else "")),
+                url=_room_url(room),
+                room=room,
+                msg_id=msg_id,
+            )
+    except Exception as _e:
+        print("[push] notify_all failed:", _e)
+
+    return jsonify({"ok": True, "id": msg_id, "created_at": now.isoformat(), "client_id": client_id})
+
+
+# -------------------------------
+# ✅ 채팅 저장 (그룹 커밋 옵션)
+#   CHAT_GROUP_COMMIT_MS=5 → 동시에 들어온 send_chat을 최대 5ms 모아서
+#   insert 1문장 + 읽음 위치 upsert 1문장 + commit 1번 (WAL flush/fsync 1번)
+#   - 0(기본)이면 예전처럼 요청마다 바로 커밋
+#   - 묶음은 전용 스레드가 순서대로 처리, id/created_at은 제출 순서대로 증가
+#   CHAT_GROUP_COMMIT_MAX=256 (한 묶음 최대 건수)
+# -------------------------------
+_CHAT_GROUP = {"committer": None, "ms": None}
+_CHAT_GROUP_LOCK = threading.Lock()
+
+def _chat_group_committer():
+    try:
+        ms = float(os.environ.get("CHAT_GROUP_COMMIT_MS", "0"))
+    except Exception:
+        ms = 0.0
+    if ms <= 0:
+        return None
+    with _CHAT_GROUP_LOCK:
+        c = _CHAT_GROUP["committer"]
+        if c is None:
+            try:
+                max_batch = max(1, int(os.environ.get("CHAT_GROUP_COMMIT_MAX", "256")))
+            except Exception:
+                max_batch = 256
+            c = groupcommit.GroupCommitter(_chat_insert_batch, window_sec=min(ms, 50.0) / 1000,
+                                           max_batch=max_batch, name="chat-group-commit")
+            _CHAT_GROUP["committer"] = c
+        return c
+
+def _chat_stamp(item):
+    item["created_at"] = _now()
+
+def _chat_insert_batch(items):
+    """ items(제출 순서) → 같은 순서의 id 목록. 한 트랜잭션, 한 번 커밋 """
+    cols = ("room", "sender", "message", "created_at", "client_id", "attachment")
     with get_conn() as conn:
         with conn.cursor() as cur:
+            # ordinality 순서대로 넣으므로 시퀀스 값도 그 순서로 증가 → 정렬해서 짝지음
             cur.execute(
                 """
-                insert into chat_messages (room, sender, message, created_at, client_id)
-                values (%s, %s, %s, %s, %s)
+                insert into chat_messages (room, sender, message, created_at, client_id, attachment)
+                select room, sender, message, created_at, client_id, attachment
+                from unnest(%s::text[], %s::text[], %s::text[], %s::timestamptz[], %s::text[], %s::text[])
+                     with ordinality as t(room, sender, message, created_at, client_id, attachment, ord)
+                order by ord
                 returning id
                 """,
-                (room, sender, message, now, client_id),
+                [[it[c] for it in items] for c in cols],
             )
-            msg_id = cur.fetchone()[0]
+            ids = sorted(r[0] for r in cur.fetchall())
+
+            # 내가 보낸 메시지는 읽은 것으로 처리 (같은 client/room은 마지막 id만)
+            latest = {}
+            for it, msg_id in zip(items, ids):
+                if it["client_id"]:
+                    latest[(it["client_id"], it["room"])] = msg_id
+            if len(latest) == 1:
+                (client_id, room), msg_id = next(iter(latest.items()))
+                _upsert_read_cursor(cur, client_id, room, msg_id)
+            elif latest:
+                keys = list(latest)
+                cur.execute(
+                    """
+                    insert into chat_read_cursors (client_id, room, last_read_id, updated_at)
+                    select c, r, i, now() from unnest(%s::text[], %s::text[], %s::bigint[]) as t(c, r, i)
+                    on conflict (client_id, room) do update
+                    set last_read_id = greatest(chat_read_cursors.last_read_id, excluded.last_read_id),
+                        updated_at = excluded.updated_at
+                    """,
+                    ([k[0] for k in keys], [k[1] for k in keys], [latest[k] for k in keys]),
+                )
+        # 그룹 커밋 스레드에는 요청이 없으므로 커밋 LSN을 항목에 실어 제출자에게 돌려줌
+        conn.track_lsn = True
         conn.commit()
+    for it in items:
+        it["lsn"] = conn.last_lsn
+    return ids
 
-    # ✅ Push 알림 (옵션): 새 메시지 도착 시 구독자에게 푸시 전송
-    # - 실패해도 채팅 저장/응답은 정상 처리되도록 try/except
+# ===============================
+# ✅ 읽음 위치 / 안읽은 메시지 수
+# ===============================
+_UNREAD_CAP = 100  # 안읽음 수는 최대 100까지만 셈 (UI는 "99+")
+
+def _upsert_read_cursor(cur, client_id, room, last_read_id):
+    # 뒤로 가지 않도록 greatest
+    cur.execute(
+        """
+        insert into chat_read_cursors (client_id, room, last_read_id, updated_at)
+        values (%s, %s, %s, now())
+        on conflict (client_id, room) do update
+        set last_read_id = greatest(chat_read_cursors.last_read_id, excluded.last_read_id),
+            updated_at = excluded.updated_at
+        """,
+        (client_id, room, last_read_id),
+    )
+
+@app.route("/api/chat/read", methods=["POST"])
+def chat_mark_read():
+    ensure_db()
+    data = request.get_json(silent=True) or {}
+    client_id = (data.get("client_id") or "").strip()
+    room = (data.get("room") or "main").strip() or "main"
     try:
-        notify_all(
-            title=f"새 메시지: {sender}",
-            body=(message[:120] + ("…" if len(message) > 120 else "")),
-            url="/",
-        )
-    except Exception as _e:
-        print("[push] notify_all failed:", _e)
+        last_read_id = int(data.get("last_read_id") or 0)
+    except Exception:
+        last_read_id = 0
+    if not client_id:
+        return jsonify({"ok": False, "error": "no_client_id"}), 400
+    if last_read_id <= 0:
+        return jsonify({"ok": True})
 
-    return jsonify({"ok": True, "id": msg_id, "created_at": now.isoformat(), "client_id": client_id})
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            _upsert_read_cursor(cur, client_id, room, last_read_id)
+        conn.commit()
+    return jsonify({"ok": True, "last_read_id": last_read_id})
+
+@app.route("/api/chat/unread", methods=["GET"])
+def chat_unread():
+    """
+    ?client_id=...&room=main&room=...
+    room별 안읽은 수. (room, id) 인덱스에서 last_read_id 이후를 최대 _UNREAD_CAP개만 셈
+    → 메시지 전체 스캔 없이 room당 상수 비용
+    """
+    ensure_db()
+    client_id = (request.args.get("client_id") or "").strip()
+    if not client_id:
+        return jsonify({"ok": False, "error": "no_client_id"}), 400
+    rooms = [r.strip() for r in request.args.getlist("room") if r.strip()] or ["main"]
+
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                select r.room,
+                       coalesce(c.last_read_id, 0),
+                       (select count(*) from (
+                            select 1 from chat_messages m
+                            where m.room = r.room and m.id > coalesce(c.last_read_id, 0)
+                            order by m.id
+                            limit %s
+                       ) t)
+                from unnest(%s::text[]) as r(room)
+                left join chat_read_cursors c on c.client_id = %s and c.room = r.room
+                """,
+                (_UNREAD_CAP, rooms, client_id),
+            )
+            rows = cur.fetchall()
+
+    return jsonify({
+        "ok": True,
+        "rooms": {
+            r[0]: {"last_read_id": r[1], "unread": r[2], "more": r[2] >= _UNREAD_CAP}
+            for r in rows
+        },
+    })
 
 
 # ===============================
 # ✅ 최근 접속자(Presence) API
 # ===============================
 @app.route("/api/presence/ping", methods=["POST"])
+@replica.untracked
 def presence_ping():
     ensure_db()
     data = request.get_json(silent=True) or {}
@@ -529,13 +2199,14 @@ def presence_list():
     if minutes > 60:
         minutes = 60
 
-    with get_conn() as conn:
+    with get_read_conn() as conn:
         with conn.cursor() as cur:
+            # make_interval: 상수 하한 → presence_last_seen_idx 범위 스캔
             cur.execute(
                 """
                 select client_id, sender, animal, last_seen
                 from presence
-                where last_seen >= (now() - (%s || ' minutes')::interval)
+                where last_seen >= now() - make_interval(mins => %s)
                 order by last_seen desc
                 limit 30
                 """,
@@ -552,6 +2223,549 @@ def presence_list():
         ]
     })
 
+@app.route("/api/presence/stats", methods=["GET"])
+def presence_stats():
+    """ 시간대별 동시 접속 통계 (?hours=24, 최대 90일) """
+    ensure_db()
+    try:
+        hours = int(request.args.get("hours", "24"))
+    except Exception:
+        hours = 24
+    hours = max(1, min(hours, 24 * 90))
+
+    with get_read_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                select hour, max_online, distinct_clients, online_sum, samples
+                from presence_hourly
+                where hour >= date_trunc('hour', now()) - make_interval(hours => %s)
+                order by hour asc
+                """,
+                (hours,),
+            )
+            rows = cur.fetchall()
+
+    return jsonify({
+        "ok": True,
+        "hours": hours,
+        "stats": [
+            {
+                "hour": r[0].isoformat(),
+                "max_online": r[1],
+                "distinct_clients": r[2],
+                "avg_online": round(r[3] / r[4], 2) if r[4] else 0,
+            }
+            for r in rows
+        ],
+    })
+
+# -------------------------------
+# ✅ presence 정리 작업 (백그라운드)
+#   - PRESENCE_SWEEP_SEC(기본 300초)마다: 현재 시간대 통계 갱신 + 오래된 행 삭제
+#   - 워커가 여러 개여도 advisory lock으로 한 번에 하나만 실행
+#   - PRESENCE_RETENTION_DAYS(기본 30일) 지난 presence 행 삭제
+# -------------------------------
+_PRESENCE_SWEEP_LOCK_KEY = 730291
+_PRESENCE_ONLINE_MINUTES = 2  # 프론트 "접속중" 기준과 동일
+_sweeper_started = False
+
+def presence_sweep_once():
+    try:
+        retention_days = int(os.environ.get("PRESENCE_RETENTION_DAYS", "30"))
+    except Exception:
+        retention_days = 30
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("select pg_try_advisory_xact_lock(%s)", (_PRESENCE_SWEEP_LOCK_KEY,))
+            if not cur.fetchone()[0]:
+                return None
+
+            cur.execute(
+                """
+                insert into presence_hourly (hour, max_online, distinct_clients, online_sum, samples)
+                select date_trunc('hour', now()),
+                       count(*) filter (where last_seen >= now() - make_interval(mins => %s)),
+                       count(*) filter (where last_seen >= date_trunc('hour', now())),
+                       count(*) filter (where last_seen >= now() - make_interval(mins => %s)),
+                       1
+                from presence
+                where last_seen >= least(date_trunc('hour', now()), now() - make_interval(mins => %s))
+                on conflict (hour) do update
+                set max_online = greatest(presence_hourly.max_online, excluded.max_online),
+                    distinct_clients = greatest(presence_hourly.distinct_clients, excluded.distinct_clients),
+                    online_sum = presence_hourly.online_sum + excluded.online_sum,
+                    samples = presence_hourly.samples + 1
+                """,
+                (_PRESENCE_ONLINE_MINUTES, _PRESENCE_ONLINE_MINUTES, _PRESENCE_ONLINE_MINUTES),
+            )
+
+            deleted = 0
+            if retention_days > 0:
+                cur.execute(
+                    "delete from presence where last_seen < now() - make_interval(days => %s)",
+                    (retention_days,),
+                )
+                deleted = cur.rowcount
+        conn.commit()
+    return deleted
+
+def _presence_sweep_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            presence_sweep_once()
+        except Exception as e:
+            print("[presence] sweep failed:", e)
+
+def _start_presence_sweeper():
+    global _sweeper_started
+    if _sweeper_started:
+        return
+    _sweeper_started = True
+    try:
+        interval = int(os.environ.get("PRESENCE_SWEEP_SEC", "300"))
+    except Exception:
+        interval = 300
+    if interval <= 0:
+        return
+    threading.Thread(target=_presence_sweep_loop, args=(interval,), daemon=True).start()
+
+# -------------------------------
+# ✅ 만료된 Idempotency-Key 정리 (백그라운드, presence 정리와 별개)
+#   - IDEMPOTENCY_PURGE_SEC(기본 3600초)마다 IDEMPOTENCY_TTL_HOURS 지난 행 삭제 (created_at 인덱스)
+#   - 워커가 여러 개여도 advisory lock으로 한 번에 하나만 실행
+#   - IDEMPOTENCY_PURGE_SEC=0 이면 끔 (PRESENCE_SWEEP_SEC=0 이어도 이건 계속 돎)
+# -------------------------------
+_IDEM_PURGE_LOCK_KEY = 730293
+_idem_purger_started = False
+
+def idempotency_purge_once():
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("select pg_try_advisory_xact_lock(%s)", (_IDEM_PURGE_LOCK_KEY,))
+            if not cur.fetchone()[0]:
+                return None
+            cur.execute(
+                "delete from idempotency_keys where created_at < now() - make_interval(hours => %s)",
+                (_idempotency_ttl_hours(),),
+            )
+            deleted = cur.rowcount
+        conn.commit()
+    return deleted
+
+def _idempotency_purge_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            idempotency_purge_once()
+        except Exception as e:
+            print("[idempotency] purge failed:", e)
+
+def _start_idempotency_purger():
+    global _idem_purger_started
+    if _idem_purger_started:
+        return
+    _idem_purger_started = True
+    try:
+        interval = int(os.environ.get("IDEMPOTENCY_PURGE_SEC", "3600"))
+    except Exception:
+        interval = 3600
+    if interval <= 0:
+        return
+    threading.Thread(target=_idempotency_purge_loop, args=(interval,), daemon=True).start()
+
+
+# ===============================
+# ✅ 일정 알림 스케줄러 (Web Push)
+#   - 워커 하나만 담당: 전용 연결에서 세션 advisory lock(730292)을 잡은 워커
+#     (그 연결이 끊기면 lock이 풀리고 다른 워커가 이어받음)
+#   - 앞으로 REMINDER_HORIZON_MIN(기본 360분) 안에 울릴 알림만 start_time 인덱스로 읽어서
+#     메모리 heap(reminders.ReminderQueue)에 넣고, 다음 알림 시각까지 대기
+#   - 일정 생성/수정/삭제 → 트리거가 NOTIFY calendar_reminders, id
+#     → 담당 워커가 LISTEN으로 받아 그 일정만 다시 읽어 예약 교체 (테이블 폴링 없음)
+#   - 보낸 발생분은 calendar_reminders_sent에 기록 → 중복 전송 방지
+#   REMINDER_MINUTES=10 (일정별 remind_minutes 없을 때), REMINDERS=0 이면 끔
+# ===============================
+_REMINDER_LOCK_KEY = 730292
+_REMINDER_GRACE_SEC = 120  # 재시작 등으로 놓친 알림은 이 안이면 늦게라도 보냄
+_REMINDER_QUEUE = reminders.ReminderQueue()
+_reminder_started = False
+
+def _reminder_default_minutes():
+    try:
+        return int(os.environ.get("REMINDER_MINUTES", "10"))
+    except Exception:
+        return 10
+
+def _reminder_horizon_sec():
+    try:
+        return max(10, int(os.environ.get("REMINDER_HORIZON_MIN", "360"))) * 60
+    except Exception:
+        return 360 * 60
+
+_REMINDER_SELECT = """
+    select id, title, start_time, end_time, all_day, rrule, exdates, remind_minutes
+    from calendar_events
+"""
+
+def _reminder_items(row, now, horizon_end):
+    """ 일정 1행 → [(fire_at epoch, payload)] (now - grace ~ horizon_end 사이에 울릴 것만) """
+    eid, title, st, et, all_day, rrule, exdates, remind = row
+    if st is None or all_day:
+        return []
+    lead = _reminder_default_minutes() if remind is None else remind
+    if lead < 0:
+        return []
+    lead_td = timedelta(minutes=lead)
+    win_start = now - timedelta(seconds=_REMINDER_GRACE_SEC) + lead_td
+    win_end = horizon_end + lead_td
+
+    if rrule:
+        # 캐시 안 씀: 창이 now 기준이라 매번 새 key → 캘린더 조회(expand_cached)용 항목만 밀어냄
+        occs = [o for o, _ in recurrence.expand(
+            recurrence.parse_rrule(rrule), st, (et - st) if (et and et > st) else None,
+            win_start, win_end, recurrence.parse_exdates(exdates), TZ,
+        )]
+    else:
+        occs = [st] if win_start <= st < win_end else []
+
+    items = []
+    for occ in occs:
+        if occ < now:  # 이미 시작한 일정은 알리지 않음
+            continue
+        items.append(((occ - lead_td).timestamp(), {"title": title or "(제목 없음)", "start": occ, "lead": lead}))
+    return items
+
+def _reminder_load_horizon(cur):
+    now = datetime.now(timezone.utc)
+    horizon_end = now + timedelta(seconds=_reminder_horizon_sec())
+    # 단일 일정: start_time 인덱스 범위 / 반복 일정: 부분 인덱스 (시리즈 시작이 과거여도 포함)
+    max_lead = timedelta(minutes=max(_reminder_default_minutes(), 24 * 60))
+    cur.execute(
+        f"""
+        {_REMINDER_SELECT}
+        where start_time >= %s and start_time < %s and coalesce(rrule, '') = ''
+        union all
+        {_REMINDER_SELECT}
+        where coalesce(rrule, '') <> '' and start_time < %s
+        """,
+        (now, horizon_end + max_lead, horizon_end + max_lead),
+    )
+    _REMINDER_QUEUE.clear()
+    for row in cur.fetchall():
+        items = _reminder_items(row, now, horizon_end)
+        if items:
+            _REMINDER_QUEUE.replace(row[0], items)
+    return horizon_end
+
+def _reminder_reload_event(cur, event_id, horizon_end):
+    cur.execute(f"{_REMINDER_SELECT} where id = %s", (event_id,))
+    row = cur.fetchone()
+    if row is None:
+        _REMINDER_QUEUE.cancel(event_id)
+        return
+    _REMINDER_QUEUE.replace(event_id, _reminder_items(row, datetime.now(timezone.utc), horizon_end))
+
+def _reminder_fire(cur, event_id, p):
+    cur.execute(
+        """
+        insert into calendar_reminders_sent (event_id, occurrence) values (%s, %s)
+        on conflict do nothing returning 1
+        """,
+        (event_id, p["start"]),
+    )
+    if cur.fetchone() is None:
+        return False  # 이미 보냄
+    local = p["start"].astimezone(TZ) if TZ else p["start"]
+    when = "지금" if p["lead"] == 0 else f"{p['lead']}분 후"
+    if notify_all:
+        notify_all(
+            title=f"⏰ {p['title']}",
+            body=f"{when} 시작 ({local.strftime('%m/%d %H:%M')})",
+            url="/",
+            extra={"tag": f"event-{event_id}", "type": "reminder"},
+            ttl=max(60, p["lead"] * 60),
+        )
+    return True
+
+def _reminder_run_owned(conn):
+    """ lock을 잡은 연결로 LISTEN + heap 대기. 연결 오류가 나면 예외로 빠져나감 """
+    with conn.cursor() as cur:
+        cur.execute("listen calendar_reminders")
+        horizon_end = _reminder_load_horizon(cur)
+        refill_every = _reminder_horizon_sec() / 2
+        next_refill = time.monotonic() + refill_every
+
+        while True:
+            nxt = _REMINDER_QUEUE.next_at()
+            wait = refill_every if nxt is None else max(0.0, nxt - time.time())
+            wait = min(wait, max(0.0, next_refill - time.monotonic()), 300.0)
+
+            changed = set()
+            for n in conn.notifies(timeout=wait, stop_after=500):
+                if n.payload.isdigit():
+                    changed.add(int(n.payload))
+            for event_id in changed:
+                _reminder_reload_event(cur, event_id, horizon_end)
+
+            if time.monotonic() >= next_refill:
+                horizon_end = _reminder_load_horizon(cur)
+                next_refill = time.monotonic() + refill_every
+                cur.execute("delete from calendar_reminders_sent where occurrence < now() - interval '2 days'")
+
+            for event_id, p in _REMINDER_QUEUE.pop_due(time.time()):
+                try:
+                    _reminder_fire(cur, event_id, p)
+                except psycopg.OperationalError:
+                    raise
+                except Exception as e:
+                    print("[reminder] send failed:", event_id, e)
+
+def _reminder_loop():
+    db_url = (os.environ.get("DATABASE_URL") or "").strip()
+    while True:
+        try:
+            # autocommit: LISTEN/NOTIFY 수신 + 세션 lock 유지용 전용 연결
+            with psycopg.connect(db_url, connect_timeout=10, autocommit=True) as conn:
+                with conn.cursor() as cur:
+                    cur.execute("select pg_try_advisory_lock(%s)", (_REMINDER_LOCK_KEY,))
+                    owned = cur.fetchone()[0]
+                if owned:
+                    _reminder_run_owned(conn)
+        except Exception as e:
+            print("[reminder] scheduler error:", e)
+        finally:
+            _REMINDER_QUEUE.clear()
+        time.sleep(30)  # 다른 워커가 담당 중이거나 연결 실패 → 잠시 후 다시 시도
+
+def _start_reminder_scheduler():
+    global _reminder_started
+    if _reminder_started:
+        return
+    _reminder_started = True
+    if (os.environ.get("REMINDERS") or "1").strip().lower() in ("0", "false", "no", "off"):
+        return
+    if not (os.environ.get("DATABASE_URL") or "").strip():
+        return
+    threading.Thread(target=_reminder_loop, name="reminder-scheduler", daemon=True).start()
+
+
+# ===============================
+# ✅ 관리자 API (ADMIN_TOKEN 설정 시에만 사용 가능)
+# ===============================
+def _require_admin():
+    """ 통과하면 None, 아니면 에러 응답 """
+    token = (os.environ.get("ADMIN_TOKEN") or "").strip()
+    if not token:
+        return jsonify({"ok": False, "error": "admin_disabled"}), 404
+    given = (request.headers.get("X-Admin-Token") or request.args.get("token") or "").strip()
+    if not hmac.compare_digest(given, token):
+        return jsonify({"ok": False, "error": "forbidden"}), 403
+    return None
+
+@app.route("/admin/slow", methods=["GET", "DELETE"])
+def admin_slow():
+    """ 느린 쿼리/요청 링버퍼 (QUERY_TRACE=1일 때 채워짐). DELETE는 비우기 """
+    denied = _require_admin()
+    if denied:
+        return denied
+    if request.method == "DELETE":
+        querytrace.clear()
+        return jsonify({"ok": True})
+    try:
+        limit = int(request.args.get("limit", "0")) or None
+    except Exception:
+        limit = None
+    return jsonify({"ok": True, **querytrace.snapshot(limit)})
+
+@app.route("/admin/breakers", methods=["GET", "DELETE"])
+def admin_breakers():
+    """ 의존성별 서킷 브레이커 상태. DELETE는 전부 초기화(close) """
+    denied = _require_admin()
+    if denied:
+        return denied
+    if request.method == "DELETE":
+        resilience.reset()
+        return jsonify({"ok": True})
+    return jsonify({"ok": True, "breakers": resilience.snapshot()})
+
+@app.route("/admin/replica", methods=["GET"])
+def admin_replica():
+    """ 복제본 라우팅 상태: 마지막 지연/재생 LSN + 복제본/primary로 보낸 횟수 """
+    denied = _require_admin()
+    if denied:
+        return denied
+    return jsonify({"ok": True, **replica.snapshot()})
+
+# -------------------------------
+# ✅ 백업/이전: NDJSON 스트리밍 내보내기 / 가져오기
+#   형식: 테이블마다 {"table": "...", "columns": [...]} 1줄 → 이후 행마다 JSON 배열 1줄
+#   GET  /admin/export?tables=memos,chat_messages&gzip=1
+#        - 이름 있는 서버 측 커서로 itersize씩만 가져와서 바로 흘려보냄 (메모리 일정)
+#   POST /admin/import?truncate=1   (Content-Encoding: gzip 또는 ?gzip=1 지원)
+#        - 요청 본문을 줄 단위로 읽으며 테이블별 COPY ... FROM STDIN
+# -------------------------------
+EXPORT_TABLES = (
+    # chat_attachments는 chat_messages.attachment가 가리키므로 먼저 (파일 본문은 ATTACHMENT_DIR 따로 복사)
+    "memos", "chat_attachments", "chat_messages", "calendar_events", "presence", "push_subscriptions",
+    "chat_read_cursors", "presence_hourly", "exchange_rates",
+)
+_EXPORT_ITERSIZE = 5000
+
+def _table_columns(cur, table):
+    cur.execute(
+        """
+        select column_name from information_schema.columns
+        where table_schema='public' and table_name=%s
+        order by ordinal_position
+        """,
+        (table,),
+    )
+    return [r[0] for r in cur.fetchall()]
+
+def _json_default(v):
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    if isinstance(v, Decimal):
+        return str(v)
+    if isinstance(v, (bytes, memoryview)):
+        return bytes(v).hex()
+    return str(v)
+
+def _selected_tables():
+    raw = (request.args.get("tables") or "").strip()
+    if not raw:
+        return list(EXPORT_TABLES), None
+    tables = [t.strip() for t in raw.split(",") if t.strip()]
+    bad = [t for t in tables if t not in EXPORT_TABLES]
+    return tables, bad
+
+def _export_lines(tables):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            columns = {t: _table_columns(cur, t) for t in tables}
+        for t in tables:
+            cols = columns[t]
+            if not cols:
+                continue
+            yield (json.dumps({"table": t, "columns": cols}, ensure_ascii=False) + "\n").encode("utf-8")
+            col_sql = ", ".join(f'"{c}"' for c in cols)
+            order = " order by id" if "id" in cols else ""
+            with conn.cursor(name=f"export_{t}") as cur:
+                cur.itersize = _EXPORT_ITERSIZE
+                cur.execute(f'select {col_sql} from "{t}"{order}')
+                buf = []
+                for row in cur:
+                    buf.append(json.dumps(row, ensure_ascii=False, default=_json_default))
+                    if len(buf) >= 1000:
+                        yield ("\n".join(buf) + "\n").encode("utf-8")
+                        buf = []
+                if buf:
+                    yield ("\n".join(buf) + "\n").encode("utf-8")
+
+def _gzip_stream(chunks):
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 → gzip 헤더
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+@app.route("/admin/export", methods=["GET"])
+@resilience.no_deadline
+def admin_export():
+    denied = _require_admin()
+    if denied:
+        return denied
+    ensure_db()
+    tables, bad = _selected_tables()
+    if bad:
+        return jsonify({"ok": False, "error": "unknown_table", "tables": bad}), 400
+
+    use_gzip = request.args.get("gzip") in ("1", "true", "yes")
+    body = _export_lines(tables)
+    stamp = _now().strftime("%Y%m%d-%H%M%S")
+    filename = f"export-{stamp}.ndjson" + (".gz" if use_gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', "X-Accel-Buffering": "no"}
+    if use_gzip:
+        body = _gzip_stream(body)
+        return Response(stream_with_context(body), mimetype="application/gzip", headers=headers)
+    return Response(stream_with_context(body), mimetype="application/x-ndjson", headers=headers)
+
+def _import_sections(stream):
+    """
+    NDJSON → (header, rows) 순서대로. rows는 다음 header 전까지의 행 제너레이터
+    (호출한 쪽이 rows를 끝까지 소비해야 다음 section으로 넘어감)
+    """
+    items = (json.loads(line) for line in stream if line.strip())
+    nxt = {"header": next(items, None)}
+
+    def rows():
+        for x in items:
+            if isinstance(x, dict):
+                nxt["header"] = x
+                return
+            yield x
+
+    while nxt["header"] is not None:
+        header = nxt["header"]
+        if not isinstance(header, dict):
+            raise ValueError("row before table header")
+        nxt["header"] = None
+        yield header, rows()
+
+@app.route("/admin/import", methods=["POST"])
+@resilience.no_deadline
+def admin_import():
+    denied = _require_admin()
+    if denied:
+        return denied
+    ensure_db()
+    truncate = request.args.get("truncate") in ("1", "true", "yes")
+    stream = request.stream
+    if request.headers.get("Content-Encoding") == "gzip" or request.args.get("gzip") in ("1", "true", "yes"):
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+
+    counts = {}
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            try:
+                for header, rows in _import_sections(stream):
+                    table = header.get("table")
+                    if table not in EXPORT_TABLES:
+                        raise ValueError(f"unknown_table: {table}")
+                    cols = header.get("columns") or []
+                    missing = [c for c in cols if c not in set(_table_columns(cur, table))]
+                    if missing:
+                        raise ValueError(f"unknown_columns: {table}.{','.join(missing)}")
+                    if truncate and table not in counts:
+                        cur.execute(f'truncate table "{table}"')
+
+                    n = 0
+                    col_sql = ", ".join(f'"{c}"' for c in cols)
+                    with cur.copy(f'copy "{table}" ({col_sql}) from stdin') as copy:
+                        for row in rows:
+                            copy.write_row(row)
+                            n += 1
+                    counts[table] = counts.get(table, 0) + n
+
+                    # id를 그대로 넣었으므로 시퀀스를 max(id) 다음으로 맞춤
+                    if "id" in cols:
+                        cur.execute("select pg_get_serial_sequence(%s, 'id')", (table,))
+                        seq = cur.fetchone()[0]
+                        if seq:
+                            cur.execute(f'select setval(%s, coalesce((select max(id) from "{table}"), 0) + 1, false)', (seq,))
+            except Exception as e:
+                conn.rollback()
+                return jsonify({"ok": False, "error": str(e)[:300], "counts": counts}), 400
+        conn.commit()
+
+    if "memos" in counts:
+        _memo_index_invalidate()
+    return jsonify({"ok": True, "counts": counts})
+
 
 # ===============================
 # ✅ PWA (manifest / service worker)
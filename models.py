@@ -1,8 +1,18 @@
 from datetime import datetime
 from db import db
 
+def _iso(dt):
+    return dt.isoformat() + "Z" if dt else None
+
+# ✅ 목록 API는 ORM 객체를 만들지 않고 컬럼 튜플만 조회 → row_to_dict()로 바로 JSON
+#    (to_dict()와 같은 모양, 컬럼 순서는 list_columns() 순서)
+
 class ChatMessage(db.Model):
     __tablename__ = "chat_messages"
+    # room 필터 + id 정렬/커서 (keyword_manager_web.py와 같은 인덱스 이름 → 중복 생성 안 함)
+    __table_args__ = (
+        db.Index("chat_messages_room_id_idx", "room", "id"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     room = db.Column(db.String(64), default="default", nullable=False)
     sender = db.Column(db.String(64), default="user", nullable=False)  # "user" / "bot" 등
@@ -18,8 +28,20 @@ class ChatMessage(db.Model):
             "created_at": self.created_at.isoformat() + "Z",
         }
 
+    @classmethod
+    def list_columns(cls):
+        return (cls.id, cls.room, cls.sender, cls.message, cls.created_at)
+
+    @staticmethod
+    def row_to_dict(r):
+        return {"id": r[0], "room": r[1], "sender": r[2], "message": r[3], "created_at": _iso(r[4])}
+
 class Memo(db.Model):
     __tablename__ = "memos"
+    # 목록 정렬(pinned desc, updated_at desc)을 인덱스 순서 그대로 읽기
+    __table_args__ = (
+        db.Index("ix_memos_pinned_updated_at", db.desc("pinned"), db.desc("updated_at")),
+    )
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
     pinned = db.Column(db.Boolean, default=False, nullable=False)
@@ -35,8 +57,19 @@ class Memo(db.Model):
             "created_at": self.created_at.isoformat() + "Z",
         }
 
+    @classmethod
+    def list_columns(cls):
+        return (cls.id, cls.content, cls.pinned, cls.updated_at, cls.created_at)
+
+    @staticmethod
+    def row_to_dict(r):
+        return {"id": r[0], "content": r[1], "pinned": r[2], "updated_at": _iso(r[3]), "created_at": _iso(r[4])}
+
 class CalendarEvent(db.Model):
     __tablename__ = "calendar_events"
+    __table_args__ = (
+        db.Index("ix_calendar_events_start_at", "start_at"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     note = db.Column(db.Text, default="", nullable=False)
@@ -56,3 +89,14 @@ class CalendarEvent(db.Model):
             "end_at": self.end_at.isoformat() + "Z" if self.end_at else None,
             "created_at": self.created_at.isoformat() + "Z",
         }
+
+    @classmethod
+    def list_columns(cls):
+        return (cls.id, cls.title, cls.note, cls.start_at, cls.end_at, cls.created_at)
+
+    @staticmethod
+    def row_to_dict(r):
+        return {
+            "id": r[0], "title": r[1], "note": r[2],
+            "start_at": _iso(r[3]), "end_at": _iso(r[4]), "created_at": _iso(r[5]),
+        }
@@ -1,22 +1,47 @@
 # push_routes.py
 import os
 import json
-import traceback
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse
 from flask import Blueprint, request, jsonify
 
-import psycopg
-from pywebpush import webpush
+import requests
+import querytrace
+import replica
+import resilience
+from requests.adapters import HTTPAdapter
+from py_vapid import Vapid
+from pywebpush import WebPusher, WebPushException
 
 push_bp = Blueprint("push", __name__, url_prefix="/api/push")
 
 # ✅ 구독 정보는 DB에 저장(서버 재시작에도 유지). 전송 시 메모리 캐시를 사용.
 _SUBS = {}  # endpoint -> subscription dict (cache)
+_SUB_CLIENTS = {}  # endpoint -> client_id (읽음 위치 확인용, 없을 수 있음)
+
+# ✅ 전송 최적화
+#   - push 서비스 origin(FCM/APNs/Mozilla...)별 keep-alive 세션 재사용 → 매번 TLS 핸드셰이크 X
+#   - VAPID Authorization 헤더를 audience(origin)별로 캐시 → 만료 10분 전까지 ECDSA 서명 재사용
+#   - 구독별 키 디코딩(WebPusher)도 endpoint별 캐시, 메시지는 한 번만 bytes 인코딩
+PUSH_TIMEOUT = 10
+_VAPID_EXP_SEC = 12 * 60 * 60
+_VAPID_REFRESH_SEC = 10 * 60
+
+_PUSH_LOCK = threading.Lock()
+_SESSIONS = {}       # origin -> requests.Session
+_PUSHERS = {}        # endpoint -> WebPusher
+_VAPID_KEY = {"raw": None, "obj": None}
+_VAPID_HEADERS = {}  # (aud, sub) -> (exp, headers)
 
 def _get_conn():
     db_url = (os.environ.get("DATABASE_URL") or "").strip()
     if not db_url:
         raise RuntimeError("DATABASE_URL not set")
-    return psycopg.connect(db_url, connect_timeout=10)
+    return resilience.pg_connect(
+        db_url, connect_timeout=10, connection_class=replica.TrackingConnection, **querytrace.connect_kwargs()
+    )
 
 def _ensure_push_table():
     # keyword_manager_web.ensure_db()에서 만들지만, push 단독 호출 대비로 여기서도 보정
@@ -32,22 +57,24 @@ def _ensure_push_table():
                     )
                     """
                 )
+                cur.execute("alter table push_subscriptions add column if not exists client_id text")
     except Exception:
         pass
 
-def _save_sub_to_db(sub: dict):
+def _save_sub_to_db(sub: dict, client_id: str | None = None):
     _ensure_push_table()
     try:
         with _get_conn() as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     """
-                    insert into push_subscriptions(endpoint, subscription_json)
-                    values(%s, %s)
+                    insert into push_subscriptions(endpoint, subscription_json, client_id)
+                    values(%s, %s, %s)
                     on conflict (endpoint) do update
-                    set subscription_json = excluded.subscription_json
+                    set subscription_json = excluded.subscription_json,
+                        client_id = coalesce(excluded.client_id, push_subscriptions.client_id)
                     """,
-                    (sub.get("endpoint"), json.dumps(sub, ensure_ascii=False)),
+                    (sub.get("endpoint"), json.dumps(sub, ensure_ascii=False), client_id),
                 )
     except Exception:
         pass
@@ -58,13 +85,15 @@ def _load_subs_from_db():
     try:
         with _get_conn() as conn:
             with conn.cursor() as cur:
-                cur.execute("select endpoint, subscription_json from push_subscriptions")
+                cur.execute("select endpoint, subscription_json, client_id from push_subscriptions")
                 rows = cur.fetchall()
-        for endpoint, sub_json in rows:
+        for endpoint, sub_json, client_id in rows:
             try:
                 subs[endpoint] = json.loads(sub_json)
             except Exception:
                 continue
+            if client_id:
+                _SUB_CLIENTS[endpoint] = client_id
     except Exception:
         return {}
     return subs
@@ -109,12 +138,82 @@ def subscribe():
     if err:
         return jsonify({"ok": False, "error": err, "received_keys": list(payload.keys())}), 400
 
+    client_id = (payload.get("client_id") or "").strip() or None
     _SUBS[sub["endpoint"]] = sub
-    _save_sub_to_db(sub)
+    _PUSHERS.pop(sub["endpoint"], None)  # 키가 바뀌었을 수 있음
+    if client_id:
+        _SUB_CLIENTS[sub["endpoint"]] = client_id
+    _save_sub_to_db(sub, client_id)
 
     return jsonify({"ok": True, "saved": len(_SUBS), "endpoint": sub["endpoint"]})
 
-def _send_payload_to_subs(payload: dict):
+def _caught_up_clients(room: str, msg_id: int) -> set:
+    """ room에서 msg_id까지 이미 읽은 client_id 목록 ((room, last_read_id) 인덱스만 읽음) """
+    try:
+        with _get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "select client_id from chat_read_cursors where room=%s and last_read_id >= %s",
+                    (room, msg_id),
+                )
+                return {r[0] for r in cur.fetchall()}
+    except Exception:
+        return set()
+
+def _origin(endpoint: str) -> str:
+    u = urlparse(endpoint)
+    return f"{u.scheme}://{u.netloc}"
+
+def _session_for(origin: str) -> requests.Session:
+    with _PUSH_LOCK:
+        s = _SESSIONS.get(origin)
+        if s is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            _SESSIONS[origin] = s
+        return s
+
+def _pusher_for(sub: dict) -> WebPusher:
+    endpoint = sub["endpoint"]
+    p = _PUSHERS.get(endpoint)
+    if p is None:
+        p = WebPusher(sub, requests_session=_session_for(_origin(endpoint)))
+        _PUSHERS[endpoint] = p
+    return p
+
+def _vapid_auth(aud: str, priv: str, vapid_sub: str) -> dict:
+    now = time.time()
+    key = (aud, vapid_sub)
+    with _PUSH_LOCK:
+        if _VAPID_KEY["raw"] != priv:
+            _VAPID_KEY["raw"] = priv
+            _VAPID_KEY["obj"] = Vapid.from_string(private_key=priv)
+            _VAPID_HEADERS.clear()
+        hit = _VAPID_HEADERS.get(key)
+        if hit and hit[0] - _VAPID_REFRESH_SEC > now:
+            return dict(hit[1])
+        vv = _VAPID_KEY["obj"]
+
+    exp = int(now) + _VAPID_EXP_SEC
+    headers = vv.sign({"sub": vapid_sub, "aud": aud, "exp": exp})
+    with _PUSH_LOCK:
+        _VAPID_HEADERS[key] = (exp, headers)
+    return dict(headers)
+
+def _push_one(sub: dict, data: bytes, priv: str, vapid_sub: str, headers: dict | None = None, ttl: int = 0,
+              timeout: float = PUSH_TIMEOUT):
+    """ pywebpush.webpush()와 같은 동작, 단 세션/VAPID/키 디코딩을 재사용 """
+    h = dict(headers or {})
+    h.update(_vapid_auth(_origin(sub["endpoint"]), priv, vapid_sub))
+    resp = _pusher_for(sub).send(data, headers=h, ttl=ttl, content_encoding="aes128gcm", timeout=timeout)
+    if resp.status_code > 202:
+        raise WebPushException(f"Push failed: {resp.status_code} {resp.reason}", response=resp)
+    return resp
+
+def _send_payload_to_subs(payload: dict, skip_clients: set | None = None,
+                          headers: dict | None = None, ttl: int = 0):
     pub = (os.environ.get("VAPID_PUBLIC_KEY") or "").strip()
     priv = (os.environ.get("VAPID_PRIVATE_KEY") or "").strip()
     if not pub or not priv:
@@ -128,26 +227,50 @@ def _send_payload_to_subs(payload: dict):
     if not _SUBS:
         _SUBS.update(_load_subs_from_db())
 
-    message = json.dumps(payload, ensure_ascii=False)
+    message = json.dumps(payload, ensure_ascii=False).encode("utf-8")
 
     sent = 0
     failed = 0
+    skipped = 0
     errors = []
-    for endpoint, sub in list(_SUBS.items()):
+    items = list(_SUBS.items())
+    for i, (endpoint, sub) in enumerate(items):
+        if skip_clients and _SUB_CLIENTS.get(endpoint) in skip_clients:
+            skipped += 1
+            continue
+        # ✅ push 서비스(origin)별 브레이커: 한 곳이 멈춰도 구독마다 timeout까지 기다리지 않음
+        br = resilience.breaker("push:" + _origin(endpoint))
+        try:
+            timeout = resilience.timeout(PUSH_TIMEOUT, "push")
+            br.before()
+        except resilience.DeadlineExceeded as e:
+            failed += len(items) - i  # 남은 구독은 보내지 못함
+            errors.append(str(e))
+            break
+        except resilience.CircuitOpen as e:
+            failed += 1
+            if len(errors) < 5:
+                errors.append(str(e))
+            continue
         try:
-            webpush(
-                subscription_info=sub,
-                data=message,
-                vapid_private_key=priv,
-                vapid_claims={"sub": vapid_sub},
-            )
+            _push_one(sub, message, priv, vapid_sub, headers=headers, ttl=ttl, timeout=timeout)
+            br.success()
             sent += 1
         except Exception as e:
+            # 410/404 등 구독 문제는 서비스 장애가 아님 → 429/5xx/연결 실패만 셈
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            if status is None or status == 429 or status >= 500:
+                br.failure()
+            else:
+                br.success()
             failed += 1
             if len(errors) < 5:
                 errors.append(str(e)[:300])
+        except BaseException:
+            br.release()
+            raise
 
-    return {"ok": True, "saved": len(_SUBS), "sent": sent, "failed": failed, "errors": errors}, 200
+    return {"ok": True, "saved": len(_SUBS), "sent": sent, "failed": failed, "skipped": skipped, "errors": errors}, 200
 
 @push_bp.route("/send-test", methods=["POST"])
 def send_test():
@@ -157,12 +280,109 @@ def send_test():
     url = payload.get("url") or "/"
     return _send_payload_to_subs({"title": title, "body": body, "url": url, "type": "test"})
 
-def notify_all(title: str, body: str, url: str = "/", extra: dict | None = None):
+def notify_all(title: str, body: str, url: str = "/", extra: dict | None = None,
+               room: str | None = None, msg_id: int | None = None,
+               headers: dict | None = None, ttl: int = 0):
     payload = {"title": title, "body": body, "url": url, "type": "notify"}
     if extra and isinstance(extra, dict):
         payload.update(extra)
     # Flask route가 아니라도 전송 시도 (실패해도 앱 기능엔 영향 없게 조용히 처리)
     try:
-        return _send_payload_to_subs(payload)[0]
+        # ✅ 채팅 알림: 이미 msg_id까지 읽은 client(보낸 본인 포함)는 건너뜀
+        skip = _caught_up_clients(room, msg_id) if (room and msg_id) else None
+        return _send_payload_to_subs(payload, skip_clients=skip, headers=headers, ttl=ttl)[0]
     except Exception:
         return None
+
+# ===============================
+# ✅ 채팅 푸시 묶어 보내기 (room별)
+#   - 메시지가 연달아 오면 PUSH_COALESCE_SEC(기본 3초) 동안 모았다가 1번만 전송
+#     (계속 이어지면 최대 PUSH_COALESCE_MAX_SEC(기본 10초)마다 1번)
+#   - Topic 헤더: push 서비스가 아직 전달 안 된 같은 room 알림을 새 알림으로 교체
+#   - TTL 헤더: 오래 꺼진 기기에 지난 알림이 쌓이지 않게
+# ===============================
+PUSH_CHAT_TTL = 60 * 60
+
+_COALESCE_LOCK = threading.Lock()
+_PENDING = {}  # room -> {"count", "senders", "last_message", "last_id", "url", "first_at", "timer"}
+_COALESCE_STATS = {"messages": 0, "pushes": 0}
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except Exception:
+        return default
+
+def _room_topic(room: str) -> str:
+    # Topic: 최대 32자, URL-safe base64 문자만 허용
+    return "chat" + hashlib.sha1(room.encode("utf-8")).hexdigest()[:24]
+
+def _summarize(p: dict) -> tuple[str, str]:
+    senders = p["senders"]
+    preview = p["last_message"][:120] + ("…" if len(p["last_message"]) > 120 else "")
+    if p["count"] == 1:
+        return f"새 메시지: {senders[0]}", preview
+    who = senders[0] if len(senders) == 1 else f"{senders[-1]} 외 {len(senders) - 1}명"
+    return f"새 메시지 {p['count']}개: {who}", preview
+
+def _flush_room(room: str):
+    with _COALESCE_LOCK:
+        p = _PENDING.pop(room, None)
+    if not p:
+        return None
+    title, body = _summarize(p)
+    _COALESCE_STATS["pushes"] += 1
+    return notify_all(
+        title=title,
+        body=body,
+        url=p["url"],
+        extra={"tag": f"chat-{room}", "count": p["count"]},
+        room=room,
+        msg_id=p["last_id"],
+        headers={"Topic": _room_topic(room)},
+        ttl=PUSH_CHAT_TTL,
+    )
+
+def notify_chat(room: str, sender: str, message: str, msg_id: int, url: str = "/"):
+    """
+    send_chat용: room별로 잠깐 모아서 요약 알림 1건 전송 (응답을 막지 않음)
+    """
+    window = _env_float("PUSH_COALESCE_SEC", 3.0)
+    max_wait = _env_float("PUSH_COALESCE_MAX_SEC", 10.0)
+
+    with _COALESCE_LOCK:
+        _COALESCE_STATS["messages"] += 1
+        p = _PENDING.get(room)
+        if p is None:
+            p = {"count": 0, "senders": [], "last_message": "", "last_id": 0,
+                 "url": url, "first_at": time.monotonic(), "timer": None}
+            _PENDING[room] = p
+        p["count"] += 1
+        if sender in p["senders"]:
+            p["senders"].remove(sender)
+        p["senders"].append(sender)  # 마지막에 보낸 사람이 뒤로
+        p["last_message"] = message
+        p["last_id"] = max(p["last_id"], msg_id)
+
+        if window <= 0:
+            immediate = True
+        else:
+            immediate = False
+            delay = min(window, max(0.0, p["first_at"] + max_wait - time.monotonic()))
+            if p["timer"]:
+                p["timer"].cancel()
+            t = threading.Timer(delay, _flush_room, args=(room,))
+            t.daemon = True
+            p["timer"] = t
+            t.start()
+
+    if immediate:
+        return _flush_room(room)
+    return {"ok": True, "queued": True}
+
+@push_bp.route("/stats", methods=["GET"])
+def push_stats():
+    with _COALESCE_LOCK:
+        pending = {room: p["count"] for room, p in _PENDING.items()}
+    return jsonify({"ok": True, "pending": pending, **_COALESCE_STATS})
+
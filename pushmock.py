@@ -0,0 +1,168 @@
+# pushmock.py
+# ✅ 로컬 가짜 Web Push 서비스 (벤치마크/부하 확인용, 운영 코드에서 import 안 함)
+#   - 실제 브라우저/FCM 없이 _send_payload_to_subs() fan-out 동작 확인
+#   - 응답 지연(latency/jitter), 일시 오류(429/500), 만료 구독(410 Gone) 흉내
+#   - 만료 여부는 endpoint 번호로 고정 → 같은 구독은 매번 같은 결과
+#
+#   with MockPushService(latency_ms=50, gone_rate=0.05) as mock:
+#       subs = fake_subscriptions(mock.base_url, 1000)
+#       ...
+#       print(mock.stats())
+import base64
+import hashlib
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockPushService:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, gone_rate=0.0, seed=None):
+        self.latency_ms = float(latency_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.error_rate = float(error_rate)
+        self.gone_rate = float(gone_rate)
+        self._rand = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {"received": 0, "ok": 0, "gone": 0, "errors": 0, "bytes": 0}
+        self._srv = None
+        self.base_url = None
+
+    # -------------------------------
+    # 응답 결정
+    # -------------------------------
+    def is_gone(self, path):
+        # 해시로 고정 비율 → 재시도해도 같은 endpoint는 계속 410
+        if self.gone_rate <= 0:
+            return False
+        h = int(hashlib.sha1(path.encode("utf-8")).hexdigest()[:8], 16)
+        return (h % 10000) < self.gone_rate * 10000
+
+    def _decide(self, path):
+        with self._lock:
+            r = self._rand.random()
+            delay = self.latency_ms + (self._rand.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        if self.is_gone(path):
+            return 410, delay
+        if r < self.error_rate:
+            return (429 if r < self.error_rate / 2 else 500), delay
+        return 201, delay
+
+    def _count(self, status, nbytes):
+        with self._lock:
+            self._stats["received"] += 1
+            self._stats["bytes"] += nbytes
+            if status == 201:
+                self._stats["ok"] += 1
+            elif status == 410:
+                self._stats["gone"] += 1
+            else:
+                self._stats["errors"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            for k in self._stats:
+                self._stats[k] = 0
+
+    # -------------------------------
+    # 서버
+    # -------------------------------
+    def start(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive (실제 push 서비스와 같이)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                status, delay_ms = mock._decide(self.path)
+                if delay_ms > 0:
+                    time.sleep(delay_ms / 1000)
+                mock._count(status, len(body))
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *a):
+                pass
+
+        self._srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._srv.daemon_threads = True
+        threading.Thread(target=self._srv.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self._srv.server_address[1]}"
+        return self
+
+    def stop(self):
+        if self._srv is not None:
+            self._srv.shutdown()
+            self._srv.server_close()
+            self._srv = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ===============================
+# ✅ 가짜 구독 / VAPID 키
+# ===============================
+def _b64(b):
+    return base64.urlsafe_b64encode(b).rstrip(b"=").decode()
+
+
+def fake_subscriptions(base_url, n):
+    """
+    push_subscriptions.subscription_json 형태의 구독 n개.
+    p256dh는 실제 P-256 공개키여야 암호화가 되므로 하나 만들어 공유 (생성 비용 절약)
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    pub = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint)
+    p256dh = _b64(pub)
+    return [
+        {"endpoint": f"{base_url}/push/{i}", "keys": {"p256dh": p256dh, "auth": _b64(os.urandom(16))}}
+        for i in range(n)
+    ]
+
+
+def fake_vapid_keys():
+    """ (private, public) — VAPID_PRIVATE_KEY / VAPID_PUBLIC_KEY 환경변수 형식 """
+    from cryptography.hazmat.primitives import serialization
+    from py_vapid import Vapid
+
+    v = Vapid()
+    v.generate_keys()
+    raw = v.private_key.private_numbers().private_value.to_bytes(32, "big")
+    pub = v.public_key.public_bytes(serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint)
+    return _b64(raw), _b64(pub)
+
+
+def seed_push_subscriptions(conn, subs, client_prefix="bench"):
+    """ 가짜 구독을 push_subscriptions에 COPY로 넣음 (같은 endpoint는 먼저 지움) """
+    import json
+
+    with conn.cursor() as cur:
+        cur.execute("delete from push_subscriptions where endpoint = any(%s)", ([s["endpoint"] for s in subs],))
+        with cur.copy("copy push_subscriptions (endpoint, subscription_json, client_id) from stdin") as copy:
+            for i, s in enumerate(subs):
+                copy.write_row((s["endpoint"], json.dumps(s), f"{client_prefix}-{i}"))
+    conn.commit()
+
+
+def delete_push_subscriptions(conn, base_url):
+    with conn.cursor() as cur:
+        cur.execute("delete from push_subscriptions where endpoint like %s", (base_url + "/%",))
+        n = cur.rowcount
+    conn.commit()
+    return n
@@ -0,0 +1,200 @@
+# querytrace.py
+# ✅ 느린 쿼리 / 느린 요청 기록 (옵션, 기본 꺼짐)
+#
+#   QUERY_TRACE=1                    켜기
+#   QUERY_TRACE_SLOW_MS=50           이 시간 이상 걸린 쿼리만 기록
+#   QUERY_TRACE_REQUEST_SLOW_MS=300  이 시간 이상 걸린 요청만 기록
+#   QUERY_TRACE_EXPLAIN_SAMPLE=0.1   느린 쿼리 중 EXPLAIN (ANALYZE, BUFFERS)를 같이 떠둘 비율
+#   QUERY_TRACE_MAX=200              링버퍼 크기(쿼리/요청 각각)
+#
+# 사용: psycopg.connect(url, **querytrace.connect_kwargs())
+#       querytrace.init_app(app)   → 요청 단위 집계
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import psycopg
+from flask import g, has_request_context, request
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except Exception:
+        return default
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except Exception:
+        return default
+
+
+ENABLED = (os.environ.get("QUERY_TRACE") or "").strip().lower() in ("1", "true", "yes", "on")
+SLOW_MS = _env_float("QUERY_TRACE_SLOW_MS", 50)
+REQUEST_SLOW_MS = _env_float("QUERY_TRACE_REQUEST_SLOW_MS", 300)
+EXPLAIN_SAMPLE = _env_float("QUERY_TRACE_EXPLAIN_SAMPLE", 0.1)
+MAX_ENTRIES = _env_int("QUERY_TRACE_MAX", 200)
+
+_LOCK = threading.Lock()
+_SLOW_QUERIES = deque(maxlen=MAX_ENTRIES)
+_SLOW_REQUESTS = deque(maxlen=MAX_ENTRIES)
+
+
+def _route():
+    if has_request_context():
+        return f"{request.method} {request.endpoint or request.path}"
+    return f"thread:{threading.current_thread().name}"
+
+
+def _shape(params):
+    # 값은 남기지 않고 타입/개수만 (개인정보/메시지 내용 노출 방지)
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: type(v).__name__ for k, v in params.items()}
+    try:
+        return [type(v).__name__ for v in params]
+    except TypeError:
+        return type(params).__name__
+
+
+def _sql_text(query):
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    if not isinstance(query, str):
+        return None
+    return " ".join(query.split())
+
+
+def _explain(conn, query, params):
+    sql = _sql_text(query)
+    if not sql:
+        return None
+    # ANALYZE는 쿼리를 실제로 다시 실행하므로 조회(select/with)만. 쓰기 쿼리는 계획만.
+    head = sql[:10].lower()
+    opts = "analyze, buffers" if head.startswith(("select", "with")) else "costs"
+    plan = None
+    try:
+        # savepoint 안에서 실행 후 되돌림 → 실패해도 원래 트랜잭션에 영향 없음
+        with conn.transaction():
+            with psycopg.ClientCursor(conn) as cur:  # 추적 안 되는 커서, 파라미터는 클라이언트에서 치환
+                cur.execute(f"explain ({opts}) {sql}", params)
+                plan = "\n".join(r[0] for r in cur.fetchall())
+            raise psycopg.Rollback()
+    except Exception as e:
+        return f"explain failed: {e}"
+    return plan
+
+
+def _record(cur, query, params, dt_ms, many=0, failed=False):
+    if has_request_context():
+        g._qt_count = getattr(g, "_qt_count", 0) + 1
+        g._qt_ms = getattr(g, "_qt_ms", 0.0) + dt_ms
+    if dt_ms < SLOW_MS:
+        return
+
+    entry = {
+        "ts": time.time(),
+        "route": _route(),
+        "ms": round(dt_ms, 2),
+        "sql": (_sql_text(query) or repr(query))[:1000],
+        "params": _shape(params),
+        "rows": cur.rowcount,
+    }
+    if many:
+        entry["executemany"] = many
+    if failed:
+        entry["failed"] = True
+    elif not many and EXPLAIN_SAMPLE > 0 and random.random() < EXPLAIN_SAMPLE:
+        entry["plan"] = _explain(cur.connection, query, params)
+
+    with _LOCK:
+        _SLOW_QUERIES.append(entry)
+
+
+class TracingCursor(psycopg.Cursor):
+    def execute(self, query, params=None, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            out = super().execute(query, params, **kwargs)
+        except Exception:
+            _record(self, query, params, (time.perf_counter() - t0) * 1000, failed=True)
+            raise
+        _record(self, query, params, (time.perf_counter() - t0) * 1000)
+        return out
+
+    def executemany(self, query, params_seq, **kwargs):
+        params_seq = list(params_seq)
+        first = params_seq[0] if params_seq else None
+        t0 = time.perf_counter()
+        try:
+            out = super().executemany(query, params_seq, **kwargs)
+        except Exception:
+            _record(self, query, first, (time.perf_counter() - t0) * 1000, many=len(params_seq), failed=True)
+            raise
+        _record(self, query, first, (time.perf_counter() - t0) * 1000, many=len(params_seq))
+        return out
+
+
+def connect_kwargs():
+    """ psycopg.connect()에 넘길 추가 인자 (꺼져 있으면 빈 dict → 오버헤드 없음) """
+    if not ENABLED:
+        return {}
+    return {"cursor_factory": TracingCursor}
+
+
+def init_app(app):
+    if not ENABLED:
+        return
+
+    @app.before_request
+    def _qt_start():
+        g._qt_t0 = time.perf_counter()
+        g._qt_count = 0
+        g._qt_ms = 0.0
+
+    @app.after_request
+    def _qt_finish(response):
+        t0 = getattr(g, "_qt_t0", None)
+        if t0 is None:
+            return response
+        dt_ms = (time.perf_counter() - t0) * 1000
+        if dt_ms >= REQUEST_SLOW_MS:
+            with _LOCK:
+                _SLOW_REQUESTS.append({
+                    "ts": time.time(),
+                    "route": _route(),
+                    "path": request.path,
+                    "status": response.status_code,
+                    "ms": round(dt_ms, 2),
+                    "queries": getattr(g, "_qt_count", 0),
+                    "db_ms": round(getattr(g, "_qt_ms", 0.0), 2),
+                })
+        return response
+
+
+def snapshot(limit=None):
+    with _LOCK:
+        queries = list(_SLOW_QUERIES)
+        requests_ = list(_SLOW_REQUESTS)
+    if limit:
+        queries = queries[-limit:]
+        requests_ = requests_[-limit:]
+    return {
+        "enabled": ENABLED,
+        "slow_ms": SLOW_MS,
+        "request_slow_ms": REQUEST_SLOW_MS,
+        "explain_sample": EXPLAIN_SAMPLE,
+        "queries": queries[::-1],   # 최신이 위로
+        "requests": requests_[::-1],
+    }
+
+
+def clear():
+    with _LOCK:
+        _SLOW_QUERIES.clear()
+        _SLOW_REQUESTS.clear()
@@ -0,0 +1,241 @@
+# recurrence.py
+# ✅ 캘린더 반복 일정(RRULE) 전개
+#    - DB에는 시리즈 1행(rrule + exdates)만 저장
+#    - 요청 기간(window) 안의 발생분만 서버에서 전개
+#    - 시리즈별 전개 결과는 크기 제한 LRU 캐시에 보관
+import threading
+import calendar as _calendar
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+FREQS = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+# 한 시리즈가 한 번에 만들 수 있는 최대 발생 수 (잘못된 rrule 방어)
+MAX_OCCURRENCES = 2000
+
+_CACHE_MAX = 4096
+_CACHE = OrderedDict()  # (series_id, signature, window) -> [(start, end), ...]
+_CACHE_LOCK = threading.Lock()
+
+
+def _parse_until(s: str):
+    s = (s or "").strip().upper()
+    if not s:
+        return None
+    utc = s.endswith("Z")
+    s = s.rstrip("Z")
+    try:
+        if "T" in s:
+            dt = datetime.strptime(s, "%Y%m%dT%H%M%S")
+        else:
+            dt = datetime.strptime(s, "%Y%m%d").replace(hour=23, minute=59, second=59)
+    except Exception:
+        return None
+    if utc:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def parse_rrule(text):
+    """
+    "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=10" 형태 → dict
+    지원: FREQ, INTERVAL, COUNT, UNTIL, BYDAY(WEEKLY)
+    잘못된 값이면 None
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+    if text.upper().startswith("RRULE:"):
+        text = text[6:]
+
+    parts = {}
+    for p in text.split(";"):
+        if "=" not in p:
+            continue
+        k, v = p.split("=", 1)
+        parts[k.strip().upper()] = v.strip()
+
+    freq = parts.get("FREQ", "").upper()
+    if freq not in FREQS:
+        return None
+
+    rule = {"freq": freq, "interval": 1, "count": None, "until": None, "byday": None}
+    try:
+        rule["interval"] = max(1, int(parts.get("INTERVAL", "1")))
+        if parts.get("COUNT"):
+            rule["count"] = max(1, int(parts["COUNT"]))
+    except Exception:
+        return None
+    if parts.get("UNTIL"):
+        rule["until"] = _parse_until(parts["UNTIL"])
+        if rule["until"] is None:
+            return None
+    if parts.get("BYDAY") and freq == "WEEKLY":
+        days = []
+        for d in parts["BYDAY"].upper().split(","):
+            d = d.strip()[-2:]
+            if d in WEEKDAYS:
+                days.append(WEEKDAYS[d])
+        rule["byday"] = sorted(set(days)) or None
+    return rule
+
+
+def parse_exdates(text):
+    """ "2025-12-24,2025-12-31" → {"2025-12-24", "2025-12-31"} """
+    out = set()
+    for s in (text or "").split(","):
+        s = s.strip()[:10]
+        if len(s) == 10:
+            out.add(s)
+    return out
+
+
+def _align(dt, ref):
+    # aware/naive 비교 에러 방지: window 기준을 시리즈 시작 시각에 맞춤
+    if dt is None or ref is None:
+        return dt
+    if ref.tzinfo is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=ref.tzinfo)
+    if ref.tzinfo is None and dt.tzinfo is not None:
+        return dt.replace(tzinfo=None)
+    return dt
+
+
+def _add_months(dt, months):
+    # 해당 월에 같은 날짜가 없으면 None (RFC 5545: 31일 반복은 30일 월 건너뜀)
+    y, m = divmod(dt.month - 1 + months, 12)
+    y += dt.year
+    m += 1
+    if dt.day > _calendar.monthrange(y, m)[1]:
+        return None
+    return dt.replace(year=y, month=m)
+
+
+def _iter_candidates(rule, dtstart, win_start):
+    freq = rule["freq"]
+    interval = rule["interval"]
+    # COUNT가 없으면 window 직전까지 건너뛰기 가능 (DAILY/WEEKLY)
+    skip = rule["count"] is None and win_start is not None and win_start > dtstart
+
+    if freq == "DAILY":
+        k = 0
+        if skip:
+            k = max(0, (win_start - dtstart).days // interval - 1)
+        while True:
+            yield dtstart + timedelta(days=k * interval)
+            k += 1
+
+    elif freq == "WEEKLY":
+        days = rule["byday"] or [dtstart.weekday()]
+        week0 = dtstart - timedelta(days=dtstart.weekday())
+        k = 0
+        if skip:
+            k = max(0, (win_start - week0).days // (7 * interval) - 1)
+        while True:
+            base = week0 + timedelta(weeks=k * interval)
+            for wd in days:
+                occ = base + timedelta(days=wd)
+                if occ >= dtstart:
+                    yield occ
+            k += 1
+
+    else:
+        step = interval if freq == "MONTHLY" else 12 * interval
+        k = 0
+        misses = 0
+        while misses < 48:
+            occ = _add_months(dtstart, k * step)
+            k += 1
+            if occ is None:
+                misses += 1
+                continue
+            misses = 0
+            yield occ
+
+
+def local_day(dt, tz=None):
+    """ 발생 시각 → 날짜. exdates("YYYY-MM-DD")는 항상 앱 TZ 기준 날짜 (DB 세션 TZ와 무관하게) """
+    if tz is not None and dt.tzinfo is not None:
+        dt = dt.astimezone(tz)
+    return dt.date()
+
+
+def expand(rule, dtstart, duration, win_start, win_end, exdates=None, tz=None):
+    """
+    [win_start, win_end) 구간과 겹치는 발생분 [(start, end), ...]
+    - duration: timedelta (종료시각 없는 일정은 0)
+    - exdates: 제외할 날짜("YYYY-MM-DD") set, tz 기준 날짜로 비교 (local_day)
+    """
+    if not rule or dtstart is None:
+        return []
+    win_start = _align(win_start, dtstart)
+    win_end = _align(win_end, dtstart)
+    until = _align(rule["until"], dtstart)
+    count = rule["count"]
+    duration = duration or timedelta(0)
+    ex_days = set()
+    for s in exdates or ():
+        try:
+            ex_days.add(datetime.strptime(s, "%Y-%m-%d").date())
+        except Exception:
+            continue
+
+    out = []
+    n = 0
+    for occ in _iter_candidates(rule, dtstart, win_start - duration if win_start else None):
+        n += 1
+        if count is not None and n > count:
+            break
+        if until is not None and occ > until:
+            break
+        if win_end is not None and occ >= win_end:
+            break
+        end = occ + duration
+        if win_start is not None and end < win_start:
+            continue
+        if ex_days and local_day(occ, tz) in ex_days:
+            continue
+        out.append((occ, end))
+        if len(out) >= MAX_OCCURRENCES:
+            break
+    return out
+
+
+def expand_cached(series_id, rrule_text, dtstart, dtend, exdates_text, win_start, win_end, tz=None):
+    """
+    expand()의 캐시 버전.
+    시리즈 내용(rrule/시작/종료/exdates)이 key에 들어가므로 수정되면 자연히 새 key가 됨.
+    """
+    key = (
+        series_id,
+        rrule_text or "",
+        dtstart.isoformat() if dtstart else "",
+        dtend.isoformat() if dtend else "",
+        exdates_text or "",
+        win_start.isoformat() if win_start else "",
+        win_end.isoformat() if win_end else "",
+        str(tz) if tz is not None else "",
+    )
+    with _CACHE_LOCK:
+        hit = _CACHE.get(key)
+        if hit is not None:
+            _CACHE.move_to_end(key)
+            return hit
+
+    rule = parse_rrule(rrule_text)
+    duration = (dtend - dtstart) if (dtend and dtstart and dtend > dtstart) else timedelta(0)
+    occ = expand(rule, dtstart, duration, win_start, win_end, parse_exdates(exdates_text), tz)
+
+    with _CACHE_LOCK:
+        _CACHE[key] = occ
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > _CACHE_MAX:
+            _CACHE.popitem(last=False)
+    return occ
+
+
+def clear_cache():
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
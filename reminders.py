@@ -0,0 +1,78 @@
+# reminders.py
+# ✅ 일정 알림 예약 큐 (min-heap, 프로세스 메모리)
+#    - 일정별 세대(generation) 번호로 취소: 일정이 바뀌면 세대만 올리고, 옛 항목은 꺼낼 때 버림
+#      → 수정/삭제가 O(1), heap 재정렬 없음
+#    - DB 조회/푸시 전송은 keyword_manager_web.py 쪽에서 (여기는 순수 자료구조)
+import heapq
+import threading
+
+
+class ReminderQueue:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []   # (fire_at, seq, event_id, gen, payload)
+        self._gen = {}    # event_id -> 현재 세대
+        self._live = {}   # event_id -> 유효한 예약 수
+        self._seq = 0
+
+    def __len__(self):
+        with self._lock:
+            return sum(self._live.values())
+
+    def replace(self, event_id, items):
+        """
+        event_id의 예약을 통째로 교체. items: [(fire_at(epoch), payload), ...]
+        빈 목록이면 취소와 같음
+        """
+        with self._lock:
+            gen = self._gen.get(event_id, 0) + 1
+            self._gen[event_id] = gen
+            self._live[event_id] = 0
+            for fire_at, payload in items:
+                self._seq += 1
+                heapq.heappush(self._heap, (fire_at, self._seq, event_id, gen, payload))
+                self._live[event_id] += 1
+            if not self._live[event_id]:
+                self._live.pop(event_id, None)
+            self._compact()
+
+    def cancel(self, event_id):
+        self.replace(event_id, ())
+
+    def clear(self):
+        with self._lock:
+            self._heap.clear()
+            self._gen.clear()
+            self._live.clear()
+
+    def next_at(self):
+        """ 가장 이른 유효 예약 시각 (없으면 None) """
+        with self._lock:
+            self._drop_stale_head()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """ now 이전에 울려야 할 예약들 [(event_id, payload), ...] """
+        out = []
+        with self._lock:
+            while True:
+                self._drop_stale_head()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                _, _, event_id, _, payload = heapq.heappop(self._heap)
+                self._live[event_id] -= 1
+                if not self._live[event_id]:
+                    self._live.pop(event_id, None)
+                out.append((event_id, payload))
+        return out
+
+    def _drop_stale_head(self):
+        while self._heap and self._heap[0][3] != self._gen.get(self._heap[0][2]):
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        # 취소된 항목이 쌓여 유효 항목의 3배를 넘으면 한 번 정리
+        live = sum(self._live.values())
+        if len(self._heap) > 64 and len(self._heap) > 3 * live:
+            self._heap = [e for e in self._heap if e[3] == self._gen.get(e[2])]
+            heapq.heapify(self._heap)
@@ -0,0 +1,283 @@
+# replica.py
+# ✅ 조회(GET)를 읽기 전용 복제본으로 보내기 (옵션, DATABASE_READ_URL 있을 때만)
+#
+#   DATABASE_READ_URL=postgresql://...   복제본 (없으면 전부 primary = 예전과 같음)
+#   REPLICA_MAX_LAG_SEC=5                복제 지연이 이보다 크면 primary로
+#   REPLICA_CHECK_SEC=1                  지연 확인 주기 (워커별, 복제본 연결에 얹어서 조회)
+#   REPLICA_STICKY_SEC=60                쓰기 후 LSN 쿠키 유지 시간
+#
+#   read-your-writes:
+#     - 쓰기 요청(POST/PUT/PATCH/DELETE)이 primary에 커밋하면 그 시점 WAL 위치(LSN)를
+#       쿠키 db_lsn + 응답 헤더 X-DB-LSN으로 돌려줌
+#     - 다음 요청에 LSN(쿠키 또는 X-DB-LSN 헤더)이 있으면 복제본이 거기까지 재생했을 때만 복제본,
+#       아니면 primary → 방금 쓴 사람은 항상 자기 쓰기를 봄
+#   복제본 연결 실패 / 브레이커 open("postgres-read") → primary (503 아님)
+#   복제본 쿼리 중 실패(OperationalError) → "postgres-read"로 세고 GET은 primary로 한 번 다시
+#     (primary "postgres" 브레이커는 건드리지 않음 → 복제본 때문에 읽기 전용 모드가 되지 않음)
+#
+# 사용: replica.init_app(app)
+#       replica.connect_read(get_conn)   → GET 핸들러에서 get_conn() 대신
+#       pg_connect(..., connection_class=replica.TrackingConnection)  → primary
+import os
+import threading
+import time
+
+import psycopg
+from flask import current_app, g, has_request_context, request
+
+import querytrace
+import resilience
+
+COOKIE = "db_lsn"
+HEADER = "X-DB-LSN"
+
+_STATUS_SQL = """
+select pg_is_in_recovery(),
+       pg_last_wal_replay_lsn()::text,
+       case when pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() then 0
+            else coalesce(extract(epoch from now() - pg_last_xact_replay_timestamp()), 0)
+       end
+"""
+
+_LOCK = threading.Lock()
+# 복제본 상태 (워커별 캐시)
+_STATUS = {"checked": 0.0, "standby": None, "replay_lsn": None, "lag": None}
+_STATS = {"replica": 0, "primary_lag": 0, "primary_lsn": 0, "primary_fallback": 0, "checks": 0}
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except Exception:
+        return default
+
+
+def read_url():
+    return (os.environ.get("DATABASE_READ_URL") or "").strip()
+
+
+def parse_lsn(text):
+    """ "16/B374D848" → 정수 (비교용). 형식이 틀리면 None """
+    hi, sep, lo = (text or "").strip().partition("/")
+    if not sep:
+        return None
+    try:
+        return (int(hi, 16) << 32) | int(lo, 16)
+    except ValueError:
+        return None
+
+
+def format_lsn(n):
+    return f"{n >> 32:X}/{n & 0xFFFFFFFF:X}"
+
+
+# ===============================
+# ✅ 쓰기 쪽: 커밋한 LSN 기억
+# ===============================
+def _tracking():
+    if not has_request_context() or request.method not in resilience.WRITE_METHODS or not read_url():
+        return False
+    view = current_app.view_functions.get(request.endpoint)
+    return not getattr(view, "_replica_untracked", False)
+
+
+def untracked(fn):
+    """ 자주 오고 바로 다시 읽을 필요 없는 쓰기(presence ping 등): LSN 조회/쿠키 생략 """
+    fn._replica_untracked = True
+    return fn
+
+
+class TrackingConnection(psycopg.Connection):
+    """
+    쓰기 요청 중 커밋하면 primary의 현재 WAL 위치를 g에 남김 (복제본 설정 시에만)
+    - 요청 밖에서 대신 커밋하는 경우(그룹 커밋 스레드)는 track_lsn = True로 켜고
+      커밋 뒤 last_lsn을 제출한 요청에 넘겨 remember_lsn()
+    """
+    track_lsn = False
+    last_lsn = None
+
+    def commit(self):
+        pending = self.info.transaction_status != psycopg.pq.TransactionStatus.IDLE
+        super().commit()
+        in_request = _tracking()
+        if not pending or not (in_request or (self.track_lsn and read_url())):
+            return
+        # 새 트랜잭션을 열지 않게 autocommit으로 한 번만 조회
+        self.autocommit = True
+        try:
+            row = self.execute("select pg_current_wal_lsn()::text").fetchone()
+        except Exception:
+            return
+        finally:
+            self.autocommit = False
+        self.last_lsn = parse_lsn(row[0] if row else None)
+        if in_request:
+            remember_lsn(self.last_lsn)
+
+
+def remember_lsn(lsn):
+    """ 이 요청의 쓰기가 lsn까지 커밋됨 → 응답에 토큰으로 (더 앞선 값만) """
+    if lsn is None or not has_request_context():
+        return
+    if lsn > (g.get("_replica_lsn") or 0):
+        g._replica_lsn = lsn
+
+
+# ===============================
+# ✅ 읽기 쪽: 복제본 / primary 고르기
+# ===============================
+def _client_lsn():
+    return parse_lsn(request.headers.get(HEADER) or request.cookies.get(COOKIE))
+
+
+def _required_lsn():
+    """ 복제본이 재생했어야 하는 위치: 클라이언트 토큰과 이 요청에서 방금 커밋한 LSN 중 큰 쪽 """
+    tokens = [t for t in (_client_lsn(), g.get("_replica_lsn")) if t is not None]
+    return max(tokens) if tokens else None
+
+
+class ReplicaCursor(psycopg.Cursor):
+    """ 복제본 연결의 커서: 쿼리 실패에 표시를 남겨 errorhandler가 primary 탓으로 세지 않게 """
+
+    def execute(self, query, params=None, **kwargs):
+        try:
+            return super().execute(query, params, **kwargs)
+        except psycopg.OperationalError as e:
+            e._replica = True
+            raise
+
+
+class TracingReplicaCursor(ReplicaCursor, querytrace.TracingCursor):
+    """ QUERY_TRACE=1일 때: 복제본 쿼리도 느린 쿼리 기록에 남김 """
+
+
+def _cursor_factory():
+    return TracingReplicaCursor if querytrace.connect_kwargs() else ReplicaCursor
+
+
+def _check(conn):
+    row = conn.execute(_STATUS_SQL).fetchone()
+    with _LOCK:
+        _STATS["checks"] += 1
+        _STATUS.update(
+            checked=time.monotonic(),
+            standby=bool(row[0]),
+            replay_lsn=parse_lsn(row[1]),
+            lag=float(row[2] or 0),
+        )
+
+
+def _status_reason(token):
+    """ 복제본을 쓰면 안 되는 이유 (쓸 수 있으면 None) """
+    with _LOCK:
+        st = dict(_STATUS)
+    if st["lag"] is not None and st["lag"] > _env_float("REPLICA_MAX_LAG_SEC", 5.0):
+        return "primary_lag"
+    if token is not None:
+        # primary가 아닌 서버(복제 안 함)는 LSN을 비교할 수 없으니 primary로
+        if not st["standby"] or st["replay_lsn"] is None or st["replay_lsn"] < token:
+            return "primary_lsn"
+    return None
+
+
+def connect_read(connect_primary):
+    """
+    GET 핸들러용 연결. 복제본을 쓸 수 없으면 connect_primary()
+    - LSN 토큰(쿠키/헤더 또는 이 요청의 커밋)이 있으면: 캐시된 재생 위치가 모자랄 때만 복제본에 다시 물어봄
+    - 토큰이 없으면: REPLICA_CHECK_SEC마다 지연만 확인
+    """
+    url = read_url()
+    if not url or not has_request_context() or g.get("_replica_off"):
+        return connect_primary()
+
+    # 같은 요청 안에서 쓰고 바로 읽는 경우(POST 후 목록 렌더 등)도 자기 쓰기를 보도록
+    token = _required_lsn()
+    with _LOCK:
+        stale = time.monotonic() - _STATUS["checked"] > _env_float("REPLICA_CHECK_SEC", 1.0)
+    if not stale and _status_reason(token) == "primary_lag":
+        with _LOCK:
+            _STATS["primary_lag"] += 1
+        return connect_primary()
+
+    try:
+        # 복제본은 짧게 기다림 (libpq 최소 2초) → 남은 deadline으로 primary에 갈 여유
+        conn = resilience.pg_connect(
+            url, connect_timeout=2, breaker_name="postgres-read", cursor_factory=_cursor_factory()
+        )
+    except resilience.Unavailable:
+        with _LOCK:
+            _STATS["primary_fallback"] += 1
+        return connect_primary()
+
+    try:
+        if stale or _status_reason(token) is not None:
+            _check(conn)
+        reason = _status_reason(token)
+    except Exception:
+        conn.close()
+        resilience.breaker("postgres-read").failure()
+        with _LOCK:
+            _STATS["primary_fallback"] += 1
+        return connect_primary()
+
+    with _LOCK:
+        _STATS[reason or "replica"] += 1
+    if reason is None:
+        return conn
+    conn.close()
+    return connect_primary()
+
+
+def snapshot():
+    with _LOCK:
+        st = dict(_STATUS)
+        stats = dict(_STATS)
+    return {
+        "enabled": bool(read_url()),
+        "standby": st["standby"],
+        "replay_lsn": format_lsn(st["replay_lsn"]) if st["replay_lsn"] is not None else None,
+        "lag_sec": st["lag"],
+        "checked_ago_sec": round(time.monotonic() - st["checked"], 3) if st["checked"] else None,
+        **stats,
+    }
+
+
+def _replica_db_error(e):
+    """ resilience의 OperationalError 처리 앞단: 복제본에서 난 실패만 맡음 (아니면 None) """
+    if not getattr(e, "_replica", False):
+        return None
+    resilience.breaker("postgres-read").failure()
+    with _LOCK:
+        _STATS["primary_fallback"] += 1
+    if request.method not in ("GET", "HEAD") or g.get("_replica_off"):
+        return resilience.unavailable_response(resilience.Unavailable("postgres-read", detail=str(e).strip()[:200]))
+    # 조회는 부작용이 없으니 이 요청만 primary로 다시 실행
+    g._replica_off = True
+    view = current_app.view_functions[request.endpoint]
+    try:
+        rv = current_app.ensure_sync(view)(**(request.view_args or {}))
+    except Exception as e2:
+        return current_app.handle_user_exception(e2)
+    return current_app.make_response(rv)
+
+
+def init_app(app):
+    resilience.add_db_error_hook(app, _replica_db_error)
+
+    @app.after_request
+    def _replica_token(response):
+        lsn = g.get("_replica_lsn")
+        if lsn is None:
+            return response
+        # 이미 더 앞선 토큰을 들고 있으면 그대로 둠
+        cur = _client_lsn()
+        if cur is not None and cur > lsn:
+            lsn = cur
+        value = format_lsn(lsn)
+        response.headers[HEADER] = value
+        response.set_cookie(
+            COOKIE, value,
+            max_age=int(_env_float("REPLICA_STICKY_SEC", 60)),
+            httponly=True, samesite="Lax", secure=request.is_secure,
+        )
+        return response
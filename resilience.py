@@ -0,0 +1,311 @@
+# resilience.py
+# ✅ 외부 의존성(Postgres / 시티은행 / push 서비스) 장애가 워커를 다 붙잡지 않게
+#
+#   1) 서킷 브레이커 (의존성별)
+#      - 연속 BREAKER_FAILURES(기본 5)번 실패 → open: 바로 CircuitOpen (기다리지 않음)
+#      - BREAKER_RESET_SEC(기본 30초) 뒤 half-open: 요청 1개만 시험, 성공하면 close
+#      - BREAKER_FAILURES=0 이면 끔
+#   2) 요청 deadline
+#      - 요청마다 REQUEST_DEADLINE_SEC(기본 10초) 예산, 호출자가 X-Request-Deadline-Ms로 더 줄일 수 있음
+#      - timeout(cap) = min(cap, 남은 시간) → 요청이 오래될수록 connect/HTTP timeout이 줄어듦
+#      - 남은 시간이 거의 없으면 시작도 안 하고 DeadlineExceeded
+#      - DB_STATEMENT_DEADLINE=1 이면 남은 시간을 statement_timeout으로도 전달
+#        (연결 옵션 -c statement_timeout, 풀러가 startup options를 막으면 켜지 말 것)
+#   3) 읽기 전용 모드: postgres 브레이커가 열려 있으면 쓰기 요청(POST/PUT/PATCH/DELETE)은 바로 503
+#
+# 사용: resilience.init_app(app)
+#       resilience.pg_connect(url, ...)           → psycopg.connect 대신
+#       with resilience.guard("citibank"): ...    → 그 외 의존성
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg
+from flask import g, has_request_context, jsonify, request
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except Exception:
+        return default
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except Exception:
+        return default
+
+
+MIN_REMAINING_SEC = 0.05  # 이보다 적게 남았으면 호출하지 않음
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+class Unavailable(RuntimeError):
+    """ 의존성을 지금 쓸 수 없음 → 503 """
+    error = "unavailable"
+
+    def __init__(self, name, retry_after=1, detail=None):
+        super().__init__(f"{name}: {detail or self.error}")
+        self.name = name
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+class CircuitOpen(Unavailable):
+    error = "circuit_open"
+
+
+class DeadlineExceeded(Unavailable):
+    error = "deadline_exceeded"
+
+
+# ===============================
+# ✅ 서킷 브레이커
+# ===============================
+class CircuitBreaker:
+    def __init__(self, name, failures=5, reset_sec=30.0):
+        self.name = name
+        self.failures = failures
+        self.reset_sec = reset_sec
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._count = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.stats = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_sec:
+                return "half_open"
+            return self._state
+
+    def is_open(self):
+        return self.state == "open"
+
+    def before(self):
+        """ 호출 전에. 열려 있으면 CircuitOpen """
+        if self.failures <= 0:
+            return
+        with self._lock:
+            self.stats["calls"] += 1
+            if self._state == "open":
+                left = self.reset_sec - (time.monotonic() - self._opened_at)
+                if left > 0:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpen(self.name, retry_after=left)
+                self._state = "half_open"
+                self._probing = False
+            if self._state == "half_open":
+                if self._probing:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpen(self.name, retry_after=1)
+                self._probing = True
+
+    def success(self):
+        if self.failures <= 0:
+            return
+        with self._lock:
+            self._state = "closed"
+            self._count = 0
+            self._probing = False
+
+    def failure(self):
+        if self.failures <= 0:
+            return
+        with self._lock:
+            self.stats["failures"] += 1
+            self._count += 1
+            if self._state == "half_open" or self._count >= self.failures:
+                if self._state != "open":
+                    self.stats["opened"] += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def release(self):
+        """
+        성공/실패를 모른 채 끝난 호출 (deadline 초과, 중단 등)
+        - half-open 시험 중이었으면 실패로 보고 다시 open (안 그러면 시험 중 표시가 남아 계속 거절)
+        - 그 외에는 아무것도 안 셈
+        """
+        if self.failures <= 0:
+            return
+        with self._lock:
+            if self._state == "half_open" and self._probing:
+                self.stats["failures"] += 1
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def snapshot(self):
+        state = self.state
+        with self._lock:
+            return {"name": self.name, "state": state, "consecutive_failures": self._count, **self.stats}
+
+
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def breaker(name):
+    with _BREAKERS_LOCK:
+        br = _BREAKERS.get(name)
+        if br is None:
+            br = CircuitBreaker(
+                name,
+                failures=_env_int("BREAKER_FAILURES", 5),
+                reset_sec=_env_float("BREAKER_RESET_SEC", 30.0),
+            )
+            _BREAKERS[name] = br
+        return br
+
+
+def snapshot():
+    with _BREAKERS_LOCK:
+        items = list(_BREAKERS.values())
+    return [br.snapshot() for br in sorted(items, key=lambda b: b.name)]
+
+
+def reset():
+    """ 브레이커 전부 초기화 (설정 환경변수도 다시 읽음) """
+    with _BREAKERS_LOCK:
+        _BREAKERS.clear()
+
+
+@contextmanager
+def guard(name):
+    """
+    with guard("citibank"): requests.get(...)
+    - 안에서 예외 → 실패 1회
+    - Unavailable(deadline 등)/중단은 의존성 탓이 아니므로 release()만 (half-open 시험은 풀어줌)
+    - timeout(...)은 guard 들어가기 전에 계산해 둘 것
+    """
+    br = breaker(name)
+    br.before()
+    try:
+        yield br
+    except Unavailable:
+        br.release()
+        raise
+    except Exception:
+        br.failure()
+        raise
+    except BaseException:
+        br.release()
+        raise
+    br.success()
+
+
+# ===============================
+# ✅ 요청 deadline
+# ===============================
+def request_budget():
+    return _env_float("REQUEST_DEADLINE_SEC", 10.0)
+
+
+def remaining():
+    """ 남은 시간(초). 요청 밖(백그라운드 스레드)이거나 deadline 없는 요청이면 None """
+    if not has_request_context():
+        return None
+    deadline = g.get("_rs_deadline")
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def timeout(cap, name="request"):
+    """ min(cap, 남은 시간). 이미 다 썼으면 DeadlineExceeded """
+    left = remaining()
+    if left is None:
+        return cap
+    if left < MIN_REMAINING_SEC:
+        raise DeadlineExceeded(name)
+    return min(cap, left)
+
+
+def no_deadline(fn):
+    """ 오래 걸리는 게 정상인 라우트(내보내기/가져오기/업로드)용 """
+    fn._rs_no_deadline = True
+    return fn
+
+
+def pg_connect(url, connect_timeout=10, breaker_name="postgres", connection_class=psycopg.Connection, **kwargs):
+    """
+    psycopg.connect + 브레이커 + deadline
+    - 연결 실패(OperationalError)만 브레이커 실패로 셈
+    - 쿼리 중 실패는 init_app의 errorhandler가 셈
+    """
+    # deadline은 브레이커보다 먼저: 여기서 DeadlineExceeded가 나도 half-open 시험을 잡고 있지 않음
+    left = timeout(connect_timeout, breaker_name)
+    if remaining() is not None and _env_int("DB_STATEMENT_DEADLINE", 0):
+        kwargs["options"] = f"-c statement_timeout={max(1, int(left * 1000))}"
+    br = breaker(breaker_name)
+    br.before()
+    try:
+        # libpq connect_timeout은 정수(초), 2 미만은 2로 취급
+        conn = connection_class.connect(url, connect_timeout=max(2, int(math.ceil(left))), **kwargs)
+    except psycopg.OperationalError as e:
+        br.failure()
+        raise Unavailable(breaker_name, detail=str(e).strip()[:200]) from e
+    except BaseException:
+        br.release()
+        raise
+    br.success()
+    return conn
+
+
+# ===============================
+# ✅ Flask 연결
+# ===============================
+def unavailable_response(e, error=None):
+    res = jsonify({"ok": False, "error": error or e.error, "dependency": e.name})
+    res.status_code = 503
+    res.headers["Retry-After"] = str(e.retry_after)
+    return res
+
+
+def add_db_error_hook(app, hook):
+    """ hook(e) → 응답이면 그걸 씀, None이면 기본 처리(primary 브레이커 실패 + 503) """
+    app.extensions.setdefault("resilience.db_error_hooks", []).append(hook)
+
+
+def init_app(app):
+    @app.before_request
+    def _rs_start():
+        view = app.view_functions.get(request.endpoint)
+        budget = request_budget()
+        if view is not None and getattr(view, "_rs_no_deadline", False):
+            budget = 0
+        hint = request.headers.get("X-Request-Deadline-Ms")
+        if budget > 0 and hint:
+            try:
+                budget = min(budget, max(0.0, float(hint) / 1000))
+            except ValueError:
+                pass
+        g._rs_deadline = time.monotonic() + budget if budget > 0 else None
+
+        # 읽기 전용 모드: DB가 죽어 있으면 쓰기는 기다리지 않고 바로 거절
+        if request.method in WRITE_METHODS and breaker("postgres").is_open():
+            br = breaker("postgres")
+            left = br.reset_sec - (time.monotonic() - br._opened_at)
+            return unavailable_response(CircuitOpen("postgres", retry_after=left), error="read_only")
+
+    @app.errorhandler(Unavailable)
+    def _rs_unavailable(e):
+        return unavailable_response(e)
+
+    @app.errorhandler(psycopg.OperationalError)
+    def _rs_db_error(e):
+        # 연결 후 끊김 / statement_timeout(QueryCanceled) 등
+        # 다른 연결(복제본 등)에서 난 실패는 먼저 hook이 처리 → primary 브레이커는 세지 않음
+        for hook in app.extensions.get("resilience.db_error_hooks", ()):
+            res = hook(e)
+            if res is not None:
+                return res
+        breaker("postgres").failure()
+        return unavailable_response(Unavailable("postgres", detail=str(e).strip()[:200]))
@@ -21,6 +21,11 @@ self.addEventListener("push", (event) => {
     badge: data.badge || "/static/icons/icon-192.png",
     data: data.url ? { url: data.url } : {},
   };
+  // ✅ 같은 room 알림은 기기에서도 하나로 교체 (쌓이지 않게)
+  if (data.tag) {
+    options.tag = data.tag;
+    options.renotify = true;
+  }
 
   event.waitUntil(self.registration.showNotification(title, options));
 });
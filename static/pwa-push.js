@@ -24,7 +24,8 @@ async function saveSubscriptionToServer(sub) {
   const res = await fetch("/api/push/subscribe", {
     method: "POST",
     headers: { "Content-Type": "application/json" },
-    body: JSON.stringify({ subscription: sub }),
+    // client_id: 이미 읽은 채팅은 푸시 생략할 수 있도록 구독과 연결
+    body: JSON.stringify({ subscription: sub, client_id: localStorage.getItem("chat_client_id") || null }),
   });
   const text = await res.text();
   if (!res.ok) throw new Error(`subscribe failed: ${res.status} ${text}`);
@@ -0,0 +1,153 @@
+# suggest.py
+# ✅ 메모 키워드 자동완성 (프로세스 메모리, 정렬 배열 + bisect)
+#    - "한그" → 한글 (자모 단위 접두어: 글자를 다 치기 전에도 매칭)
+#    - "ㅎㄱ" → 한글 (초성만 입력)
+#    - 띄어쓰기로 나뉜 단어의 시작에서도 매칭 ("전자" → 삼성 전자)
+#    - add()/remove()로 1건씩 갱신 (정렬 위치에 끼워넣기/빼기, 전체 재구성 없음)
+import threading
+from bisect import bisect_left, insort
+
+_CHO = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+_JONG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+         "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+
+# 겹모음/겹받침은 낱자로 풀어서 저장 → "달" 입력으로 "닭"(ㄷㅏㄹㄱ)도 매칭
+_SPLIT = {
+    "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ", "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ",
+    "ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+    "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ",
+}
+
+
+def _is_syllable(ch):
+    return "가" <= ch <= "힣"
+
+
+def _is_consonant(ch):
+    return "ㄱ" <= ch <= "ㅎ"
+
+
+def jamo(text):
+    """ 한글 음절 → 호환 자모 낱자열 (그 외 글자는 소문자로) """
+    out = []
+    for ch in text.casefold():
+        if _is_syllable(ch):
+            code = ord(ch) - 0xAC00
+            jong = _JONG[code % 28]
+            out.append(_CHO[code // 588])
+            out.append(_SPLIT.get(_JUNG[(code % 588) // 28], _JUNG[(code % 588) // 28]))
+            out.append(_SPLIT.get(jong, jong))
+        else:
+            out.append(_SPLIT.get(ch, ch))
+    return "".join(out)
+
+
+def choseong(text):
+    """ 한글 음절 → 초성, 그 외 글자는 그대로 (소문자) """
+    return "".join(_CHO[(ord(ch) - 0xAC00) // 588] if _is_syllable(ch) else ch for ch in text.casefold())
+
+
+def is_choseong_query(q):
+    chars = [c for c in q if not c.isspace()]
+    return bool(chars) and all(_is_consonant(c) for c in chars)
+
+
+def _starts(text):
+    # 키워드 전체 + 띄어쓰기 뒤 각 단어부터의 나머지 (0 = 키워드 맨 앞)
+    yield 0, text
+    for i, ch in enumerate(text):
+        if ch.isspace() and i + 1 < len(text) and not text[i + 1].isspace():
+            yield i + 1, text[i + 1:]
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jamo = []     # 정렬된 (자모 키, 단어 시작 위치, 키워드)
+        self._cho = []      # 정렬된 (초성 키, 단어 시작 위치, 키워드)
+        self._keywords = set()
+
+    def __len__(self):
+        return len(self._keywords)
+
+    def __contains__(self, keyword):
+        return keyword in self._keywords
+
+    def _entries(self, keyword):
+        for pos, rest in _starts(keyword):
+            yield (jamo(rest), pos, keyword), (choseong(rest), pos, keyword)
+
+    def add(self, keyword):
+        keyword = (keyword or "").strip()
+        if not keyword:
+            return False
+        with self._lock:
+            if keyword in self._keywords:
+                return False
+            self._keywords.add(keyword)
+            for j, c in self._entries(keyword):
+                insort(self._jamo, j)
+                insort(self._cho, c)
+        return True
+
+    def remove(self, keyword):
+        keyword = (keyword or "").strip()
+        with self._lock:
+            if keyword not in self._keywords:
+                return False
+            self._keywords.discard(keyword)
+            for j, c in self._entries(keyword):
+                for arr, item in ((self._jamo, j), (self._cho, c)):
+                    i = bisect_left(arr, item)
+                    if i < len(arr) and arr[i] == item:
+                        del arr[i]
+        return True
+
+    def rebuild(self, keywords):
+        jamo_arr, cho_arr, kws = [], [], set()
+        for kw in keywords:
+            kw = (kw or "").strip()
+            if not kw or kw in kws:
+                continue
+            kws.add(kw)
+            for j, c in self._entries(kw):
+                jamo_arr.append(j)
+                cho_arr.append(c)
+        jamo_arr.sort()
+        cho_arr.sort()
+        with self._lock:
+            self._jamo, self._cho, self._keywords = jamo_arr, cho_arr, kws
+
+    @staticmethod
+    def _scan(arr, prefix, cap):
+        # prefix로 시작하는 구간만 읽음: bisect로 시작점 → 접두어가 안 맞으면 끝
+        out = []
+        i = bisect_left(arr, (prefix,))
+        n = len(arr)
+        while i < n and len(out) < cap:
+            key, pos, kw = arr[i]
+            if not key.startswith(prefix):
+                break
+            out.append((pos, kw))
+            i += 1
+        return out
+
+    def suggest(self, q, limit=10):
+        q = (q or "").strip()
+        if not q:
+            return []
+        cap = max(limit * 5, 50)
+        with self._lock:
+            if is_choseong_query(q):
+                hits = self._scan(self._cho, choseong(q), cap)
+            else:
+                hits = self._scan(self._jamo, jamo(q), cap)
+
+        # 키워드 맨 앞에서 맞은 것 → 짧은 것 → 가나다 순
+        best = {}
+        for pos, kw in hits:
+            if kw not in best or pos < best[kw]:
+                best[kw] = pos
+        ranked = sorted(best, key=lambda kw: (best[kw] != 0, len(kw), kw))
+        return ranked[:limit]
@@ -0,0 +1,76 @@
+# test_groupcommit.py
+# ✅ 그룹 커밋 테스트
+#   python -m pytest -q test_groupcommit.py
+import threading
+
+import pytest
+
+from groupcommit import GroupCommitter
+
+
+def _submit_all(committer, items, prepare=None):
+    results, errors = {}, {}
+    barrier = threading.Barrier(len(items))
+
+    def run(item):
+        barrier.wait()
+        try:
+            results[item] = committer.submit(item, prepare=prepare)
+        except Exception as e:
+            errors[item] = e
+
+    threads = [threading.Thread(target=run, args=(it,)) for it in items]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    return results, errors
+
+
+def test_results_follow_submission_order():
+    order = []
+    seq = [0]
+
+    def stamp(item):
+        order.append(item)  # 대기열에 들어간 순서 (락 안)
+
+    def flush(items):
+        out = list(range(seq[0] + 1, seq[0] + 1 + len(items)))
+        seq[0] += len(items)
+        return out
+
+    gc = GroupCommitter(flush, window_sec=0.02, max_batch=8)
+    results, errors = _submit_all(gc, list(range(30)), prepare=stamp)
+    assert not errors
+    # 먼저 줄 선 제출이 더 작은 id → id 순서 = prepare 순서
+    assert [results[it] for it in order] == list(range(1, 31))
+    assert gc.stats["items"] == 30
+    assert gc.stats["max_batch"] <= 8
+    assert gc.stats["batches"] < 30
+
+
+def test_failed_batch_raises_in_every_caller_of_that_batch_only():
+    calls = []
+
+    def flush(items):
+        calls.append(list(items))
+        if len(calls) == 1:
+            raise RuntimeError("disk full")
+        return [f"ok:{it}" for it in items]
+
+    gc = GroupCommitter(flush, window_sec=0.05)
+    results, errors = _submit_all(gc, ["a", "b", "c"])
+    failed = set(calls[0])
+    assert set(errors) == failed
+    assert all(isinstance(e, RuntimeError) and str(e) == "disk full" for e in errors.values())
+    assert all(results[it] == f"ok:{it}" for it in results)
+
+    # 실패 뒤에도 커밋 스레드는 살아 있음
+    assert gc.submit("d") == "ok:d"
+
+
+def test_single_submit_without_contention():
+    gc = GroupCommitter(lambda items: [x * 2 for x in items], window_sec=0)
+    assert gc.submit(21) == 42
+    with pytest.raises(ZeroDivisionError):
+        GroupCommitter(lambda items: [1 / 0]).submit(1)
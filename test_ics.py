@@ -0,0 +1,145 @@
+# test_ics.py
+# ✅ ICS 가져오기/내보내기 테스트 (DB 불필요)
+#   python -m pytest -q test_ics.py
+from datetime import datetime, timedelta, timezone
+
+import pytz
+
+import ics
+import recurrence
+
+SEOUL = pytz.timezone("Asia/Seoul")
+
+
+def _vcal(*lines):
+    return "\r\n".join(["BEGIN:VCALENDAR", "VERSION:2.0", *lines, "END:VCALENDAR"]) + "\r\n"
+
+
+# ===============================
+# ✅ EXDATE 날짜 = 앱 TZ 기준 (DB 세션이 UTC여도)
+# ===============================
+def test_exdate_round_trip_across_midnight():
+    # 매일 01:00 KST = 전날 16:00 UTC, 1/8(KST) 한 번만 제외
+    text = _vcal(
+        "BEGIN:VEVENT",
+        "UID:daily-1",
+        "SUMMARY:아침",
+        "DTSTART:20250105T160000Z",
+        "DTEND:20250105T170000Z",
+        "RRULE:FREQ=DAILY;COUNT=5",
+        "EXDATE:20250107T160000Z",
+        "END:VEVENT",
+    )
+    (ev,) = ics.parse(text, tz=SEOUL)
+    assert ev["exdates"] == "2025-01-08"
+
+    # DB 세션 TZ가 UTC → timestamptz가 UTC로 돌아옴
+    start = ev["start"].astimezone(timezone.utc)
+    occ = recurrence.expand(
+        recurrence.parse_rrule(ev["rrule"]), start, ev["end"] - ev["start"],
+        datetime(2025, 1, 1, tzinfo=timezone.utc), datetime(2025, 2, 1, tzinfo=timezone.utc),
+        recurrence.parse_exdates(ev["exdates"]), SEOUL,
+    )
+    days = [recurrence.local_day(s, SEOUL).isoformat() for s, _ in occ]
+    assert days == ["2025-01-06", "2025-01-07", "2025-01-09", "2025-01-10"]
+
+    # 다시 내보내도 같은 발생 시각이 빠짐
+    out = ics.format_event("daily-1", ev["title"], start, ev["end"], 0, "", rrule=ev["rrule"],
+                           exdates=ev["exdates"], tz=SEOUL)
+    assert "EXDATE:20250107T160000Z\r\n" in out
+    assert ics.parse(_vcal(out.strip()), tz=SEOUL)[0]["exdates"] == "2025-01-08"
+
+
+def test_expand_cached_passes_tz():
+    recurrence.clear_cache()
+    start = datetime(2025, 1, 5, 16, 0, tzinfo=timezone.utc)
+    ws, we = start, start + timedelta(days=3)
+    occ = recurrence.expand_cached(1, "FREQ=DAILY", start, None, "2025-01-07", ws, we, SEOUL)
+    assert [s.day for s, _ in occ] == [5, 7]  # 1/6 16:00Z = 1/7 KST 제외
+
+
+# ===============================
+# ✅ 줄 접기 / 이스케이프
+# ===============================
+def test_fold_unfold_round_trip_keeps_utf8_and_escapes():
+    title = "회의; 준비, 자료\\정리\n" + "가나다라" * 20
+    out = ics.format_event("u1", title, datetime(2025, 1, 1, tzinfo=timezone.utc), None, 0, "메모")
+    lines = out.split("\r\n")
+    assert all(len(line.encode("utf-8")) <= 75 for line in lines)
+    assert any(line.startswith(" ") for line in lines)
+    out.encode("utf-8").decode("utf-8")  # 글자 중간에서 자르지 않음
+
+    (ev,) = ics.parse(_vcal(out.strip()))
+    assert ev["title"] == title
+    assert ev["memo"] == "메모"
+
+
+def test_unfold_accepts_tab_and_bare_lf():
+    text = "BEGIN:VCALENDAR\nBEGIN:VEVENT\nUID:x\nSUMMARY:긴 \n\t제목\nDTSTART:20250101T000000Z\nEND:VEVENT\nEND:VCALENDAR\n"
+    assert ics.parse(text)[0]["title"] == "긴 제목"
+
+
+# ===============================
+# ✅ DURATION / 종일 일정
+# ===============================
+def test_duration_becomes_end_and_exports_as_dtend():
+    (ev,) = ics.parse(_vcal(
+        "BEGIN:VEVENT", "UID:d1", "SUMMARY:x",
+        "DTSTART:20250101T090000Z", "DURATION:PT1H30M",
+        "END:VEVENT",
+    ))
+    assert ev["end"] - ev["start"] == timedelta(hours=1, minutes=30)
+    out = ics.format_event("d1", "x", ev["start"], ev["end"], 0, "")
+    assert "DTEND:20250101T103000Z\r\n" in out
+    (back,) = ics.parse(_vcal(out.strip()))
+    assert (back["start"], back["end"]) == (ev["start"], ev["end"])
+
+
+def test_parse_duration():
+    assert ics.parse_duration("P1W2DT3H") == timedelta(weeks=1, days=2, hours=3)
+    assert ics.parse_duration("-PT15M") == -timedelta(minutes=15)
+    assert ics.parse_duration("1H") is None
+
+
+def test_all_day_round_trip_in_app_tz():
+    (ev,) = ics.parse(_vcal(
+        "BEGIN:VEVENT", "UID:a1", "SUMMARY:휴가",
+        "DTSTART;VALUE=DATE:20250301", "DTEND;VALUE=DATE:20250303",
+        "END:VEVENT",
+    ), tz=SEOUL)
+    assert ev["all_day"] == 1
+    out = ics.format_event("a1", "휴가", ev["start"].astimezone(timezone.utc),
+                           ev["end"].astimezone(timezone.utc), 1, "", tz=SEOUL)
+    assert "DTSTART;VALUE=DATE:20250301\r\n" in out
+    assert "DTEND;VALUE=DATE:20250303\r\n" in out
+
+
+# ===============================
+# ✅ RECURRENCE-ID (반복 중 1회만 바꾼 것)
+# ===============================
+def test_overrides_keep_series_and_import_separately():
+    events = ics.parse(_vcal(
+        "BEGIN:VEVENT", "UID:abc", "SUMMARY:주간 회의",
+        "DTSTART:20250106T010000Z", "DTEND:20250106T020000Z", "RRULE:FREQ=WEEKLY",
+        "END:VEVENT",
+        # 1/13 회차는 시간 변경, 1/20 회차는 취소
+        "BEGIN:VEVENT", "UID:abc", "SUMMARY:주간 회의 (변경)", "RECURRENCE-ID:20250113T010000Z",
+        "DTSTART:20250114T050000Z", "DTEND:20250114T060000Z",
+        "END:VEVENT",
+        "BEGIN:VEVENT", "UID:abc", "RECURRENCE-ID:20250120T010000Z", "STATUS:CANCELLED",
+        "DTSTART:20250120T010000Z",
+        "END:VEVENT",
+    ), tz=SEOUL)
+    assert [e["uid"] for e in events] == ["abc", "abc#20250113T010000Z"]
+    master, moved = events
+    assert master["rrule"] == "FREQ=WEEKLY"
+    assert master["exdates"] == "2025-01-13,2025-01-20"
+    assert moved["rrule"] is None and moved["exdates"] is None
+    assert moved["title"] == "주간 회의 (변경)"
+
+    occ = recurrence.expand(
+        recurrence.parse_rrule(master["rrule"]), master["start"], master["end"] - master["start"],
+        datetime(2025, 1, 1, tzinfo=timezone.utc), datetime(2025, 1, 28, tzinfo=timezone.utc),
+        recurrence.parse_exdates(master["exdates"]), SEOUL,
+    )
+    assert [s.day for s, _ in occ] == [6, 27]
@@ -0,0 +1,87 @@
+# test_recurrence.py
+# ✅ RRULE 전개 테스트
+#   python -m pytest -q test_recurrence.py
+from datetime import datetime, timedelta, timezone
+
+import recurrence
+
+UTC = timezone.utc
+
+
+def _days(rrule, start, win_start, win_end, exdates=None, duration=timedelta(0)):
+    occ = recurrence.expand(recurrence.parse_rrule(rrule), start, duration, win_start, win_end, exdates)
+    return [s.strftime("%Y-%m-%d") for s, _ in occ]
+
+
+def test_parse_rrule():
+    rule = recurrence.parse_rrule("RRULE:FREQ=weekly;INTERVAL=2;BYDAY=WE,MO,MO;COUNT=4")
+    assert rule == {"freq": "WEEKLY", "interval": 2, "count": 4, "until": None, "byday": [0, 2]}
+    assert recurrence.parse_rrule("FREQ=HOURLY") is None
+    assert recurrence.parse_rrule("FREQ=DAILY;UNTIL=garbage") is None
+    assert recurrence.parse_rrule("FREQ=DAILY;UNTIL=20250110T000000Z")["until"] == datetime(2025, 1, 10, tzinfo=UTC)
+
+
+def test_weekly_byday_count_counts_occurrences_not_weeks():
+    start = datetime(2025, 1, 1, 9, tzinfo=UTC)  # 수요일
+    days = _days("FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=5", start,
+                 datetime(2025, 1, 1, tzinfo=UTC), datetime(2025, 3, 1, tzinfo=UTC))
+    # 시작일 이전 월요일(12/30)은 발생분이 아님
+    assert days == ["2025-01-01", "2025-01-03", "2025-01-06", "2025-01-08", "2025-01-10"]
+
+
+def test_count_applies_from_series_start_not_window():
+    start = datetime(2025, 1, 1, 9, tzinfo=UTC)
+    days = _days("FREQ=DAILY;COUNT=5", start, datetime(2025, 1, 4, tzinfo=UTC), datetime(2025, 2, 1, tzinfo=UTC))
+    assert days == ["2025-01-04", "2025-01-05"]
+
+
+def test_weekly_interval_until_and_exdates():
+    start = datetime(2025, 1, 6, 9, tzinfo=UTC)  # 월요일
+    days = _days("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH;UNTIL=20250220", start,
+                 datetime(2025, 1, 1, tzinfo=UTC), datetime(2025, 12, 31, tzinfo=UTC),
+                 exdates={"2025-01-20", "2025-02-06"})
+    assert days == ["2025-01-06", "2025-01-09", "2025-01-23", "2025-02-03", "2025-02-17", "2025-02-20"]
+
+
+def test_until_is_inclusive_for_date_form_and_exclusive_after_time():
+    start = datetime(2025, 1, 1, 9, tzinfo=UTC)
+    ws, we = datetime(2025, 1, 1, tzinfo=UTC), datetime(2025, 2, 1, tzinfo=UTC)
+    assert _days("FREQ=DAILY;UNTIL=20250103", start, ws, we)[-1] == "2025-01-03"
+    assert _days("FREQ=DAILY;UNTIL=20250103T080000Z", start, ws, we)[-1] == "2025-01-02"
+
+
+def test_monthly_31st_skips_short_months():
+    start = datetime(2025, 1, 31, 9, tzinfo=UTC)
+    days = _days("FREQ=MONTHLY;COUNT=4", start, datetime(2025, 1, 1, tzinfo=UTC), datetime(2026, 1, 1, tzinfo=UTC))
+    assert days == ["2025-01-31", "2025-03-31", "2025-05-31", "2025-07-31"]
+
+
+def test_window_skip_matches_full_expansion():
+    # COUNT 없는 DAILY/WEEKLY는 window 앞을 건너뛰고 시작 → 처음부터 센 결과와 같아야 함
+    start = datetime(2020, 3, 2, 9, tzinfo=UTC)
+    ws, we = datetime(2025, 6, 1, tzinfo=UTC), datetime(2025, 7, 1, tzinfo=UTC)
+    rule = "FREQ=WEEKLY;INTERVAL=3;BYDAY=TU,SA"
+    full = [d for d in _days(rule, start, None, we) if d >= "2025-06-01"]
+    assert _days(rule, start, ws, we) == full
+    assert full
+
+
+def test_occurrence_overlapping_window_start_is_included():
+    start = datetime(2025, 1, 1, 23, tzinfo=UTC)
+    occ = recurrence.expand(recurrence.parse_rrule("FREQ=DAILY"), start, timedelta(hours=2),
+                            datetime(2025, 1, 3, 0, 30, tzinfo=UTC), datetime(2025, 1, 4, tzinfo=UTC))
+    assert [s.day for s, _ in occ] == [2, 3]
+
+
+def test_naive_window_against_aware_series():
+    start = datetime(2025, 1, 1, 9, tzinfo=UTC)
+    assert _days("FREQ=DAILY;COUNT=2", start, datetime(2025, 1, 1), datetime(2025, 1, 5)) == ["2025-01-01", "2025-01-02"]
+
+
+def test_expand_cached_key_follows_series_content():
+    recurrence.clear_cache()
+    start = datetime(2025, 1, 1, 9, tzinfo=UTC)
+    ws, we = datetime(2025, 1, 1, tzinfo=UTC), datetime(2025, 1, 8, tzinfo=UTC)
+    assert len(recurrence.expand_cached(1, "FREQ=DAILY", start, None, "", ws, we)) == 7
+    # 같은 시리즈라도 exdates가 바뀌면 새로 전개
+    assert len(recurrence.expand_cached(1, "FREQ=DAILY", start, None, "2025-01-02", ws, we)) == 6
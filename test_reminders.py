@@ -0,0 +1,55 @@
+# test_reminders.py
+# ✅ 알림 예약 큐 테스트
+#   python -m pytest -q test_reminders.py
+from reminders import ReminderQueue
+
+
+def test_pop_due_in_fire_order():
+    q = ReminderQueue()
+    q.replace(1, [(30, "a30"), (10, "a10")])
+    q.replace(2, [(20, "b20")])
+    assert len(q) == 3
+    assert q.next_at() == 10
+    assert q.pop_due(25) == [(1, "a10"), (2, "b20")]
+    assert q.next_at() == 30
+    assert len(q) == 1
+
+
+def test_replace_drops_previous_schedule():
+    q = ReminderQueue()
+    q.replace(1, [(10, "old10"), (20, "old20")])
+    q.replace(1, [(15, "new15")])
+    assert len(q) == 1
+    assert q.next_at() == 15
+    assert q.pop_due(100) == [(1, "new15")]
+    assert q.next_at() is None
+
+
+def test_cancel_only_affects_that_event():
+    q = ReminderQueue()
+    q.replace(1, [(10, "a")])
+    q.replace(2, [(20, "b")])
+    q.cancel(1)
+    assert len(q) == 1
+    assert q.next_at() == 20
+    assert q.pop_due(100) == [(2, "b")]
+    q.cancel(99)  # 모르는 일정
+    assert len(q) == 0
+
+
+def test_stale_entries_are_compacted():
+    q = ReminderQueue()
+    for i in range(200):
+        q.replace(1, [(i, i)])
+    assert len(q) == 1
+    assert len(q._heap) <= 3 * 1 + 64
+    assert q.pop_due(1000) == [(1, 199)]
+
+
+def test_clear():
+    q = ReminderQueue()
+    q.replace(1, [(10, "a")])
+    q.clear()
+    assert len(q) == 0 and q.next_at() is None
+    q.replace(1, [(5, "b")])  # 세대가 초기화돼도 새 예약은 유효
+    assert q.pop_due(10) == [(1, "b")]
@@ -0,0 +1,174 @@
+# test_replica.py
+# ✅ 복제본 라우팅 테스트 (실제 DB 없이 연결 흉내)
+#   python -m pytest -q test_replica.py
+import time
+
+import psycopg
+import pytest
+from flask import g, has_request_context
+
+import keyword_manager_web as kmw
+import querytrace
+import replica
+import resilience
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, query, params=None):
+        if self.conn.error is not None:
+            raise self.conn.error
+
+    def fetchall(self):
+        return self.conn.rows
+
+
+class _FakeConn:
+    def __init__(self, name, rows=(), error=None):
+        self.name = name
+        self.rows = list(rows)
+        self.error = error
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def _clean(monkeypatch):
+    monkeypatch.setenv("DATABASE_READ_URL", "postgresql://replica/db")
+    monkeypatch.setenv("REPLICA_CHECK_SEC", "3600")
+    resilience.reset()
+    yield
+    resilience.reset()
+
+
+def _replica_at(monkeypatch, replay_lsn):
+    monkeypatch.setitem(replica._STATUS, "checked", time.monotonic())
+    monkeypatch.setitem(replica._STATUS, "standby", True)
+    monkeypatch.setitem(replica._STATUS, "replay_lsn", replay_lsn)
+    monkeypatch.setitem(replica._STATUS, "lag", 0.0)
+    monkeypatch.setattr(replica, "_check", lambda conn: None)
+    monkeypatch.setattr(resilience, "pg_connect", lambda url, **kw: _FakeConn("replica"))
+
+
+def test_same_request_write_reads_from_primary(monkeypatch):
+    _replica_at(monkeypatch, replay_lsn=100)
+    cookie = replica.format_lsn(50)
+    with kmw.app.test_request_context("/", method="POST", headers={"Cookie": f"db_lsn={cookie}"}):
+        assert replica.connect_read(lambda: _FakeConn("primary")).name == "replica"
+        g._replica_lsn = 200  # 이 요청에서 방금 커밋, 복제본은 아직 100
+        assert replica.connect_read(lambda: _FakeConn("primary")).name == "primary"
+
+
+def test_client_token_ahead_of_request_lsn(monkeypatch):
+    _replica_at(monkeypatch, replay_lsn=100)
+    with kmw.app.test_request_context("/", headers={"X-DB-LSN": replica.format_lsn(300)}):
+        g._replica_lsn = 50
+        assert replica._required_lsn() == 300
+        assert replica.connect_read(lambda: _FakeConn("primary")).name == "primary"
+
+
+def test_group_commit_hands_commit_lsn_to_sender(monkeypatch):
+    monkeypatch.setattr(kmw, "_DB_READY", True)
+    monkeypatch.setenv("CHAT_GROUP_COMMIT_MS", "5")
+    monkeypatch.setitem(kmw._CHAT_GROUP, "committer", None)
+    monkeypatch.setattr(kmw, "notify_chat", None, raising=False)
+
+    def flush(items):
+        # 그룹 커밋 스레드: 요청 컨텍스트 없음 → g 대신 항목에 LSN
+        assert not has_request_context()
+        for it in items:
+            it["lsn"] = 0x1_0000_00A0
+        return list(range(1, len(items) + 1))
+
+    monkeypatch.setattr(kmw, "_chat_insert_batch", flush)
+    res = kmw.app.test_client().post("/api/chat/send", json={"room": "t", "message": "hi"})
+    assert res.status_code == 200
+    assert res.headers[replica.HEADER] == "1/A0"
+    assert "db_lsn=1/A0" in res.headers["Set-Cookie"]
+
+
+def test_replica_query_failure_falls_back_without_tripping_primary(monkeypatch):
+    monkeypatch.setattr(kmw, "_DB_READY", True)
+    _replica_at(monkeypatch, replay_lsn=100)
+    # ReplicaCursor가 남기는 표시와 같은 상태로 실패
+    err = psycopg.OperationalError("server closed the connection unexpectedly")
+    err._replica = True
+    monkeypatch.setattr(resilience, "pg_connect", lambda url, **kw: _FakeConn("replica", error=err))
+    monkeypatch.setattr(kmw, "get_conn", lambda: _FakeConn("primary", rows=[(1, "memo", None)]))
+
+    res = kmw.app.test_client().get("/api/memos")
+    assert res.status_code == 200
+    assert res.get_json() == [{"id": 1, "content": "memo", "created_at": None}]
+    assert resilience.breaker("postgres-read").snapshot()["failures"] == 1
+    assert resilience.breaker("postgres").snapshot()["failures"] == 0
+
+
+def test_replica_failures_do_not_turn_on_read_only_mode(monkeypatch):
+    monkeypatch.setenv("BREAKER_FAILURES", "3")
+    resilience.reset()
+    monkeypatch.setattr(kmw, "_DB_READY", True)
+    _replica_at(monkeypatch, replay_lsn=100)
+    err = psycopg.OperationalError("server closed the connection unexpectedly")
+    err._replica = True
+    monkeypatch.setattr(resilience, "pg_connect", lambda url, **kw: _FakeConn("replica", error=err))
+    monkeypatch.setattr(kmw, "get_conn", lambda: _FakeConn("primary", rows=[]))
+
+    client = kmw.app.test_client()
+    for _ in range(5):
+        assert client.get("/api/memos").status_code == 200
+    assert resilience.breaker("postgres-read").state == "open"
+    assert resilience.breaker("postgres").state == "closed"
+
+
+def test_replica_queries_are_traced(monkeypatch):
+    monkeypatch.setattr(kmw, "_DB_READY", True)
+    monkeypatch.setenv("ADMIN_TOKEN", "t")
+    monkeypatch.setattr(querytrace, "ENABLED", True)
+    monkeypatch.setattr(querytrace, "SLOW_MS", 0)
+    monkeypatch.setattr(querytrace, "EXPLAIN_SAMPLE", 0)
+    querytrace.clear()
+    _replica_at(monkeypatch, replay_lsn=100)
+
+    # 서버 없이 실제 커서 클래스의 execute 경로만 태움 (psycopg 내부 실행은 흉내)
+    monkeypatch.setattr(psycopg.Cursor, "execute", lambda self, query, params=None, **kw: self)
+    monkeypatch.setattr(psycopg.Cursor, "fetchall", lambda self: [(7, "memo", None)])
+    monkeypatch.setattr(psycopg.Cursor, "close", lambda self: None)
+
+    class _CursorConn(_FakeConn):
+        def cursor(self):
+            cur = self.cursor_factory.__new__(self.cursor_factory)
+            cur._rowcount = 1
+            return cur
+
+    def connect(url, **kw):
+        conn = _CursorConn("replica")
+        conn.cursor_factory = kw["cursor_factory"]
+        return conn
+
+    monkeypatch.setattr(resilience, "pg_connect", connect)
+    monkeypatch.setattr(kmw, "get_conn", lambda: pytest.fail("replica GET went to primary"))
+
+    client = kmw.app.test_client()
+    assert client.get("/api/memos").get_json() == [{"id": 7, "content": "memo", "created_at": None}]
+    slow = client.get("/admin/slow", headers={"X-Admin-Token": "t"}).get_json()
+    querytrace.clear()
+    assert any(q["route"] == "GET api_get_memos" and "from memos" in q["sql"] for q in slow["queries"])
@@ -0,0 +1,135 @@
+# test_suggest.py
+# ✅ 메모 자동완성 테스트 (DB 불필요)
+#   python -m pytest -q test_suggest.py
+import pytest
+
+import keyword_manager_web as kmw
+import suggest
+
+
+# ===============================
+# ✅ 자모 / 초성 접두어
+# ===============================
+@pytest.fixture
+def idx():
+    i = suggest.PrefixIndex()
+    for w in ("한글", "한국어", "하늘", "삼성 전자", "hello world", "전화"):
+        i.add(w)
+    return i
+
+
+def test_jamo_prefix_matches_half_typed_syllable(idx):
+    # 자모로 풀면 "한그" = ㅎㅏㄴㄱㅡ → "한글"(ㅎㅏㄴㄱㅡㄹ)의 접두어, "한국어"(ㅎㅏㄴㄱㅜ…)는 아님
+    assert idx.suggest("한그") == ["한글"]
+    # "하"는 받침 없는 글자 → 받침/다음 글자가 붙는 모든 단어
+    assert set(idx.suggest("하")) == {"하늘", "한국어", "한글"}
+    # 받침까지 친 글자는 그 자모 순서로 이어지는 단어만 ("할" = ㅎㅏㄹ, "하늘" = ㅎㅏㄴ…)
+    assert idx.suggest("할") == []
+
+
+def test_choseong_query(idx):
+    assert set(idx.suggest("ㅎㄱ")) == {"한글", "한국어"}
+    assert idx.suggest("ㅎㄴ") == ["하늘"]
+
+
+def test_word_start_and_latin_prefixes(idx):
+    assert set(idx.suggest("전")) == {"삼성 전자", "전화"}
+    assert idx.suggest("ㅈㅈ") == ["삼성 전자"]
+    assert idx.suggest("wor") == ["hello world"]
+
+
+def test_add_remove_and_limit(idx):
+    assert idx.add("한글") is False  # 중복
+    assert idx.remove("한글") is True
+    assert idx.remove("한글") is False
+    assert "한글" not in idx and len(idx) == 5
+    assert idx.suggest("한그") == []
+    assert len(idx.suggest("ㅎ", limit=2)) == 2
+
+
+def test_jamo_decomposition():
+    assert suggest.choseong("한글 abc") == "ㅎㄱ abc"
+    assert suggest.is_choseong_query("ㅎㄱ") and not suggest.is_choseong_query("한ㄱ")
+    assert suggest.jamo("한") == suggest.jamo("하") + suggest.jamo("ㄴ")
+
+
+# ===============================
+# ✅ 워커 간 동기화: 삭제는 id 차이로만 반영 (전체 재구성 없음)
+# ===============================
+class _MemoDB:
+    """ _memo_index_sync가 보내는 쿼리만 흉내 내는 memos 테이블 """
+
+    def __init__(self, rows):
+        self.rows = dict(rows)
+        self.queries = []
+        self._out = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        sql = " ".join(sql.split())
+        self.queries.append(sql)
+        ids = sorted(self.rows)
+        if sql.startswith("select count(*)"):
+            self._out = [(len(ids), max(ids, default=0))]
+        elif sql == "select id, content from memos where id > %s":
+            self._out = [(i, self.rows[i]) for i in ids if i > params[0]]
+        elif sql == "select id from memos where id = any(%s)":
+            self._out = [(i,) for i in ids if i in set(params[0])]
+        elif sql == "select id, content from memos where id <= %s and id <> all(%s)":
+            self._out = [(i, self.rows[i]) for i in ids if i <= params[0] and i not in set(params[1])]
+        elif sql == "select id, content from memos":
+            self._out = [(i, self.rows[i]) for i in ids]
+        else:
+            raise AssertionError(sql)
+
+    def fetchone(self):
+        return self._out[0]
+
+    def fetchall(self):
+        return self._out
+
+
+@pytest.fixture
+def memo_db(monkeypatch):
+    db = _MemoDB({1: "한글", 2: "한국어", 3: "삼성전자"})
+    monkeypatch.setattr(kmw, "get_conn", lambda: db)
+    monkeypatch.setenv("MEMO_SUGGEST_RESYNC_SEC", "0")
+    monkeypatch.setattr(kmw, "_MEMO_INDEX", kmw.suggest.PrefixIndex())
+    monkeypatch.setattr(kmw, "_MEMO_IDS", {})
+    monkeypatch.setattr(kmw, "_MEMO_SYNC", {"loaded": False, "max_id": 0, "checked": 0.0})
+    kmw._memo_index_sync()
+    return db
+
+
+def test_delete_elsewhere_is_applied_without_rebuild(memo_db, monkeypatch):
+    monkeypatch.setattr(kmw._MEMO_INDEX, "rebuild", lambda kws: pytest.fail("full rebuild"))
+    del memo_db.rows[2]       # 다른 워커가 삭제
+    memo_db.rows[4] = "한라산"  # 다른 워커가 추가
+    kmw._memo_index_sync()
+    assert kmw._MEMO_INDEX.suggest("한", 10) == ["한글", "한라산"]
+    assert set(kmw._MEMO_IDS) == {1, 3, 4}
+    assert "select id, content from memos" not in memo_db.queries[3:]
+
+
+def test_late_committed_lower_id_is_picked_up(memo_db):
+    memo_db.rows[5] = "한강"
+    kmw._memo_index_sync()
+    memo_db.rows[4] = "하늘"  # 5보다 늦게 커밋된 4
+    kmw._memo_index_sync()
+    assert set(kmw._MEMO_IDS) == {1, 2, 3, 4, 5}
+    assert "하늘" in kmw._MEMO_INDEX.suggest("ㅎㄴ", 10)
+
+
+def test_local_delete_removes_by_id(memo_db):
+    kmw._memo_index_removed(1)
+    assert kmw._MEMO_INDEX.suggest("한그", 10) == []
+    kmw._memo_index_removed(1)  # 두 번 와도 그대로
+    assert len(kmw._MEMO_INDEX) == 2